@@ -0,0 +1,98 @@
+import re
+import time
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+_SPACES = re.compile(r'\s+')
+_TRAILING = re.compile(r'[\s?!.]+$')
+
+
+def parse_league_id(value) -> Optional[int]:
+    """
+    league_id vindo de um pedido (número, texto ou vazio) -> int ou None; ValueError se não for um id
+    """
+    if value is None or value == '':
+        return None
+    if isinstance(value, bool):
+        raise ValueError(f"league_id inválido: {value!r}")
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"league_id inválido: {value!r}")
+
+
+def question_key(question: str, league_id: Optional[int] = None) -> Tuple[str, Optional[int]]:
+    """
+    Minúsculas, espaços e pontuação final normalizados ("Tabela  da liga?" -> "tabela da liga").
+    Os acentos ficam: alguns padrões de perguntas só existem com acento e mudariam a resposta
+    """
+    text = _TRAILING.sub('', _SPACES.sub(' ', question.lower().strip()))
+    return text, parse_league_id(league_id)
+
+
+class AnswerCache:
+    """
+    Respostas do chat já geradas, por pergunta normalizada + liga. Cada resposta fica ligada às entradas
+    do cache (e dados locais derivados) usadas para a construir: deixa de ser servida assim que alguma é
+    reescrita, expira ou o cache é limpo, e nunca dura mais do que ttl segundos
+    """
+
+    def __init__(self, manager, max_entries: int = 500, ttl: float = 300):
+        self.manager = manager
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()  # chave -> (resposta, dependências, ms a gerar)
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'stores': 0, 'invalidations': 0, 'evictions': 0,
+                      'saved_ms': 0.0, 'build_ms': 0.0}
+
+    def get(self, question: str, league_id: Optional[int] = None) -> Optional[str]:
+        key = question_key(question, league_id)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and not self.manager.dependencies_current(entry[1]):
+                del self._entries[key]
+                self.stats['invalidations'] += 1
+                entry = None
+            if entry is None:
+                self.stats['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats['hits'] += 1
+            # Cada hit poupa o tempo que a resposta levou a gerar
+            self.stats['saved_ms'] += entry[2]
+            return entry[0]
+
+    def put(self, question: str, league_id: Optional[int], answer: str, deps: Dict, build_ms: float):
+        """
+        Guardar uma resposta com as dependências recolhidas pelo data manager durante a sua geração
+        """
+        now = time.time()
+        deps = dict(deps, valid_until=min(deps['valid_until'], now + self.ttl))
+        with self._lock:
+            self.stats['build_ms'] += build_ms
+            if not self.manager.dependencies_current(deps, now) or self.max_entries <= 0:
+                return
+            key = question_key(question, league_id)
+            self._entries.pop(key, None)
+            self._entries[key] = (answer, deps, build_ms)
+            self.stats['stores'] += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats['evictions'] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self.stats, entries=len(self._entries))
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = round(stats['hits'] / lookups, 3) if lookups else 0.0
+        stats['saved_ms'] = round(stats['saved_ms'], 1)
+        # Tempo médio a gerar uma resposta (perguntas respondidas sem o cache de respostas)
+        stats['avg_build_ms'] = round(stats['build_ms'] / stats['misses'], 1) if stats['misses'] else 0.0
+        stats['build_ms'] = round(stats['build_ms'], 1)
+        return stats
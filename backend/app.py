@@ -1,13 +1,21 @@
-from flask import Flask, request, jsonify, render_template
+from flask import Flask, Response, request, jsonify, make_response, render_template, stream_with_context
 from flask_cors import CORS
+from werkzeug.http import is_resource_modified
 import os
 from dotenv import load_dotenv
 import json
-from datetime import datetime
+import queue
+import hashlib
+import functools
+from datetime import datetime, timezone
 import logging
 
 from football_manager import FootballDataManager
 from chatbot import FootballChatbot
+from rate_limiter import RateLimitExceeded
+from warmup import CacheWarmer
+from chat_batch import ChatBatch
+from answer_cache import parse_league_id
 
 # Configurar logging
 logging.basicConfig(level=logging.INFO)
@@ -25,8 +33,23 @@ if not api_key:
     print("❌ APISPORTS_KEY não encontrada no arquivo .env")
     exit(1)
 
-football_manager = FootballDataManager(api_key)
-chatbot = FootballChatbot(api_key)
+football_manager = FootballDataManager(api_key, live_poll_interval=float(os.getenv('LIVE_POLL_INTERVAL', 60)))
+chatbot = FootballChatbot(api_key, data_manager=football_manager)
+chat_batch = ChatBatch(chatbot, max_workers=int(os.getenv('CHAT_BATCH_WORKERS', 4)))
+
+# Aquecimento do cache em segundo plano (CACHE_WARMUP_INTERVAL=0 desliga)
+cache_warmer = CacheWarmer(
+    football_manager,
+    interval=float(os.getenv('CACHE_WARMUP_INTERVAL', 3600)),
+    max_requests_per_run=int(os.getenv('CACHE_WARMUP_BUDGET', 20)),
+    reserve_quota=int(os.getenv('CACHE_WARMUP_RESERVE', 30))
+)
+if cache_warmer.interval > 0:
+    cache_warmer.start()
+
+# Jogos ao vivo: um pedido à API de cada vez (intervalo ajustado à quota), partilhado por todos os clientes (LIVE_POLL_INTERVAL=0 desliga)
+if football_manager.live.interval > 0:
+    football_manager.live.start()
 
 # Configurar Flask para UTF-8
 app.config['JSON_AS_ASCII'] = False
@@ -35,12 +58,80 @@ app.config['JSONIFY_PRETTYPRINT_REGULAR'] = True
 @app.before_request
 def before_request():
     """Middleware para garantir codificação UTF-8"""
+    football_manager.reset_response_info()
     if request.content_type and 'application/json' in request.content_type:
         # Forçar UTF-8 para requests JSON
         request.environ['CONTENT_TYPE'] = request.content_type + '; charset=utf-8'
         logger.info(f"Request content-type: {request.content_type}")
         logger.info(f"Request headers: {dict(request.headers)}")
 
+def error_response(e: Exception):
+    """Resposta de erro: 429 com Retry-After se a API foi adiada pelo rate limiter, senão 500"""
+    if isinstance(e, RateLimitExceeded):
+        response = jsonify({'error': str(e), 'retry_after': round(e.retry_after, 1), 'reason': e.reason})
+        response.headers['Retry-After'] = str(max(1, int(e.retry_after + 0.999)))
+        return response, 429
+    return jsonify({'error': str(e)}), 500
+
+@app.after_request
+def add_cache_headers(response):
+    """Indicar se os dados vieram do cache e, se expirados (stale-while-revalidate), a sua idade"""
+    info = football_manager.response_info()
+    if info['stale']:
+        response.headers['X-Cache'] = 'STALE'
+        response.headers['Age'] = str(int(info['age'] or 0))
+    elif info['source'] in ('memory', 'sqlite', 'local'):
+        response.headers['X-Cache'] = 'HIT'
+    elif info['source'] == 'api':
+        response.headers['X-Cache'] = 'MISS'
+    return response
+
+def conditional(validator_for):
+    """
+    Conditional GET: validator_for(**argumentos da rota) devolve (ETag, epoch da última modificação) ou None.
+    Com If-None-Match/If-Modified-Since ainda válidos responde 304 sem construir a resposta
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(**kwargs):
+            validator = validator_for(**kwargs)
+            if validator is not None and not is_resource_modified(
+                    request.environ, etag=validator[0], last_modified=datetime.fromtimestamp(int(validator[1]), timezone.utc)):
+                return add_validator(Response(status=304), validator)
+            response = make_response(view(**kwargs))
+            if response.status_code == 200:
+                # A resposta pode ter trazido uma entrada nova para o cache: validar contra essa
+                validator = validator_for(**kwargs)
+                if validator is not None:
+                    add_validator(response, validator)
+            return response
+        return wrapper
+    return decorator
+
+def add_validator(response, validator):
+    etag, modified = validator
+    response.set_etag(etag)
+    response.last_modified = datetime.fromtimestamp(int(modified), timezone.utc)
+    # O browser guarda a resposta mas confirma sempre com o servidor (um 304 custa muito pouco)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+def cache_entry_validator(endpoint):
+    """Validador das rotas de liga: a entrada em cache de onde vêm os dados"""
+    return lambda league_id: football_manager.cache_validator(endpoint, {'league': league_id, 'season': get_valid_season()})
+
+APP_STARTED = datetime.now(timezone.utc).timestamp()
+_static_validators = {}
+
+def static_validator(name, source):
+    """Dados de configuração (não vêm do cache): ETag do conteúdo, calculado uma vez por arranque"""
+    def validator(**_):
+        if name not in _static_validators:
+            digest = hashlib.sha1(json.dumps(source(), sort_keys=True, default=str).encode()).hexdigest()
+            _static_validators[name] = (f"{name}-{digest[:20]}", APP_STARTED)
+        return _static_validators[name]
+    return validator
+
 # Limite para season 2023 por defeito 
 def get_valid_season(default=2023):
     season = request.args.get('season', type=int)
@@ -95,7 +186,10 @@ def chat():
         logger.info(f"Data parsed: {data}")
         
         question = data.get('question', '')
-        league_id = data.get('league_id', None)
+        try:
+            league_id = parse_league_id(data.get('league_id'))
+        except ValueError:
+            return jsonify({'error': 'league_id inválido'}), 400
         logger.info(f"Pergunta recebida: '{question}'")
         logger.info(f"Pergunta length: {len(question)}")
         
@@ -111,7 +205,8 @@ def chat():
         result = {
             'response': response,
             'timestamp': datetime.now().isoformat(),
-            'requests_used': football_manager.requests_made
+            'requests_used': football_manager.requests_made,
+            'cache': football_manager.response_info()
         }
         
         logger.info("=== FIM DO PROCESSAMENTO DO CHAT ===")
@@ -121,7 +216,77 @@ def chat():
         logger.error(f"Erro geral no chat: {e}", exc_info=True)
         return jsonify({'error': str(e)}), 500
 
+def sse_event(event: str, payload: dict) -> str:
+    """Um evento no formato Server-Sent Events"""
+    return f"event: {event}\ndata: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+@app.route('/api/chat/stream', methods=['GET', 'POST'])
+def chat_stream():
+    """Resposta do chat por Server-Sent Events: estado logo à partida e cada secção assim que os dados chegam"""
+    data = (request.get_json(silent=True) or {}) if request.method == 'POST' else request.args
+    question = data.get('question') or ''
+    if not isinstance(question, str) or not question.strip():
+        return jsonify({'error': 'Pergunta é obrigatória'}), 400
+    try:
+        league_id = parse_league_id(data.get('league_id'))
+    except ValueError:
+        return jsonify({'error': 'league_id inválido'}), 400
+
+    def generate():
+        try:
+            for event, payload in chatbot.stream_question(question, league_id=league_id):
+                if event == 'ping':
+                    # Comentário SSE: mantém a ligação aberta em proxies enquanto se espera pela API
+                    yield ": ping\n\n"
+                    continue
+                if event == 'done':
+                    payload = dict(payload, timestamp=datetime.now().isoformat(),
+                                   requests_used=football_manager.requests_made,
+                                   cache=football_manager.response_info())
+                yield sse_event(event, payload)
+        except Exception as e:
+            logger.error(f"Erro no streaming do chat: {e}", exc_info=True)
+            yield sse_event('error', {'error': str(e)})
+
+    # Sem buffering (nginx/proxies) para cada evento chegar ao browser assim que é gerado
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/api/chat/batch', methods=['POST'])
+def chat_batch_endpoint():
+    """Várias perguntas num só pedido: {"questions": ["...", {"question": "...", "league_id": 94}], "league_id": 94}"""
+    try:
+        data = request.get_json(silent=True) or {}
+        questions = data.get('questions')
+        if not isinstance(questions, list) or not questions:
+            return jsonify({'error': 'Lista de perguntas é obrigatória'}), 400
+        default_league = data.get('league_id')
+        items = []
+        for entry in questions:
+            item = entry if isinstance(entry, dict) else {'question': entry}
+            question = item.get('question')
+            if not isinstance(question, str) or not question.strip():
+                return jsonify({'error': 'Todas as perguntas têm de ser texto não vazio'}), 400
+            try:
+                league_id = parse_league_id(item.get('league_id', default_league))
+            except ValueError:
+                return jsonify({'error': 'league_id inválido'}), 400
+            items.append({'question': question, 'league_id': league_id})
+        if len(items) > chat_batch.max_questions:
+            return jsonify({'error': f'Máximo de {chat_batch.max_questions} perguntas por lote'}), 400
+        
+        result = chat_batch.run(items)
+        result.update({
+            'timestamp': datetime.now().isoformat(),
+            'requests_used': football_manager.requests_made
+        })
+        return jsonify(result)
+    except Exception as e:
+        logger.error(f"Erro no lote de perguntas: {e}", exc_info=True)
+        return error_response(e)
+
 @app.route('/api/leagues')
+@conditional(static_validator('leagues', lambda: football_manager.get_available_leagues()))
 def get_all_leagues():
     """Obter todas as ligas disponíveis"""
     try:
@@ -131,7 +296,7 @@ def get_all_leagues():
             'requests_used': football_manager.requests_made
         })
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return error_response(e)
 
 @app.route('/api/leagues/<country>')
 def get_leagues_by_country(country):
@@ -147,9 +312,10 @@ def get_leagues_by_country(country):
         else:
             return jsonify({'error': f'Não foi possível obter ligas de {country}'}), 500
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return error_response(e)
 
 @app.route('/api/standings/<int:league_id>')
+@conditional(cache_entry_validator('standings'))
 def get_standings(league_id):
     """Obter classificação de uma liga"""
     try:
@@ -196,7 +362,7 @@ def get_standings(league_id):
         else:
             return jsonify({'error': 'Não foi possível obter classificação'}), 500
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return error_response(e)
 
 @app.route('/api/team/<int:team_id>/stats')
 def get_team_stats(team_id):
@@ -255,7 +421,7 @@ def get_team_stats(team_id):
         else:
             return jsonify({'error': 'Não foi possível obter estatísticas'}), 500
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return error_response(e)
 
 @app.route('/api/team/<int:team_id>/matches')
 def get_team_matches(team_id):
@@ -308,7 +474,7 @@ def get_team_matches(team_id):
         else:
             return jsonify({'error': 'Não foi possível obter jogos'}), 500
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return error_response(e)
 
 @app.route('/api/h2h/<int:team1_id>/<int:team2_id>')
 def get_head_to_head(team1_id, team2_id):
@@ -352,9 +518,10 @@ def get_head_to_head(team1_id, team2_id):
         else:
             return jsonify({'error': 'Não foi possível obter histórico'}), 500
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return error_response(e)
 
 @app.route('/api/league/<int:league_id>/teams')
+@conditional(cache_entry_validator('teams'))
 def get_league_teams(league_id):
     """Obter equipas de uma liga"""
     try:
@@ -386,9 +553,10 @@ def get_league_teams(league_id):
         else:
             return jsonify({'error': 'Não foi possível obter equipas'}), 500
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return error_response(e)
 
 @app.route('/api/league/<int:league_id>/topscorers')
+@conditional(cache_entry_validator('players/topscorers'))
 def get_top_scorers(league_id):
     """Obter melhores marcadores de uma liga"""
     try:
@@ -422,7 +590,7 @@ def get_top_scorers(league_id):
         else:
             return jsonify({'error': 'Não foi possível obter marcadores'}), 500
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return error_response(e)
 
 @app.route('/api/fixtures/live')
 def get_live_fixtures():
@@ -472,7 +640,40 @@ def get_live_fixtures():
         else:
             return jsonify({'error': 'Não foi possível obter jogos ao vivo'}), 500
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return error_response(e)
+
+@app.route('/api/fixtures/live/stream')
+def live_fixtures_stream():
+    """Jogos ao vivo por Server-Sent Events: estado completo ao ligar e depois só os jogos que mudaram"""
+    poller = football_manager.live
+    if not poller.running:
+        return jsonify({'error': 'Atualização de jogos ao vivo desligada'}), 503
+    league_id = request.args.get('league', type=int)
+    subscriber, snapshot = poller.subscribe()
+
+    def in_league(fixtures):
+        return [f for f in fixtures if not league_id or f['league']['id'] == league_id]
+
+    def generate():
+        try:
+            yield sse_event('snapshot', dict(snapshot, fixtures=in_league(snapshot['fixtures'])))
+            while True:
+                try:
+                    update = subscriber.get(timeout=15)
+                except queue.Empty:
+                    # Desligado pelo poller por não consumir: o cliente volta a ligar e recebe o estado completo
+                    if not poller.subscribed(subscriber):
+                        return
+                    yield ": ping\n\n"
+                    continue
+                changed = in_league(update['changed'])
+                if changed or update['removed']:
+                    yield sse_event('update', dict(update, changed=changed))
+        finally:
+            poller.unsubscribe(subscriber)
+
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
 
 @app.route('/api/fixtures/<date>')
 def get_fixtures_by_date(date):
@@ -522,7 +723,7 @@ def get_fixtures_by_date(date):
         else:
             return jsonify({'error': f'Não foi possível obter jogos para {date}'}), 500
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return error_response(e)
 
 @app.route('/api/search/team/<team_name>')
 def search_team(team_name):
@@ -551,39 +752,42 @@ def search_team(team_name):
         else:
             return jsonify({'error': f'Não foi possível encontrar equipas com "{team_name}"'}), 500
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return error_response(e)
 
 @app.route('/api/status')
 def get_status():
     """Obter status da API"""
     try:
-        # Get requests made from DB (or memory)
-        requests_used = football_manager.requests_made
+        # Quota diária persistida no SQLite (partilhada por todos os workers)
+        rate_limit = football_manager.rate_limiter.status()
+        requests_used = rate_limit['used_today']
         # Determine status
-        if requests_used >= 100:
+        if rate_limit['remaining_today'] <= 0:
             status = 'offline'
         else:
             status = 'online'
         return jsonify({
             'status': status,
             'requests_used': requests_used,
-            'requests_remaining': max(0, 100 - requests_used),
+            'requests_remaining': rate_limit['remaining_today'],
+            'rate_limit': rate_limit,
             'timestamp': datetime.now().isoformat()
         })
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return error_response(e)
 
 @app.route('/api/cache/clear', methods=['POST'])
 def clear_cache():
     """Limpar cache"""
     try:
         football_manager.clear_cache()
+        cache_warmer.trigger()
         return jsonify({
             'message': 'Cache limpo com sucesso',
             'timestamp': datetime.now().isoformat()
         })
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return error_response(e)
 
 @app.route('/api/cache/stats')
 def get_cache_stats():
@@ -592,12 +796,29 @@ def get_cache_stats():
         stats = football_manager.get_cache_stats()
         return jsonify({
             'cache_stats': stats,
+            'chat_batch': chat_batch.get_stats(),
+            'lookup_executor': chatbot.executor.get_stats(),
+            'answer_cache': chatbot.answer_cache.get_stats(),
             'timestamp': datetime.now().isoformat()
         })
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return error_response(e)
+
+@app.route('/api/cache/warmup', methods=['GET', 'POST'])
+def cache_warmup():
+    """Estado do aquecimento do cache (GET) ou antecipar a próxima passagem (POST)"""
+    try:
+        if request.method == 'POST':
+            cache_warmer.trigger()
+        return jsonify({
+            'warmup': cache_warmer.status(),
+            'timestamp': datetime.now().isoformat()
+        })
+    except Exception as e:
+        return error_response(e)
 
 @app.route('/api/popular-teams')
+@conditional(static_validator('popular-teams', lambda: (football_manager.popular_teams, football_manager.available_leagues)))
 def get_popular_teams():
     """Obter equipas populares por liga"""
     try:
@@ -613,12 +834,7 @@ def get_popular_teams():
             # Retornar todas as equipas populares
             all_popular_teams = {}
             for league_id, teams in football_manager.popular_teams.items():
-                league_info = None
-                for league_key, league_data in football_manager.available_leagues.items():
-                    if league_data['id'] == league_id:
-                        league_info = league_data
-                        break
-                
+                league_info = football_manager.get_league_info(league_id)
                 if league_info:
                     all_popular_teams[league_info['name']] = {
                         'league_id': league_id,
@@ -628,7 +844,7 @@ def get_popular_teams():
             
             return jsonify({'popular_teams': all_popular_teams})
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return error_response(e)
 
 @app.errorhandler(404)
 def not_found(error):
@@ -640,7 +856,7 @@ def internal_error(error):
 
 if __name__ == '__main__':
     print("🚀 Iniciando Football ChatBot API...")
-    print(f"📊 Requests disponíveis: {100 - football_manager.requests_made}/100")
+    print(f"📊 Requests disponíveis: {football_manager.daily_quota - football_manager.requests_made}/{football_manager.daily_quota}")
     print("🏆 Ligas disponíveis:", list(football_manager.get_available_leagues().keys()))
     print("💬 Acesse: https://football-chatbot-aoop.onrender.com")
     
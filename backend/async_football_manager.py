@@ -0,0 +1,230 @@
+import json
+import time
+import random
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from functools import partial, wraps
+from typing import Callable, Dict, Optional, Tuple
+
+import aiohttp
+import requests
+
+from football_manager import FootballDataManager
+from http_session import ApiSession
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUSES = (500, 502, 503, 504)
+
+
+class AsyncResponse:
+    """
+    Resposta já lida do aiohttp com o que o FootballDataManager usa de requests.Response
+    """
+
+    def __init__(self, status_code: int, text: str):
+        self.status_code = status_code
+        self.text = text
+
+    def json(self):
+        return json.loads(self.text)
+
+
+def _trace_config() -> aiohttp.TraceConfig:
+    # Tempo de connect das ligações novas; ligações reutilizadas não passam por aqui
+    async def on_create_start(session, ctx, params):
+        ctx.trace_request_ctx['connect_start'] = time.perf_counter()
+
+    async def on_create_end(session, ctx, params):
+        ctx.trace_request_ctx['connect'] = time.perf_counter() - ctx.trace_request_ctx['connect_start']
+
+    config = aiohttp.TraceConfig()
+    config.on_connection_create_start.append(on_create_start)
+    config.on_connection_create_end.append(on_create_end)
+    return config
+
+
+class AsyncApiSession:
+    """
+    Transporte aiohttp com a interface do ApiSession (get/stats/close), no lugar do http do FootballDataManager.
+    Os pedidos correm no event loop do cliente assíncrono e a thread que chama espera pelo resultado; sem event
+    loop (cliente fechado) ou quando chamado na própria thread do loop usa a sessão síncrona (fallback).
+    Cada retry passa por on_retry, como no ApiSession; tempos e contadores vão para o fallback
+    """
+
+    def __init__(self, headers: Dict, fallback: ApiSession, pool_size: int = 10, retries: int = 2,
+                 backoff_factor: float = 0.5, on_retry: Optional[Callable[[], bool]] = None):
+        self.headers = headers
+        self.fallback = fallback
+        self.pool_size = pool_size
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self.on_retry = on_retry
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._session_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def bind(self, loop: asyncio.AbstractEventLoop):
+        self._loop = loop
+
+    def _in_loop_thread(self, loop: asyncio.AbstractEventLoop) -> bool:
+        try:
+            return asyncio.get_running_loop() is loop
+        except RuntimeError:
+            return False
+
+    def get(self, url: str, params: Dict = None, timeout: float = 10) -> Tuple[AsyncResponse, Dict]:
+        loop = self._loop
+        if loop is None or loop.is_closed() or not loop.is_running() or self._in_loop_thread(loop):
+            return self.fallback.get(url, params=params, timeout=timeout)
+        future = asyncio.run_coroutine_threadsafe(self._get(url, params, timeout), loop)
+        try:
+            # Margem para os retries e respetivos backoffs
+            return future.result(timeout=timeout * (self.retries + 2))
+        except FutureTimeout:
+            future.cancel()
+            raise requests.exceptions.Timeout(f"sem resposta do event loop para {url}")
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        # Uma sessão aiohttp só serve o loop onde foi criada
+        if self._session is None or self._session.closed or self._session_loop is not self._loop:
+            connector = aiohttp.TCPConnector(limit=self.pool_size, keepalive_timeout=60)
+            self._session = aiohttp.ClientSession(headers=self.headers, connector=connector,
+                                                  trace_configs=[_trace_config()])
+            self._session_loop = self._loop
+        return self._session
+
+    async def _get(self, url: str, params: Dict, timeout: float) -> Tuple[AsyncResponse, Dict]:
+        session = self._get_session()
+        query = {k: str(v) for k, v in (params or {}).items() if v is not None}
+        attempt = 0
+        while True:
+            trace = {'connect': None}
+            start = time.perf_counter()
+            try:
+                async with session.get(url, params=query, timeout=aiohttp.ClientTimeout(total=timeout),
+                                       trace_request_ctx=trace) as response:
+                    ttfb = time.perf_counter() - start
+                    text = await response.text()
+                    status = response.status
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                if attempt < self.retries and await self._may_retry():
+                    await self._backoff(attempt)
+                    attempt += 1
+                    continue
+                if isinstance(e, asyncio.TimeoutError):
+                    raise requests.exceptions.Timeout(str(e)) from e
+                raise
+            if status in RETRY_STATUSES and attempt < self.retries and await self._may_retry():
+                await self._backoff(attempt)
+                attempt += 1
+                continue
+            connect = trace['connect']
+            timing = {
+                'connect_ms': round((connect or 0) * 1000, 1),
+                'ttfb_ms': round(ttfb * 1000, 1),
+                'total_ms': round((time.perf_counter() - start) * 1000, 1),
+                'reused': connect is None
+            }
+            self.fallback.record(timing)
+            return AsyncResponse(status, text), timing
+
+    async def _may_retry(self) -> bool:
+        if self.on_retry is None:
+            return True
+        # O rate limiter escreve no SQLite: fora do event loop
+        return await asyncio.get_running_loop().run_in_executor(None, self.on_retry)
+
+    async def _backoff(self, attempt: int):
+        logger.info(f"🔁 Nova tentativa {attempt + 1}/{self.retries} à API")
+        base = self.backoff_factor * (2 ** attempt)
+        if base > 0:
+            await asyncio.sleep(random.uniform(base / 2, base))
+
+    def stats(self) -> Dict:
+        return self.fallback.stats()
+
+    async def close(self):
+        self._loop = None
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+
+
+def _async_method(name: str):
+    """
+    Versão assíncrona de um método do FootballDataManager: corre o método síncrono no executor do cliente
+    """
+    method = getattr(FootballDataManager, name)
+
+    @wraps(method)
+    async def call(self, *args, **kwargs):
+        return await self._call(getattr(self.manager, name), *args, **kwargs)
+    return call
+
+
+class AsyncFootballDataManager:
+    """
+    Cliente asyncio do FootballDataManager. Os get_* são os do gestor síncrono (cache em memória e SQLite,
+    single-flight, stale-while-revalidate, rate limiter, armazenamento local), corridos num executor próprio;
+    só o transporte é assíncrono: os pedidos à API são feitos com aiohttp no event loop.
+    Métodos sem I/O (get_available_leagues, identify_league_by_name, get_league_info...) usam-se em .manager
+    """
+
+    def __init__(self, api_key: str = None, manager: FootballDataManager = None, http_pool_size: int = 10,
+                 http_retries: int = 2, backoff_factor: float = 0.5, max_workers: int = 16, **manager_kwargs):
+        self.manager = manager or FootballDataManager(api_key, **manager_kwargs)
+        self.transport = AsyncApiSession(self.manager.headers, self.manager.http, pool_size=http_pool_size,
+                                         retries=http_retries, backoff_factor=backoff_factor,
+                                         on_retry=self.manager._charge_retry)
+        self.manager.http = self.transport
+        # Executor próprio: as threads à espera da API não ocupam o executor por defeito do loop
+        # (usado pelo transporte para o rate limiter)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='async-manager')
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def _call(self, fn, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        self.transport.bind(loop)
+        return await loop.run_in_executor(self._executor, partial(fn, *args, **kwargs))
+
+    async def close(self):
+        await self.transport.close()
+
+    get_leagues = _async_method('get_leagues')
+    get_standings = _async_method('get_standings')
+    get_team_standing = _async_method('get_team_standing')
+    get_team_statistics = _async_method('get_team_statistics')
+    get_recent_matches = _async_method('get_recent_matches')
+    get_fixtures_by_league = _async_method('get_fixtures_by_league')
+    get_head_to_head = _async_method('get_head_to_head')
+    get_teams_by_league = _async_method('get_teams_by_league')
+    get_top_scorers = _async_method('get_top_scorers')
+    search_team = _async_method('search_team')
+    get_live_fixtures = _async_method('get_live_fixtures')
+    get_fixtures_by_date = _async_method('get_fixtures_by_date')
+    get_next_fixtures = _async_method('get_next_fixtures')
+    identify_team_by_name = _async_method('identify_team_by_name')
+    get_team_info = _async_method('get_team_info')
+    clear_cache = _async_method('clear_cache')
+    get_cache_stats = _async_method('get_cache_stats')
+
+
+# Exemplo de uso
+if __name__ == "__main__":
+    async def main():
+        async with AsyncFootballDataManager() as manager:
+            # Pedidos independentes em paralelo
+            standings, scorers = await asyncio.gather(
+                manager.get_standings(94),
+                manager.get_top_scorers(94)
+            )
+            print("Classificação:", bool(standings), "| Marcadores:", bool(scorers))
+            print("Estatísticas do cache:", await manager.get_cache_stats())
+
+    asyncio.run(main())
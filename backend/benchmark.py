@@ -0,0 +1,398 @@
+# Benchmarks da camada de dados (não fazem requests à API-Sports)
+# Uso: python benchmark.py [nome ...]   (sem argumentos corre todos)
+import os
+import sys
+import json
+import time
+import shutil
+import sqlite3
+import tempfile
+import statistics
+
+from football_manager import FootballDataManager
+from cache_keys import make_request_key
+from cache_codec import ENCODING_JSON, ENCODING_ZLIB, decode_response
+from fuzzy_match import normalize
+
+SHIPPED_DB = os.path.join(os.path.dirname(__file__), 'api_cache.db')
+
+
+def _shipped_payloads(endpoint: str = None) -> list:
+    """
+    Respostas reais guardadas no api_cache.db (aberto só para leitura, qualquer formato)
+    """
+    payloads = []
+    try:
+        conn = sqlite3.connect(f'file:{SHIPPED_DB}?mode=ro', uri=True)
+        conn.row_factory = sqlite3.Row
+        for row in conn.execute('SELECT * FROM api_requests'):
+            keys = row.keys()
+            if endpoint and row['endpoint'] != endpoint:
+                continue
+            blob = row['response_blob'] if 'response_blob' in keys else None
+            encoding = row['encoding'] if 'encoding' in keys else None
+            if row['response'] is None and blob is None:
+                continue
+            params = json.loads(row['params']) if row['params'] else {}
+            payloads.append((row['endpoint'], params, decode_response(row['response'], blob, encoding)[0]))
+        conn.close()
+    except sqlite3.Error:
+        pass
+    return payloads
+
+
+def _sample_payload(endpoint: str = 'standings') -> dict:
+    """
+    Payload real do api_cache.db ou um sintético se não existir
+    """
+    shipped = _shipped_payloads(endpoint)
+    if shipped:
+        return shipped[0][2]
+    table = [{'rank': i, 'team': {'id': i, 'name': f'Team {i}', 'logo': ''}, 'points': 60 - i,
+              'goalsDiff': 0, 'form': 'WWDLW',
+              'all': {'played': 34, 'win': 10, 'draw': 5, 'lose': 5, 'goals': {'for': 40, 'against': 30}}}
+             for i in range(1, 19)]
+    return {'errors': [], 'response': [{'league': {'id': 94, 'standings': [table]}}]}
+
+
+def _synthetic_season(league_id: int = 94, season: int = 2023, teams: int = 18) -> dict:
+    """
+    Calendário completo (ida e volta) de uma liga, no formato de /fixtures
+    """
+    start = 1691884800  # 2023-08-13
+    fixtures = []
+    fixture_id = league_id * 100000
+    for home in range(1, teams + 1):
+        for away in range(1, teams + 1):
+            if home == away:
+                continue
+            fixture_id += 1
+            timestamp = start + (fixture_id % 306) * 86400
+            fixtures.append({
+                'fixture': {'id': fixture_id, 'date': time.strftime('%Y-%m-%dT%H:%M:%S+00:00', time.gmtime(timestamp)),
+                            'timestamp': timestamp, 'status': {'long': 'Match Finished', 'short': 'FT', 'elapsed': 90}},
+                'league': {'id': league_id, 'name': f'League {league_id}', 'season': season},
+                'teams': {'home': {'id': home, 'name': f'Team {home}', 'logo': ''},
+                          'away': {'id': away, 'name': f'Team {away}', 'logo': ''}},
+                'goals': {'home': fixture_id % 3, 'away': fixture_id % 2}
+            })
+    return {'errors': [], 'results': len(fixtures), 'response': fixtures}
+
+
+def _timeit(fn, n: int) -> dict:
+    samples = []
+    for _ in range(n):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1e6)
+    return {
+        'mean_us': round(statistics.mean(samples), 1),
+        'median_us': round(statistics.median(samples), 1),
+        'p95_us': round(sorted(samples)[int(n * 0.95) - 1], 1)
+    }
+
+
+def _new_manager(tmpdir: str, **kwargs) -> FootballDataManager:
+    return FootballDataManager(api_key='benchmark', db_path=os.path.join(tmpdir, 'bench.db'), **kwargs)
+
+
+def _print_results(title: str, results: dict):
+    print(f"\n=== {title} ===")
+    for name, r in results.items():
+        print(f"{name:<28} mean {r['mean_us']:>9} µs | median {r['median_us']:>9} µs | p95 {r['p95_us']:>9} µs")
+
+
+def bench_cache_hit(n: int = 2000):
+    """
+    Latência de um cache hit: ligação nova por lookup (antes), pool SQLite e LRU em memória
+    """
+    with tempfile.TemporaryDirectory() as tmpdir:
+        # Formato de texto original, para comparar só o efeito das ligações e da memória
+        manager = _new_manager(tmpdir, response_encoding=ENCODING_JSON)
+        params = {'league': 94, 'season': 2023}
+        sqlite_only = FootballDataManager(api_key='benchmark', db_path=manager.db_path, memory_cache_bytes=0,
+                                          response_encoding=ENCODING_JSON)
+        manager._save_request_to_db('standings', params, _sample_payload('standings'), 200)
+        _, params_json = make_request_key('standings', params)
+
+        def connect_per_call():
+            conn = sqlite3.connect(manager.db_path)
+            row = conn.execute(
+                'SELECT response, created_at FROM api_requests WHERE endpoint = ? AND params = ? '
+                'ORDER BY created_at DESC LIMIT 1', ('standings', params_json)
+            ).fetchone()
+            conn.close()
+            return json.loads(row[0])
+
+        assert manager._make_request('standings', params) is not None, "cache hit esperado"
+        results = {
+            'antes: connect por lookup': _timeit(connect_per_call, n),
+            'pool SQLite (sem memória)': _timeit(lambda: sqlite_only._make_request('standings', params), n),
+            'depois: LRU em memória': _timeit(lambda: manager._make_request('standings', params), n),
+        }
+        manager.db.close_all()
+        sqlite_only.db.close_all()
+    _print_results('Cache hit (standings)', results)
+    return results
+
+
+def bench_key_lookup(n: int = 2000, entries: int = 5000):
+    """
+    Lookup numa tabela grande: endpoint + params sem índice (antes) vs request_key indexada (depois)
+    """
+    with tempfile.TemporaryDirectory() as tmpdir:
+        manager = _new_manager(tmpdir)
+        with manager.db.connection() as conn:
+            for i in range(entries):
+                key, params_json = make_request_key('teams', {'search': f'team {i}'})
+                conn.execute(
+                    'INSERT INTO api_requests (request_key, endpoint, params, response, status_code) VALUES (?, ?, ?, ?, ?)',
+                    (key, 'teams', params_json, '{"response": []}', 200)
+                )
+        key, params_json = make_request_key('teams', {'search': f'team {entries // 2}'})
+
+        def scan():
+            return manager.db.fetchone(
+                'SELECT response, created_at FROM api_requests WHERE endpoint = ? AND params = ? '
+                'ORDER BY created_at DESC LIMIT 1', ('teams', params_json)
+            )
+
+        def indexed():
+            return manager.db.fetchone('SELECT response, created_at FROM api_requests WHERE request_key = ?', (key,))
+
+        results = {
+            f'antes: scan ({entries} linhas)': _timeit(scan, n),
+            'depois: request_key indexada': _timeit(indexed, n),
+        }
+        manager.db.close_all()
+    _print_results('Lookup por chave', results)
+    return results
+
+
+def bench_storage(n: int = 500):
+    """
+    Tamanho da base de dados e latência de leitura do SQLite (sem camada de memória) por formato
+    """
+    payloads = _shipped_payloads() or [('standings', {'league': 94, 'season': 2023}, _sample_payload())]
+    results = {}
+    sizes = {}
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for encoding in (ENCODING_JSON, ENCODING_ZLIB):
+            manager = FootballDataManager(api_key='benchmark', db_path=os.path.join(tmpdir, f'{encoding}.db'),
+                                          memory_cache_bytes=0, response_encoding=encoding)
+            for endpoint, params, data in payloads:
+                manager._save_request_to_db(endpoint, params, data, 200)
+            manager.compact_db()
+            sizes[encoding] = manager.get_storage_report()['db_bytes']
+            endpoint, params, _ = max(payloads, key=lambda p: len(json.dumps(p[2])))
+            results[f'{encoding}: maior resposta'] = _timeit(lambda: manager._make_request(endpoint, params), n)
+            manager.db.close_all()
+    _print_results(f'Leitura do SQLite ({len(payloads)} respostas)', results)
+    for encoding, size in sizes.items():
+        print(f"{encoding:<28} base de dados: {size / 1024:.0f} KB")
+    return results
+
+
+def bench_head_to_head(n: int = 500):
+    """
+    Confrontos diretos: calculados a partir do calendário da liga já guardado vs pedido a fixtures/headtohead
+    """
+    with tempfile.TemporaryDirectory() as tmpdir:
+        manager = _new_manager(tmpdir, memory_cache_bytes=0)
+        manager._save_request_to_db('fixtures', {'league': 94, 'season': 2023}, _synthetic_season(), 200)
+        upstream = []
+        manager._fetch_from_api = lambda endpoint, params: upstream.append(endpoint)
+        pairs = [(home, away) for home in range(1, 19) for away in range(home + 1, 19)]
+        # Mesma consulta já em cache (o melhor caso antes: só acontecia se o par já tivesse sido pedido)
+        h2h = manager.store.head_to_head(1, 2, 2)[0]
+        manager._save_request_to_db('fixtures/headtohead', {'h2h': '1-2', 'last': '2'}, {'response': h2h}, 200)
+        results = {
+            'antes: fixtures/headtohead em cache': _timeit(lambda: manager.get_head_to_head(1, 2, 2), n),
+            'depois: derivado localmente': _timeit(lambda: manager.store.head_to_head(3, 4, 2), n),
+        }
+        for team1, team2 in pairs:
+            manager.get_head_to_head(team1, team2, 2)
+        stats = manager.get_h2h_stats()
+        manager.db.close_all()
+    _print_results('Confrontos diretos (last=2)', results)
+    print(f"{len(pairs)} pares: {stats['requests_saved']} requests à API poupados, {len(upstream)} feitos "
+          f"(média local {stats['avg_local_ms']} ms)")
+    return results
+
+
+# Grafias reais de utilizadores (pesquisas de equipas no api_cache.db) e erros de escrita frequentes
+USER_SPELLINGS = ['guimaraes', 'guimarães', 'vitoria guimaraes', 'barca', 'barça', 'atletico', 'atlético madrid',
+                  'benfika', 'bemfica', 'sportin', 'sporting lisboa', 'familicão', 'famalicao', 'porto', 'fc porto',
+                  'man utd', 'manchester utd', 'liverpol', 'arsenall', 'totenham', 'chelsey', 'juventos', 'juve',
+                  'intter', 'napolli', 'bayern munchen', 'baiern', 'dortmund', 'leverkusen', 'psg', 'marselha',
+                  'real madird', 'sevila', 'villareal', 'braga', 'boavista', 'moreirence', 'rio ave']
+
+
+def bench_fuzzy(n: int = 200):
+    """
+    Identificação de equipas: só nomes/prefixos (antes) vs com acentos e erros de escrita (depois)
+    """
+    shipped = [params['search'] for endpoint, params, _ in _shipped_payloads('teams') if 'search' in params]
+    corpus = USER_SPELLINGS + shipped
+    with tempfile.TemporaryDirectory() as tmpdir:
+        shutil.copy(SHIPPED_DB, os.path.join(tmpdir, 'bench.db'))
+        manager = _new_manager(tmpdir)
+        directory = manager.team_directory
+
+        def resolve(query, fuzzy):
+            return directory.search(query, fuzzy=fuzzy) or directory.find_in_text(query, fuzzy=fuzzy)
+
+        resolved = {mode: sum(1 for q in corpus if resolve(q, mode)) for mode in (False, True)}
+        results = {
+            'antes: exato + prefixos': _timeit(lambda: [resolve(q, False) for q in corpus], n),
+            'depois: + aproximado': _timeit(lambda: [resolve(q, True) for q in corpus], n),
+        }
+        manager.db.close_all()
+    _print_results(f'Identificação de equipas ({len(corpus)} pesquisas por iteração)', results)
+    print(f"Resolvidas localmente: antes {resolved[False]}/{len(corpus)}, depois {resolved[True]}/{len(corpus)} "
+          f"({len(directory.fuzzy)} aliases indexados)")
+    return results
+
+
+# Perguntas típicas do chat (exemplos da ajuda e variações em português e inglês)
+QUESTIONS = ['classificação da liga portugal', 'como está o benfica', 'últimos jogos do porto',
+             'próximos jogos do sporting', 'benfica vs porto', 'histórico entre benfica e porto nos últimos anos',
+             'quem é o melhor marcador da premier league', 'jogos ao vivo', 'ajuda', 'ligas', 'limpar cache',
+             'estatísticas do braga', 'posição do sporting na tabela', 'who is top scorer in serie a',
+             'league table bundesliga', 'when does liverpool play next', 'informações da liga espanhola',
+             'qual o líder da ligue 1', 'resultados recentes do ajax na eredivisie', 'jogos hoje na champions',
+             'quando joga o real madrid', 'clássico', 'forma recente do arsenal', 'série a brasileira tabela']
+
+
+def _legacy_analyze(bot, manager, question: str):
+    """
+    Implementação anterior: um re.findall por padrão e um 'in' por comando/alias de liga
+    """
+    import re
+    scores = {qt: sum(len(re.findall(p, question)) for p in patterns) for qt, patterns in bot.question_patterns.items()}
+    intent = max(scores, key=scores.get) if max(scores.values()) > 0 else 'general'
+    command = next((c for c, triggers in bot.special_commands.items() if any(t in question for t in triggers)), None)
+    league = None
+    for text in (question.lower(), normalize(question)):
+        league = next((manager.available_leagues[k] for a, k in manager.league_aliases.items() if a in text), None)
+        league = league or next((info for k, info in manager.available_leagues.items()
+                                 if k in text or info['name'].lower() in text), None)
+        if league:
+            break
+    return intent, command, league and league['id']
+
+
+def _automaton_analyze(bot, manager, question: str):
+    hits = bot.matcher.scan(question)
+    command = next((c for c in bot.special_commands if hits[('command', c)]), None)
+    league = manager.league_from_hits(hits) or manager.league_from_hits(manager.league_patterns.scan(normalize(question)))
+    return bot._classify_question(question, hits), command, league and league['id']
+
+
+def bench_classify(n: int = 2000):
+    """
+    Classificação da pergunta + comandos especiais + liga: padrões um a um (antes) vs um autómato (depois)
+    """
+    from chatbot import FootballChatbot
+    with tempfile.TemporaryDirectory() as tmpdir:
+        shutil.copy(SHIPPED_DB, os.path.join(tmpdir, 'bench.db'))
+        manager = _new_manager(tmpdir)
+        bot = FootballChatbot(data_manager=manager)
+        mismatches = [q for q in QUESTIONS
+                      if _legacy_analyze(bot, manager, q) != _automaton_analyze(bot, manager, q)]
+        results = {
+            'antes: re.findall por padrão': _timeit(lambda: [_legacy_analyze(bot, manager, q) for q in QUESTIONS], n),
+            'depois: autómato': _timeit(lambda: [_automaton_analyze(bot, manager, q) for q in QUESTIONS], n),
+        }
+        manager.db.close_all()
+    _print_results(f'Classificação de perguntas ({len(QUESTIONS)} por iteração)', results)
+    print(f"Resultados iguais: {len(QUESTIONS) - len(mismatches)}/{len(QUESTIONS)} {mismatches or ''}")
+    return results
+
+
+def bench_fanout(n: int = 5, latency: float = 0.2):
+    """
+    Perguntas compostas com consultas lentas (latency simulada por consulta): em série vs em paralelo
+    """
+    from chatbot import FootballChatbot
+    from lookup_executor import LookupExecutor
+    questions = ['posição e estatísticas do benfica na tabela', 'clássico', 'classificação da premier league']
+    with tempfile.TemporaryDirectory() as tmpdir:
+        shutil.copy(SHIPPED_DB, os.path.join(tmpdir, 'bench.db'))
+        manager = _new_manager(tmpdir)
+        bot = FootballChatbot(data_manager=manager)
+        # Mede a geração das respostas: sem o cache de respostas
+        bot.answer_cache.max_entries = 0
+        # Sem requests reais: o que não estiver no cache fica sem resposta
+        manager._fetch_from_api = lambda *args, **kwargs: None
+        # Cada consulta distinta é lenta só da primeira vez em cada pergunta (as repetições vêm do cache)
+        seen = set()
+        for name in ('identify_team_by_name', 'get_standings', 'get_team_statistics', 'get_head_to_head'):
+            original = getattr(manager, name)
+
+            def slow(*args, _name=name, _original=original, **kwargs):
+                if (_name, args) not in seen:
+                    seen.add((_name, args))
+                    time.sleep(latency)
+                return _original(*args, **kwargs)
+            setattr(manager, name, slow)
+
+        def ask(question):
+            seen.clear()
+            return bot.process_question(question)
+        results = {}
+        for label, workers in (('antes: em série', 1), ('depois: em paralelo', 4)):
+            bot.executor = LookupExecutor(manager, max_workers=workers, per_request=workers)
+            for question in questions:
+                results[f'{label} | {question[:16]}'] = _timeit(lambda: ask(question), n)
+            bot.executor.shutdown()
+        manager.db.close_all()
+    _print_results(f'Respostas com várias consultas ({latency * 1000:.0f} ms por consulta)', results)
+    return results
+
+
+def bench_answers(n: int = 500):
+    """
+    Perguntas repetidas: gerar a resposta de cada vez vs cache de respostas (com os mesmos dados em cache)
+    """
+    from chatbot import FootballChatbot
+    from answer_cache import AnswerCache
+    with tempfile.TemporaryDirectory() as tmpdir:
+        shutil.copy(SHIPPED_DB, os.path.join(tmpdir, 'bench.db'))
+        manager = _new_manager(tmpdir)
+        bot = FootballChatbot(data_manager=manager)
+
+        # Sem requests reais: o que não estiver no cache fica guardado como resposta vazia
+        def fetch(endpoint, params=None):
+            manager._save_request_to_db(endpoint, params, {'response': []}, 200)
+            return {'response': []}
+        manager._fetch_from_api = fetch
+        results = {}
+        for label, entries in (('antes: sem cache de respostas', 0), ('depois: cache de respostas', 500)):
+            bot.answer_cache = AnswerCache(manager, max_entries=entries)
+            for question in QUESTIONS[:6]:
+                bot.process_question(question)
+            results[label] = _timeit(lambda: [bot.process_question(q) for q in QUESTIONS[:6]], n)
+        stats = bot.answer_cache.get_stats()
+        manager.db.close_all()
+    _print_results('6 perguntas repetidas', results)
+    # As perguntas sem dados no cache enviado (respostas de erro) nunca são guardadas
+    print(f"  hit rate {stats['hit_rate']:.0%}, {stats['saved_ms']:.0f} ms poupados")
+    return results
+
+
+BENCHMARKS = {
+    'cache_hit': bench_cache_hit,
+    'key_lookup': bench_key_lookup,
+    'storage': bench_storage,
+    'head_to_head': bench_head_to_head,
+    'fuzzy': bench_fuzzy,
+    'classify': bench_classify,
+    'fanout': bench_fanout,
+    'answers': bench_answers,
+}
+
+if __name__ == "__main__":
+    selected = sys.argv[1:] or list(BENCHMARKS)
+    for name in selected:
+        BENCHMARKS[name]()
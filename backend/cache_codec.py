@@ -0,0 +1,35 @@
+import json
+import zlib
+from typing import Any, Optional, Tuple
+
+# Formatos de armazenamento das respostas em api_requests
+ENCODING_JSON = 'json'   # texto JSON na coluna response (formato antigo)
+ENCODING_ZLIB = 'zlib'   # JSON compacto comprimido na coluna response_blob
+ENCODINGS = (ENCODING_JSON, ENCODING_ZLIB)
+
+ZLIB_LEVEL = 6
+
+
+def dumps_compact(data: Any) -> bytes:
+    return json.dumps(data, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+def encode_response(data: Any, encoding: str = ENCODING_ZLIB) -> Tuple[Optional[str], Optional[bytes], int]:
+    """
+    Serializar uma resposta: devolve (texto, blob, tamanho do JSON sem compressão)
+    """
+    if encoding == ENCODING_ZLIB:
+        raw = dumps_compact(data)
+        return None, zlib.compress(raw, ZLIB_LEVEL), len(raw)
+    text = json.dumps(data)
+    return text, None, len(text)
+
+
+def decode_response(text: Optional[str], blob: Optional[bytes], encoding: Optional[str]) -> Tuple[Any, int]:
+    """
+    Ler uma resposta guardada em qualquer formato: devolve (dados, tamanho do JSON)
+    """
+    if encoding == ENCODING_ZLIB and blob is not None:
+        raw = zlib.decompress(blob)
+        return json.loads(raw), len(raw)
+    return json.loads(text), len(text)
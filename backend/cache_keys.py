@@ -0,0 +1,43 @@
+import json
+import hashlib
+from typing import Dict, Tuple, Union
+
+
+def _normalize_value(value):
+    # O requests envia tudo como texto na query string: 5 e "5" são o mesmo pedido
+    if isinstance(value, (list, tuple)):
+        return [_normalize_value(v) for v in value]
+    if isinstance(value, str):
+        return value.strip()
+    return str(value)
+
+
+def canonical_params(params: Union[Dict, str, None]) -> str:
+    """
+    Serialização única dos parâmetros (None e {} são equivalentes, chaves ordenadas)
+    """
+    if isinstance(params, str):
+        try:
+            params = json.loads(params)
+        except ValueError:
+            return params
+    if not params:
+        return '{}'
+    normalized = {str(k): _normalize_value(v) for k, v in params.items() if v is not None}
+    return json.dumps(normalized, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+
+
+def request_key(endpoint: str, params: Union[Dict, str, None] = None) -> str:
+    """
+    Hash canónico de endpoint + parâmetros, usado como chave do cache
+    """
+    return make_request_key(endpoint, params)[0]
+
+
+def make_request_key(endpoint: str, params: Union[Dict, str, None] = None) -> Tuple[str, str]:
+    """
+    Devolver (chave, parâmetros canónicos) para um pedido
+    """
+    params_json = canonical_params(params)
+    raw = f"{endpoint.strip('/')}?{params_json}"
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest(), params_json
@@ -0,0 +1,116 @@
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+MINUTE = 60
+HOUR = 60 * MINUTE
+DAY = 24 * HOUR
+# Dados de épocas terminadas não mudam: na prática nunca expiram
+FOREVER = 10 * 365 * DAY
+
+
+def current_season(now: datetime = None) -> int:
+    """
+    Época em curso no formato da API-Sports (a época 2023 é a 2023/24, começa em julho)
+    """
+    now = now or datetime.utcnow()
+    return now.year if now.month >= 7 else now.year - 1
+
+
+def _season(params: Dict) -> Optional[int]:
+    try:
+        return int(params.get('season'))
+    except (TypeError, ValueError):
+        return None
+
+
+def is_completed_season(params: Dict) -> bool:
+    season = _season(params)
+    return season is not None and season < current_season()
+
+
+def is_live(params: Dict) -> bool:
+    return 'live' in params
+
+
+def is_season_schedule(params: Dict) -> bool:
+    """
+    Calendário completo de uma liga (league + season, sem outros filtros)
+    """
+    return set(params) == {'league', 'season'}
+
+
+class TTLPolicy:
+    """
+    Política de validade do cache por endpoint e forma dos parâmetros
+    """
+
+    def __init__(self, default_ttl: float = 5 * MINUTE, default_max_stale: float = 1 * HOUR,
+                 empty_ttl: float = 10 * MINUTE):
+        self.default_ttl = default_ttl
+        self.default_max_stale = default_max_stale
+        # Respostas sem resultados (ex: estatísticas ainda não publicadas) nunca ficam mais do que empty_ttl,
+        # mesmo nas regras de épocas terminadas
+        self.empty_ttl = empty_ttl
+        # (endpoint, condição sobre os params ou None, ttl, max_stale em segundos); a primeira regra que bate ganha.
+        # max_stale é quanto tempo depois de expirar uma entrada ainda pode ser servida enquanto se atualiza.
+        self.rules: List[Tuple[str, Optional[Callable[[Dict], bool]], float, float]] = []
+        self.add_rule('fixtures', 15, when=is_live, max_stale=45)
+        self.add_rule('fixtures', FOREVER, when=lambda p: is_completed_season(p) and 'next' not in p)
+        self.add_rule('fixtures', 10 * MINUTE, when=lambda p: 'date' in p or 'next' in p, max_stale=2 * HOUR)
+        # O calendário da época é atualizado por janelas de datas (FixtureSchedule); o completo só 1x por dia
+        self.add_rule('fixtures', 1 * DAY, when=is_season_schedule, max_stale=7 * DAY)
+        self.add_rule('fixtures', 30 * MINUTE, max_stale=6 * HOUR)
+        self.add_rule('fixtures/headtohead', 12 * HOUR, max_stale=7 * DAY)
+        self.add_rule('standings', FOREVER, when=is_completed_season)
+        self.add_rule('standings', 1 * HOUR, max_stale=1 * DAY)
+        self.add_rule('teams/statistics', FOREVER, when=is_completed_season)
+        self.add_rule('teams/statistics', 6 * HOUR, max_stale=1 * DAY)
+        self.add_rule('players/topscorers', FOREVER, when=is_completed_season)
+        self.add_rule('players/topscorers', 6 * HOUR, max_stale=1 * DAY)
+        self.add_rule('teams', 7 * DAY, max_stale=30 * DAY)
+        self.add_rule('leagues', 1 * DAY, max_stale=7 * DAY)
+
+    def add_rule(self, endpoint: str, ttl: float, when: Callable[[Dict], bool] = None, first: bool = False,
+                 max_stale: float = None):
+        """
+        Registar uma regra; com first=True passa à frente das existentes
+        """
+        rule = (endpoint.strip('/'), when, ttl, self.default_max_stale if max_stale is None else max_stale)
+        if first:
+            self.rules.insert(0, rule)
+        else:
+            self.rules.append(rule)
+
+    def lookup(self, endpoint: str, params: Dict = None) -> Tuple[float, float]:
+        """
+        (ttl, max_stale) em segundos para um pedido
+        """
+        endpoint = endpoint.strip('/')
+        params = params or {}
+        for rule_endpoint, when, ttl, max_stale in self.rules:
+            if rule_endpoint == endpoint and (when is None or when(params)):
+                return ttl, max_stale
+        return self.default_ttl, self.default_max_stale
+
+    def ttl_for(self, endpoint: str, params: Dict = None, empty: bool = False) -> float:
+        """
+        TTL em segundos para um pedido (empty=True: a resposta veio sem resultados)
+        """
+        ttl = self.lookup(endpoint, params)[0]
+        return min(ttl, self.empty_ttl) if empty else ttl
+
+    def max_stale_for(self, endpoint: str, params: Dict = None) -> float:
+        """
+        Tempo máximo (depois de expirar) em que uma entrada ainda pode ser servida
+        """
+        return self.lookup(endpoint, params)[1]
+
+    def describe(self) -> Dict[str, float]:
+        """
+        TTL base (regra sem condição) de cada endpoint
+        """
+        summary = {}
+        for endpoint, when, ttl, _ in self.rules:
+            if when is None and endpoint not in summary:
+                summary[endpoint] = ttl
+        return summary
@@ -0,0 +1,94 @@
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from answer_cache import question_key
+from rate_limiter import RateLimitExceeded
+
+logger = logging.getLogger(__name__)
+
+
+class ChatBatch:
+    """
+    Responder a várias perguntas de uma vez: perguntas repetidas só são respondidas uma vez, os dados de
+    todas são planeados primeiro e cada consulta distinta (endpoint + params) é feita uma única vez,
+    e as respostas são geradas em paralelo já a partir do cache
+    """
+
+    def __init__(self, chatbot, max_workers: int = 4, max_questions: int = 50):
+        self.chatbot = chatbot
+        self.manager = chatbot.data_manager
+        self.max_workers = max_workers
+        self.max_questions = max_questions
+        self._lock = threading.Lock()
+        self.totals = {'batches': 0, 'questions': 0, 'unique_questions': 0, 'planned_lookups': 0,
+                       'distinct_lookups': 0, 'api_calls': 0}
+
+    def _lookup(self, name: str, args: tuple) -> int:
+        # Pedidos à API feitos por esta consulta (contados por thread no data manager)
+        self.manager.reset_response_info()
+        try:
+            getattr(self.manager, name)(*args)
+        except RateLimitExceeded:
+            pass  # A resposta à pergunta explica o limite; as restantes consultas continuam
+        except Exception as e:
+            logger.warning(f"⚠️ Falha a pré-carregar {name}{args}: {e}")
+        return self.manager.response_info()['api_calls']
+
+    def _answer(self, question: str, league_id: Optional[int]) -> Tuple[str, int]:
+        self.manager.reset_response_info()
+        response = self.chatbot.process_question(question, league_id=league_id)
+        return response, self.manager.response_info()['api_calls']
+
+    def run(self, items: List[Dict]) -> Dict:
+        """
+        items: [{'question': ..., 'league_id': ...}]; devolve as respostas pela mesma ordem e as estatísticas
+        """
+        if len(items) > self.max_questions:
+            raise ValueError(f"Máximo de {self.max_questions} perguntas por lote")
+        started = time.time()
+        # A mesma chave do cache de respostas: perguntas que só diferem no acento não são a mesma pergunta
+        keys = [question_key(item['question'], item.get('league_id')) for item in items]
+        unique: Dict[Tuple[str, Optional[int]], Dict] = {}
+        for key, item in zip(keys, items):
+            unique.setdefault(key, item)
+
+        # 1. Planear: que dados precisa cada pergunta (sem pedidos à API)
+        plans = {key: self.chatbot.plan_question(item['question'], item.get('league_id'))
+                 for key, item in unique.items()}
+        planned = sum(len(plans[key]) for key in keys)
+        lookups = list(dict.fromkeys(lookup for plan in plans.values() for lookup in plan))
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='chat-batch') as pool:
+            # 2. Cada consulta distinta uma única vez, em paralelo (o rate limiter continua a aplicar-se)
+            prefetch_calls = sum(pool.map(lambda lookup: self._lookup(*lookup), lookups))
+            # 3. Responder às perguntas distintas em paralelo, já com os dados em cache
+            answers = dict(zip(unique, pool.map(lambda item: self._answer(item['question'], item.get('league_id')),
+                                                unique.values())))
+
+        answer_calls = sum(calls for _, calls in answers.values())
+        results = [{'question': item['question'], 'league_id': item.get('league_id'), 'response': answers[key][0]}
+                   for key, item in zip(keys, items)]
+        stats = {
+            'questions': len(items),
+            'unique_questions': len(unique),
+            'questions_deduplicated': len(items) - len(unique),
+            'planned_lookups': planned,
+            'distinct_lookups': len(lookups),
+            'api_calls': prefetch_calls + answer_calls,
+            # Consultas que perguntas repetidas ou com dados em comum teriam feito em separado
+            'lookups_deduplicated': planned - len(lookups),
+            'duration_ms': round((time.time() - started) * 1000, 1)
+        }
+        with self._lock:
+            self.totals['batches'] += 1
+            for field in ('questions', 'unique_questions', 'planned_lookups', 'distinct_lookups', 'api_calls'):
+                self.totals[field] += stats[field]
+        logger.info(f"📦 Lote de {stats['questions']} perguntas: {stats['distinct_lookups']} consultas distintas "
+                    f"de {stats['planned_lookups']} planeadas, {stats['api_calls']} requests à API")
+        return {'results': results, 'stats': stats}
+
+    def get_stats(self) -> Dict:
+        return dict(self.totals)
@@ -1,16 +1,24 @@
 import re
 import json
-from typing import Dict, List, Optional, Tuple
+import time
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from collections import Counter
 from datetime import datetime, timedelta
 from football_manager import FootballDataManager
+from fuzzy_match import normalize
+from pattern_matcher import PatternMatcher
+from lookup_executor import LookupExecutor
+from answer_cache import AnswerCache, parse_league_id
+from rate_limiter import RateLimitExceeded
 
 class FootballChatbot:
     """
     Chatbot inteligente para análise de futebol - Versão melhorada
     """
     
-    def __init__(self, api_key: str = None):
-        self.data_manager = FootballDataManager(api_key)
+    def __init__(self, api_key: str = None, data_manager: FootballDataManager = None):
+        # Partilhar o data manager da app evita caches e contadores duplicados
+        self.data_manager = data_manager or FootballDataManager(api_key)
         
         # Patterns de perguntas mais abrangentes
         self.question_patterns = {
@@ -72,6 +80,38 @@ class FootballChatbot:
             'cache': ['cache', 'limpar cache', 'clear cache'],
             'stats': ['estatísticas do bot', 'stats do bot', 'info']
         }
+        # Padrões de perguntas, comandos especiais e nomes de ligas num só autómato, construído uma vez:
+        # cada pergunta é percorrida uma única vez para classificar, detetar comandos e identificar a liga
+        self.matcher = PatternMatcher()
+        for question_type, patterns in self.question_patterns.items():
+            for pattern in patterns:
+                self.matcher.add(pattern, ('intent', question_type))
+        for command, triggers in self.special_commands.items():
+            for trigger in triggers:
+                self.matcher.add(trigger, ('command', command))
+        for priority, pattern, league_key in self.data_manager.get_league_patterns():
+            self.matcher.add(pattern, ('league', priority, league_key))
+        # Consultas de uma resposta (equipas, tabela, estatísticas...) em paralelo quando não dependem umas das outras;
+        # pool partilhado por todos os pedidos, no máximo 4 threads por pedido (respostas de uma secção não o usam)
+        self.executor = LookupExecutor(self.data_manager, max_workers=16, per_request=4)
+        # Respostas já geradas, invalidadas quando os dados de que dependem mudam
+        self.answer_cache = AnswerCache(self.data_manager)
+        # Comandos com respostas que mudam a cada pedido (ou que limpam o cache): nunca reaproveitar
+        self.uncached_commands = ('cache', 'stats')
+        # Respostas de erro/limite de requests: a próxima tentativa pode correr bem
+        self.uncached_prefixes = ('😔', '⏳')
+        # Perguntas que precisam de uma equipa (sem ela, a resposta pede para indicar a equipa)
+        self.team_intents = ('team_stats', 'recent_matches', 'next_matches')
+        # Perguntas sobre a liga: a equipa nunca é procurada na API (na classificação só destaca uma linha,
+        # por isso basta a que se conhece localmente; o confronto direto identifica as suas equipas)
+        self.league_intents = ('standings', 'head_to_head', 'top_scorers', 'live_matches', 'league_info')
+        # Linha de estado enviada logo no início das respostas por streaming
+        self.stream_labels = {
+            'standings': '📊 Classificação', 'team_stats': '📈 Estatísticas', 'recent_matches': '⚽ Últimos jogos',
+            'next_matches': '📅 Próximos jogos', 'head_to_head': '🆚 Confrontos diretos',
+            'live_matches': '🔴 Jogos ao vivo', 'top_scorers': '🥇 Melhores marcadores',
+            'league_info': '🏆 Informação da liga', 'general': '💬 Resposta'
+        }
         self.classicos = {
             94: ('benfica', 'porto'),
             140: ('real madrid', 'barcelona'),
@@ -109,175 +149,330 @@ class FootballChatbot:
                             return val.strip().replace('  ', ' ')
         return None
 
-    def _identify_team(self, text: str, league_id: int = None) -> Optional[Dict]:
+    def _identify_team(self, text: str, league_id: int = None, upstream: bool = True) -> Optional[Dict]:
         # Primeiro tenta extrair só o nome da equipa
         team_name = self._extract_team_name(text)
         if team_name:
-            team = self.data_manager.identify_team_by_name(team_name)
+            team = self.data_manager.identify_team_by_name(team_name, upstream)
             # Se for lista, extrai o primeiro elemento
             if isinstance(team, list) and len(team) > 0:
                 team = team[0]['team'] if 'team' in team[0] else team[0]
             if team and isinstance(team, dict):
-                # Procurar a que liga pertence nos popular_teams
-                for lid, teams in self.data_manager.popular_teams.items():
-                    for tkey, tdata in teams.items():
-                        if tdata['id'] == team['id']:
-                            team['league'] = lid
-                return team
+                return self._attach_team_league(team)
         # Se não conseguiu extrair, tenta com o texto todo (fallback antigo)
-        team = self.data_manager.identify_team_by_name(text)
+        team = self.data_manager.identify_team_by_name(text, upstream)
         if isinstance(team, list) and len(team) > 0:
             team = team[0]['team'] if 'team' in team[0] else team[0]
         if team and isinstance(team, dict):
-            for lid, teams in self.data_manager.popular_teams.items():
-                for tkey, tdata in teams.items():
-                    if tdata['id'] == team['id']:
-                        team['league'] = lid
-            return team
+            return self._attach_team_league(team)
         return None
 
+    @staticmethod
+    def _first_team(result) -> Optional[Dict]:
+        # identify_team_by_name devolve itens de /teams: ficar com a equipa do primeiro
+        if result and isinstance(result, list):
+            return result[0]['team'] if 'team' in result[0] else result[0]
+        return None
+
+    def _attach_team_league(self, team: Dict) -> Dict:
+        # Liga da equipa pelo índice inverso team_id -> liga do data manager; numa cópia, porque o dict da equipa
+        # é o do diretório de equipas (ou de uma resposta no cache em memória) e é partilhado entre pedidos
+        league_id = self.data_manager.get_team_league(team['id'])
+        if league_id is None:
+            return team
+        return dict(team, league=league_id)
+
+    def plan_question(self, question: str, league_id: int = None) -> List[Tuple[str, tuple]]:
+        """
+        Dados de que a resposta vai precisar, como (método do data manager, argumentos), sem pedidos à API:
+        o mesmo encaminhamento que process_question, mas só com equipas e ligas conhecidas localmente.
+        Serve para buscar uma única vez os dados comuns a várias perguntas antes de as responder.
+        """
+        question_lower = question.lower().strip()
+        return self._route(question_lower, self.matcher.scan(question_lower), self._league_id(league_id),
+                           upstream=False)['lookups']
+
+    @staticmethod
+    def _league_id(league_id) -> Optional[int]:
+        try:
+            return parse_league_id(league_id)
+        except ValueError:
+            # Os endpoints já recusam ids inválidos; aqui fica a liga por omissão em vez de um erro
+            return None
+
+    def _cacheable(self, question_lower: str, hits: Counter) -> bool:
+        return not (any(hits[('command', command)] for command in self.uncached_commands)
+                    or question_lower in ["informações sobre o chat", "informacoes sobre o chat"])
+
     def process_question(self, question: str, league_id: int = None) -> str:
         """
-        Processar pergunta do utilizador com melhor análise contextual
+        Processar pergunta do utilizador com melhor análise contextual (respostas recentes vêm do cache de respostas)
+        """
+        question_lower = question.lower().strip()
+        hits = self.matcher.scan(question_lower)
+        league_id = self._league_id(league_id)
+        if not self._cacheable(question_lower, hits):
+            return self._collect(self._answer_events(question_lower, hits, league_id))[0]
+        cached = self.answer_cache.get(question_lower, league_id)
+        if cached is not None:
+            return cached
+        start = time.perf_counter()
+        with self.data_manager.track_dependencies() as deps:
+            response, failed = self._collect(self._answer_events(question_lower, hits, league_id))
+        if not failed and not response.startswith(self.uncached_prefixes):
+            self.answer_cache.put(question_lower, league_id, response, deps, (time.perf_counter() - start) * 1000)
+        return response
+
+    @staticmethod
+    def _collect(events: Iterator[Tuple[str, Dict]]) -> Tuple[str, bool]:
+        # Resposta completa a partir dos eventos: as secções juntas ou só a mensagem de erro
+        sections = []
+        for event, payload in events:
+            if event == 'section':
+                sections.append(payload['text'])
+            elif event == 'error':
+                return payload['text'], True
+        return "\n\n".join(sections), False
+
+    def stream_question(self, question: str, league_id: int = None,
+                        heartbeat: float = 5.0) -> Iterator[Tuple[str, Dict]]:
+        """
+        Resposta por partes (para Server-Sent Events), como (evento, dados):
+        'status' logo à partida, 'progress' quando cada secção fica pronta ('ping' enquanto se espera),
+        'section' por cada bloco da resposta assim que os seus dados chegam e 'done' com a resposta completa
         """
         question_lower = question.lower().strip()
+        hits = self.matcher.scan(question_lower)
+        league_id = self._league_id(league_id)
+        yield 'status', {'text': self._stream_status(question_lower, hits)}
+        cacheable = self._cacheable(question_lower, hits)
+        cached = self.answer_cache.get(question_lower, league_id) if cacheable else None
+        if cached is not None:
+            yield 'section', {'text': cached}
+            yield 'done', {'response': cached}
+            return
+        start = time.perf_counter()
+        sections, failed = [], False
+        # As dependências ficam ligadas a esta thread durante todo o stream (o gerador corre na thread do pedido)
+        with self.data_manager.track_dependencies() as deps:
+            for event, payload in self._answer_events(question_lower, hits, league_id, heartbeat):
+                if event == 'error':
+                    # A mensagem de erro é a última secção; a resposta não fica em cache
+                    failed = True
+                    event = 'section'
+                if event == 'section':
+                    sections.append(payload['text'])
+                yield event, payload
+        response = "\n\n".join(sections)
+        if cacheable and not failed and not response.startswith(self.uncached_prefixes):
+            self.answer_cache.put(question_lower, league_id, response, deps, (time.perf_counter() - start) * 1000)
+        yield 'done', {'response': response}
+
+    def _stream_status(self, question_lower: str, hits: Counter) -> str:
+        if any(hits[('command', command)] for command in self.special_commands):
+            return "⚙️ A preparar a resposta..."
+        label = self.stream_labels[self._classify_question(question_lower, hits)]
+        league_info = self._identify_league(question_lower, hits)
+        if league_info:
+            return f"{label} · {league_info.get('flag', '')} {league_info['name']}..."
+        return f"{label}..."
+
+    def _answer_events(self, question_lower: str, hits: Counter, league_id: int = None,
+                       heartbeat: float = None) -> Iterator[Tuple[str, Dict]]:
+        """
+        Gerar a resposta: as secções do encaminhamento são geradas em paralelo (cada uma faz as suas consultas)
+        e saem ('section') pela ordem da resposta assim que estão prontas. Pelo meio 'progress'/'ping';
+        se a resposta falhar, 'error' com a mensagem a mostrar em vez dela
+        """
         try:
-            # Resposta especial para 'Informações sobre o chat'
-            if question_lower in ["informações sobre o chat", "informacoes sobre o chat"]:
-                return self._show_bot_stats()
-            # Se for 'Informações sobre (team)', tratar como 'Como está o (team)'
-            match = re.match(r"informações sobre (.+)", question_lower)
-            if match and match.group(1).strip() != "o chat":
-                team = match.group(1).strip()
-                return self.process_question(f"Como está o {team}")
-            # Clássico dinâmico
-            if 'clássico' in question_lower or 'classico' in question_lower:
-                league_info = self._identify_league(question_lower)
-                if league_info and 'id' in league_info:
-                    lid = league_info['id']
-                else:
-                    lid = 94  # Default para Portugal
-                team1_slug, team2_slug = self.classicos.get(lid, ('benfica', 'porto'))
-                team1 = self.data_manager.identify_team_by_name(team1_slug)
-                team2 = self.data_manager.identify_team_by_name(team2_slug)
-                if team1 and isinstance(team1, list) and len(team1) > 0:
-                    team1 = team1[0]['team'] if 'team' in team1[0] else team1[0]
-                else:
-                    team1 = None
-                if team2 and isinstance(team2, list) and len(team2) > 0:
-                    team2 = team2[0]['team'] if 'team' in team2[0] else team2[0]
-                else:
-                    team2 = None
-                if team1 and team2:
-                    h2h = self.data_manager.get_head_to_head(team1['id'], team2['id'])
-                    if h2h and len(h2h) > 0:
-                        match = h2h[0]
-                        home = match['teams']['home']['name']
-                        away = match['teams']['away']['name']
-                        home_goals = match['goals']['home']
-                        away_goals = match['goals']['away']
-                        date = match['fixture']['date'][:10]
-                        response = f"🔥 **Clássico {home} vs {away}** 🔥\n\nÚltimo jogo: {date}\n{home} {home_goals} - {away_goals} {away}\n"
-                        if len(h2h) > 1:
-                            response += "\nHistórico recente:\n"
-                            for m in h2h[:5]:
-                                d = m['fixture']['date'][:10]
-                                h = m['teams']['home']['name']
-                                a = m['teams']['away']['name']
-                                hg = m['goals']['home']
-                                ag = m['goals']['away']
-                                response += f"- {d}: {h} {hg}-{ag} {a}\n"
-                        response += "\nQueres saber mais estatísticas ou o histórico completo? Pergunta!"
-                        return response
-                    else:
-                        return "🔥 **Clássico** 🔥\n\nNão há jogos recentes nem histórico disponível entre estas equipas. Queres saber estatísticas ou próximos jogos? Pergunta!"
-                return "🔥 **Clássico** 🔥\n\nNão foi possível identificar as equipas do clássico nesta liga."
-            # Pergunta combinada: posição + estatísticas
-            if (("posição" in question_lower or "posicao" in question_lower or "tabela" in question_lower) and "estat" in question_lower):
-                league_info = self._identify_league(question_lower)
-                if league_id is not None:
-                    league_info = self.data_manager.get_league_info(int(league_id)) or {}
-                league_id_val = league_info['id'] if isinstance(league_info, dict) and 'id' in league_info else 94
-                if league_id_val is None:
-                    league_id_val = 94
-                team_info = self._identify_team(question_lower, league_id_val)
-                if not team_info:
-                    return "🤔 Desculpa, não percebi a equipa. Escreve 'ajuda' para ver exemplos de perguntas."
-                standings_resp = self._handle_standings(question_lower, league_info if league_info is not None else {}, team_info)
-                stats_resp = self._handle_team_stats(question_lower, team_info, league_info if league_info is not None else {})
-                return standings_resp + "\n\n" + stats_resp
-            # Verificar comandos especiais primeiro
-            special_response = self._handle_special_commands(question_lower)
-            if special_response:
-                return special_response
-            # Identificar tipo de pergunta
-            question_type = self._classify_question(question_lower)
-            # Identificar liga e equipa no contexto
-            league_info = self._identify_league(question_lower)
-            league_id_val = league_info['id'] if isinstance(league_info, dict) and 'id' in league_info and league_info['id'] is not None else 94
-            team_info = self._identify_team(question_lower, league_id_val)
-            # Se não encontrou equipa e a pergunta é sobre equipa, devolve mensagem amigável
-            if question_type in ['team_stats', 'recent_matches', 'next_matches'] and not team_info:
-                return "🤔 Desculpa, não percebi a equipa. Escreve 'ajuda' para ver exemplos de perguntas."
-            # Processar baseado no tipo
-            if question_type == 'standings':
-                return self._handle_standings(question_lower, league_info if league_info is not None else {}, team_info if team_info is not None else {})
-            elif question_type == 'team_stats':
-                return self._handle_team_stats(question_lower, team_info if team_info is not None else {}, league_info if league_info is not None else {})
-            elif question_type == 'recent_matches':
-                return self._handle_recent_matches(question_lower, team_info if team_info is not None else {}, league_info if league_info is not None else {})
-            elif question_type == 'next_matches':
-                return self._handle_next_matches(question_lower, team_info if team_info is not None else {}, league_info if league_info is not None else {})
-            elif question_type == 'head_to_head':
-                return self._handle_head_to_head(question_lower)
-            elif question_type == 'top_scorers':
-                return self._handle_top_scorers(question_lower, league_info if league_info is not None else {})
-            elif question_type == 'league_info':
-                return self._handle_league_info(question_lower, league_info if league_info is not None else {})
-            else:
-                return self._handle_general(question_lower, team_info if team_info is not None else {}, league_info if league_info is not None else {})
+            sections = self._route(question_lower, hits, league_id)['sections']
+            renders = {index: (render, ()) for index, render in enumerate(sections)}
+            ready, finished, emitted = {}, 0, 0
+            for result in self.executor.stream(renders, heartbeat=heartbeat):
+                if result is None:
+                    yield 'ping', {}
+                    continue
+                index, ok, value = result
+                if not ok:
+                    raise value
+                ready[index] = value
+                finished += 1
+                yield 'progress', {'done': finished, 'total': len(renders)}
+                # A primeira secção ainda por gerar segura as seguintes
+                while emitted in ready:
+                    yield 'section', {'text': ready.pop(emitted)}
+                    emitted += 1
+        except RateLimitExceeded as e:
+            yield 'error', {'text': f"⏳ Estou a receber muitas perguntas neste momento. {e}"}
         except Exception as e:
-            return f"😔 Desculpa, ocorreu um erro ao processar a tua pergunta: {str(e)}\n\nTenta reformular ou escreve 'ajuda' para ver os comandos disponíveis."
+            yield 'error', {'text': f"😔 Desculpa, ocorreu um erro ao processar a tua pergunta: {str(e)}\n\nTenta reformular ou escreve 'ajuda' para ver os comandos disponíveis."}
+
+    @staticmethod
+    def _single(render: Callable[[], str], lookups: List[Tuple[str, tuple]] = None) -> Dict:
+        # Resposta de uma só secção
+        return {'lookups': lookups or [], 'sections': [render]}
+
+    def _route(self, question_lower: str, hits: Counter, league_id: int = None, upstream: bool = True) -> Dict:
+        """
+        Encaminhamento de uma pergunta, partilhado pela resposta normal, por streaming e pelo planeamento:
+        {'lookups': [(método do data manager, argumentos)], 'sections': [funções que geram cada secção]}.
+        As secções fazem elas próprias as consultas (já em cache depois de um pré-carregamento em lote).
+        Com upstream=False as equipas só são procuradas localmente (nenhum pedido à API)
+        """
+        # Resposta especial para 'Informações sobre o chat'
+        if question_lower in ["informações sobre o chat", "informacoes sobre o chat"]:
+            return self._single(self._show_bot_stats)
+        # Se for 'Informações sobre (team)', tratar como 'Como está o (team)'
+        match = re.match(r"informações sobre (.+)", question_lower)
+        if match and match.group(1).strip() != "o chat":
+            redirected = f"como está o {match.group(1).strip()}"
+            return self._route(redirected, self.matcher.scan(redirected), upstream=upstream)
+        # Clássico dinâmico
+        if 'clássico' in question_lower or 'classico' in question_lower:
+            league_info = self._identify_league(question_lower, hits) or {}
+            team1_id, team2_id = self._classico_teams(league_info.get('id') or 94, upstream)
+            if not (team1_id and team2_id):
+                return self._single(lambda: "🔥 **Clássico** 🔥\n\nNão foi possível identificar as equipas do clássico nesta liga.")
+            return self._single(lambda: self._handle_classico(team1_id, team2_id),
+                                [('get_head_to_head', (team1_id, team2_id))])
+        # Pergunta combinada: posição + estatísticas (uma secção para cada, assim que os seus dados chegam)
+        if (("posição" in question_lower or "posicao" in question_lower or "tabela" in question_lower) and "estat" in question_lower):
+            league_info = self._identify_league(question_lower, hits)
+            if league_id is not None:
+                league_info = self.data_manager.get_league_info(league_id)
+            league_info = league_info or {}
+            league_id_val = league_info.get('id') or 94
+            team_info = self._identify_team(question_lower, league_id_val, upstream=upstream)
+            if not team_info:
+                return self._single(lambda: "🤔 Desculpa, não percebi a equipa. Escreve 'ajuda' para ver exemplos de perguntas.")
+            return {
+                'lookups': [('get_standings', (league_id_val, 2023)),
+                            ('get_team_statistics', (team_info['id'], team_info.get('league', 94), 2023))],
+                'sections': [lambda: self._handle_standings(question_lower, league_info, team_info),
+                             lambda: self._handle_team_stats(question_lower, team_info, league_info)]
+            }
+        # Verificar comandos especiais primeiro
+        if any(hits[('command', command)] for command in self.special_commands):
+            return self._single(lambda: self._handle_special_commands(question_lower, hits))
+        # Identificar tipo de pergunta
+        question_type = self._classify_question(question_lower, hits)
+        # Identificar liga e equipa no contexto
+        league_info = self._identify_league(question_lower, hits) or {}
+        league_id_val = league_info.get('id') or 94
+        if question_type == 'head_to_head':
+            # As duas equipas numa só passagem pelo diretório local (a API só para nomes desconhecidos)
+            teams = self.data_manager.extract_teams(question_lower, limit=2, upstream=upstream)
+            lookups = [('get_head_to_head', (teams[0]['id'], teams[1]['id']))] if len(teams) >= 2 else []
+            return self._single(lambda: self._handle_head_to_head(question_lower, teams), lookups)
+        team_info = self._route_team(question_lower, question_type, league_id_val, upstream)
+        # Se não encontrou equipa e a pergunta é sobre equipa, devolve mensagem amigável
+        if question_type in self.team_intents and not team_info:
+            return self._single(lambda: "🤔 Desculpa, não percebi a equipa. Escreve 'ajuda' para ver exemplos de perguntas.")
+        # Processar baseado no tipo
+        team_stats = [('get_team_statistics', (team_info['id'], team_info.get('league', 94), 2023))] if team_info else []
+        if question_type == 'standings':
+            return self._single(lambda: self._handle_standings(question_lower, league_info, team_info),
+                                [('get_standings', (league_id_val, 2023))])
+        elif question_type == 'team_stats':
+            return self._single(lambda: self._handle_team_stats(question_lower, team_info, league_info), team_stats)
+        elif question_type == 'recent_matches':
+            return self._single(lambda: self._handle_recent_matches(question_lower, team_info, league_info),
+                                [('get_recent_matches', (team_info['id'], 5))])
+        elif question_type == 'next_matches':
+            return self._single(lambda: self._handle_next_matches(question_lower, team_info, league_info),
+                                [('get_next_fixtures', (team_info['id'], None, 5))])
+        elif question_type == 'top_scorers':
+            return self._single(lambda: self._handle_top_scorers(question_lower, league_info),
+                                [('get_top_scorers', (league_id_val, 2023))])
+        elif question_type == 'live_matches':
+            return self._single(lambda: self._handle_live_matches(question_lower, league_info),
+                                [('get_live_fixtures', (league_info.get('id'),))])
+        elif question_type == 'league_info':
+            return self._single(lambda: self._handle_league_info(question_lower, league_info),
+                                [('get_standings', (league_info['id'], 2023))] if league_info else [])
+        else:
+            lookups = team_stats or ([('get_standings', (league_info['id'], 2023))] if league_info else [])
+            return self._single(lambda: self._handle_general(question_lower, team_info, league_info), lookups)
+
+    def _route_team(self, question_lower: str, question_type: str, league_id: int, upstream: bool) -> Optional[Dict]:
+        # Perguntas sobre a liga nunca procuram a equipa na API (na classificação só serve para destacar uma linha)
+        if question_type in self.league_intents:
+            return self._identify_team(question_lower, league_id, upstream=False) if question_type == 'standings' else None
+        try:
+            return self._identify_team(question_lower, league_id, upstream=upstream)
+        except RateLimitExceeded:
+            # Só é obrigatória nas perguntas sobre equipas; nas restantes a resposta segue sem equipa
+            if question_type in self.team_intents:
+                raise
+            return None
+
+    def _classico_teams(self, league_id: int, upstream: bool) -> Tuple[Optional[int], Optional[int]]:
+        slugs = self.classicos.get(league_id, ('benfica', 'porto'))
+        if not upstream:
+            return tuple(self.data_manager.find_team_id(slug) for slug in slugs)
+        # As duas equipas em paralelo
+        results = self.executor.run({
+            slug: (lambda slug=slug: self._first_team(self.data_manager.identify_team_by_name(slug)), ())
+            for slug in slugs
+        })
+        return tuple((results[slug] or {}).get('id') for slug in slugs)
+
+    def _handle_classico(self, team1_id: int, team2_id: int) -> str:
+        h2h = self.data_manager.get_head_to_head(team1_id, team2_id)
+        if h2h and len(h2h) > 0:
+            match = h2h[0]
+            home = match['teams']['home']['name']
+            away = match['teams']['away']['name']
+            home_goals = match['goals']['home']
+            away_goals = match['goals']['away']
+            date = match['fixture']['date'][:10]
+            response = f"🔥 **Clássico {home} vs {away}** 🔥\n\nÚltimo jogo: {date}\n{home} {home_goals} - {away_goals} {away}\n"
+            if len(h2h) > 1:
+                response += "\nHistórico recente:\n"
+                for m in h2h[:5]:
+                    d = m['fixture']['date'][:10]
+                    h = m['teams']['home']['name']
+                    a = m['teams']['away']['name']
+                    hg = m['goals']['home']
+                    ag = m['goals']['away']
+                    response += f"- {d}: {h} {hg}-{ag} {a}\n"
+            response += "\nQueres saber mais estatísticas ou o histórico completo? Pergunta!"
+            return response
+        return "🔥 **Clássico** 🔥\n\nNão há jogos recentes nem histórico disponível entre estas equipas. Queres saber estatísticas ou próximos jogos? Pergunta!"
     
-    def _handle_special_commands(self, question: str) -> Optional[str]:
+    def _handle_special_commands(self, question: str, hits: Counter = None) -> Optional[str]:
         """
         Lidar com comandos especiais
         """
-        for command, triggers in self.special_commands.items():
-            for trigger in triggers:
-                if trigger in question:
-                    if command == 'help':
-                        return self._show_help()
-                    elif command == 'leagues':
-                        return self._show_available_leagues()
-                    elif command == 'cache':
-                        return self._handle_cache_command()
-                    elif command == 'stats':
-                        return self._show_bot_stats()
+        hits = self.matcher.scan(question) if hits is None else hits
+        for command in self.special_commands:
+            if hits[('command', command)]:
+                if command == 'help':
+                    return self._show_help()
+                elif command == 'leagues':
+                    return self._show_available_leagues()
+                elif command == 'cache':
+                    return self._handle_cache_command()
+                elif command == 'stats':
+                    return self._show_bot_stats()
         return None
     
-    def _classify_question(self, question: str) -> str:
+    def _classify_question(self, question: str, hits: Counter = None) -> str:
         """
-        Classificar tipo de pergunta com pontuação
+        Classificar tipo de pergunta com pontuação (número de ocorrências dos padrões de cada tipo)
         """
-        scores = {}
-        
-        for question_type, patterns in self.question_patterns.items():
-            score = 0
-            for pattern in patterns:
-                matches = len(re.findall(pattern, question))
-                score += matches
-            scores[question_type] = score
+        hits = self.matcher.scan(question) if hits is None else hits
+        scores = {question_type: hits[('intent', question_type)] for question_type in self.question_patterns}
         
         if max(scores.values()) > 0:
             return max(scores, key=scores.get)
         return 'general'
     
-    def _identify_league(self, text: str) -> Optional[Dict]:
+    def _identify_league(self, text: str, hits: Counter = None) -> Optional[Dict]:
         """
         Identificar liga no texto
         """
-        return self.data_manager.identify_league_by_name(text)
+        return self.data_manager.identify_league_by_name(text, hits)
     
     def _handle_standings(self, question: str, league_info: dict = None, team_info: dict = None) -> str:
         league_info = league_info or {}
@@ -301,15 +496,10 @@ class FootballChatbot:
         highlight_team = team_info.get('id') if team_info else None
         highlight_names = set()
         if team_info and team_info.get('name'):
-            # Adiciona variantes do nome para comparação robusta
-            highlight_names.add(team_info['name'].lower())
-            # Adiciona variantes conhecidas se existirem
-            league_id_val = league_info['id'] if isinstance(league_info, dict) and 'id' in league_info else 94
-            popular_teams = self.data_manager.popular_teams.get(league_id_val, {})
-            for team_key, team_data in popular_teams.items():
-                if team_data['id'] == highlight_team:
-                    for n in team_data['names']:
-                        highlight_names.add(n.lower())
+            # Variantes do nome (nome da API e aliases conhecidos) para comparação robusta
+            highlight_names.add(normalize(team_info['name']))
+            if highlight_team:
+                highlight_names |= self.data_manager.get_team_aliases(highlight_team)
         response = f"{league_flag} **Classificação da {league_name}:**\n\n"
         display_rows = []
         for i, team_data in enumerate(table):
@@ -320,7 +510,7 @@ class FootballChatbot:
             # Destacar só o nome da equipa a bold
             if highlight_team and team_data['team']['id'] == highlight_team:
                 name_disp = f"**{name}**"
-            elif highlight_names and name.lower() in highlight_names:
+            elif highlight_names and normalize(name) in highlight_names:
                 name_disp = f"**{name}**"
             else:
                 name_disp = name
@@ -543,46 +733,13 @@ class FootballChatbot:
         
         return response
     
-    def _handle_head_to_head(self, question: str) -> str:
+    def _handle_head_to_head(self, question: str, teams_found: List[Dict] = None) -> str:
         """
         Responder perguntas sobre confrontos diretos
         """
-        # Tentar identificar duas equipas
-        teams_found = []
-        words = question.split()
-        
-        for i, word in enumerate(words):
-            team = self.data_manager.identify_team_by_name(word)
-            if team and team not in teams_found:
-                # Se for lista, extrai o primeiro elemento
-                if isinstance(team, list) and len(team) > 0:
-                    team = team[0]['team'] if 'team' in team[0] else team[0]
-                if isinstance(team, dict):
-                    teams_found.append(team)
-                if len(teams_found) == 2:
-                    break
-        
-        # Se não encontrou duas equipas, tentar padrões específicos
-        if len(teams_found) < 2:
-            # Procurar padrões como "benfica vs porto"
-            vs_patterns = [r'(.+?)\s+vs\s+(.+)', r'(.+?)\s+contra\s+(.+)', r'(.+?)\s+x\s+(.+)']
-            
-            for pattern in vs_patterns:
-                match = re.search(pattern, question)
-                if match:
-                    team1_name = match.group(1).strip()
-                    team2_name = match.group(2).strip()
-                    
-                    team1 = self.data_manager.identify_team_by_name(team1_name)
-                    team2 = self.data_manager.identify_team_by_name(team2_name)
-                    # Se for lista, extrai o primeiro elemento
-                    if isinstance(team1, list) and len(team1) > 0:
-                        team1 = team1[0]['team'] if 'team' in team1[0] else team1[0]
-                    if isinstance(team2, list) and len(team2) > 0:
-                        team2 = team2[0]['team'] if 'team' in team2[0] else team2[0]
-                    if team1 and team2 and isinstance(team1, dict) and isinstance(team2, dict):
-                        teams_found = [team1, team2]
-                        break
+        if teams_found is None:
+            # Identificar as duas equipas numa só passagem pelo diretório local (a API só para nomes desconhecidos)
+            teams_found = self.data_manager.extract_teams(question, limit=2)
         
         if len(teams_found) < 2:
             return "🤔 Preciso de duas equipas para mostrar o histórico. Ex: 'Benfica vs Porto' ou 'Real Madrid contra Barcelona'"
@@ -853,7 +1010,7 @@ class FootballChatbot:
         response += f"• **Total de entradas:** {stats['total_entries']}\n"
         response += f"• **Entradas ativas:** {stats['active_entries']}\n"
         response += f"• **Entradas expiradas:** {stats['expired_entries']}\n"
-        response += f"• **Requests feitos:** {stats['requests_made']}/100\n"
+        response += f"• **Requests feitos:** {stats['requests_made']}/{stats['daily_quota']}\n"
         response += f"• **Requests restantes:** {stats['requests_remaining']}\n\n"
         
         if stats['expired_entries'] > 0:
@@ -869,7 +1026,7 @@ class FootballChatbot:
         cache_stats = self.data_manager.get_cache_stats()
         
         response = "📊 **Estatísticas do Football Bot:**\n\n"
-        response += f"🔢 **API Requests:** {cache_stats['requests_made']}/100 diários\n"
+        response += f"🔢 **API Requests:** {cache_stats['requests_made']}/{cache_stats['daily_quota']} diários\n"
         response += f"🗄️ **Cache:** {cache_stats['active_entries']} entradas ativas\n"
         response += f"🌍 **Ligas:** {len(self.data_manager.available_leagues)} disponíveis\n"
         response += f"⚽ **Equipas:** {sum(len(teams) for teams in self.data_manager.popular_teams.values())} populares\n\n"
@@ -881,7 +1038,9 @@ class FootballChatbot:
                 league_info = self.data_manager.available_leagues[league_key]
                 response += f"• {league_info['flag']} {league_info['name']}\n"
         
-        response += f"\n⏱️ **Cache Duration:** {self.data_manager.cache_duration} horas"
+        ttl = cache_stats.get('ttl_seconds', {})
+        response += f"\n⏱️ **Cache Duration:** classificações {ttl.get('standings', 0) / 3600:g}h, " \
+                    f"jogos {ttl.get('fixtures', 0) / 60:g} min, épocas terminadas sem expiração"
         
         return response
 
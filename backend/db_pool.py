@@ -0,0 +1,188 @@
+import os
+import sqlite3
+import weakref
+import threading
+import logging
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# PRAGMAs aplicados a cada ligação nova
+DEFAULT_PRAGMAS = {
+    'journal_mode': 'WAL',        # leitores não bloqueiam o escritor
+    'synchronous': 'NORMAL',      # seguro com WAL e muito mais rápido que FULL
+    'temp_store': 'MEMORY',
+    'cache_size': -8000,          # ~8 MB de page cache por ligação
+    'mmap_size': 64 * 1024 * 1024,
+    'busy_timeout': 5000,         # ms à espera de locks entre threads/processos
+}
+
+
+class _Lease:
+    """
+    Ligação emprestada a uma thread; guardada no threading.local, é libertada quando a thread termina
+    """
+    __slots__ = ('conn', '__weakref__')
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+
+
+class SQLitePool:
+    """
+    Pool de ligações SQLite: cada thread usa sempre a mesma ligação enquanto viver (e por processo).
+    Quando a thread termina a ligação volta ao pool (até max_idle livres; as restantes são fechadas),
+    e nunca há mais de max_connections abertas ao mesmo tempo.
+    """
+
+    def __init__(self, db_path: str, pragmas: dict = None, cached_statements: int = 256,
+                 max_connections: int = 32, max_idle: int = 8, checkout_timeout: float = 10.0):
+        self.db_path = db_path
+        self.pragmas = dict(DEFAULT_PRAGMAS, **(pragmas or {}))
+        # O sqlite3 guarda os statements preparados por ligação; como a ligação
+        # é reutilizada, o mesmo SQL não volta a ser compilado
+        self.cached_statements = cached_statements
+        self.max_connections = max_connections
+        self.max_idle = max_idle
+        self.checkout_timeout = checkout_timeout
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._available = threading.Condition(self._lock)
+        self._connections = []
+        self._idle = []
+        self._in_use = 0
+        # Sobe em close_all e depois de um fork: devoluções de ligações antigas são ignoradas
+        self._generation = 0
+        self._pid = os.getpid()
+        self.connections_opened = 0
+        self.connections_reused = 0
+        self.connections_closed = 0
+
+    def _open(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.pragmas['busy_timeout'] / 1000,
+            check_same_thread=False,
+            cached_statements=self.cached_statements
+        )
+        for name, value in self.pragmas.items():
+            conn.execute(f'PRAGMA {name} = {value}')
+        with self._lock:
+            self._connections.append(conn)
+            self.connections_opened += 1
+        logger.debug(f"Nova ligação SQLite aberta ({self.connections_opened}) em {self.db_path}")
+        return conn
+
+    def _get(self) -> sqlite3.Connection:
+        # Depois de um fork (ex: workers do gunicorn) as ligações herdadas não podem ser usadas
+        if os.getpid() != self._pid:
+            self._reset_after_fork()
+        lease = getattr(self._local, 'lease', None)
+        if lease is None:
+            conn, generation = self._checkout()
+            lease = _Lease(conn)
+            # Thread terminada -> threading.local apagado -> lease recolhido -> ligação devolvida
+            weakref.finalize(lease, self._release, conn, generation)
+            self._local.lease = lease
+        return lease.conn
+
+    def _checkout(self):
+        with self._available:
+            if not self._available.wait_for(lambda: self._in_use < self.max_connections, self.checkout_timeout):
+                raise sqlite3.OperationalError(
+                    f"Pool SQLite esgotado: {self.max_connections} ligações em uso há {self.checkout_timeout:.0f}s")
+            self._in_use += 1
+            generation = self._generation
+            if self._idle:
+                self.connections_reused += 1
+                return self._idle.pop(), generation
+        try:
+            return self._open(), generation
+        except Exception:
+            with self._available:
+                self._in_use -= 1
+                self._available.notify()
+            raise
+
+    def _release(self, conn: sqlite3.Connection, generation: int):
+        close = True
+        with self._available:
+            if generation == self._generation:
+                self._in_use -= 1
+                self._available.notify()
+                if len(self._idle) < self.max_idle:
+                    self._idle.append(conn)
+                    close = False
+                else:
+                    self._connections.remove(conn)
+        if close:
+            self._close(conn)
+
+    def _close(self, conn: sqlite3.Connection):
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+            conn.close()
+        except sqlite3.Error:
+            pass
+        self.connections_closed += 1
+
+    def _reset_after_fork(self):
+        self._pid = os.getpid()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._available = threading.Condition(self._lock)
+        self._connections = []
+        self._idle = []
+        self._in_use = 0
+        self._generation += 1
+
+    @contextmanager
+    def connection(self):
+        """
+        Ligação da thread atual; faz commit no fim ou rollback em caso de erro
+        """
+        conn = self._get()
+        try:
+            yield conn
+            if conn.in_transaction:
+                conn.commit()
+        except Exception:
+            if conn.in_transaction:
+                conn.rollback()
+            raise
+
+    def execute(self, sql: str, params: tuple = ()) -> int:
+        """
+        Executar uma escrita e devolver o número de linhas afetadas
+        """
+        with self.connection() as conn:
+            return conn.execute(sql, params).rowcount
+
+    def fetchone(self, sql: str, params: tuple = ()):
+        with self.connection() as conn:
+            return conn.execute(sql, params).fetchone()
+
+    def fetchall(self, sql: str, params: tuple = ()):
+        with self.connection() as conn:
+            return conn.execute(sql, params).fetchall()
+
+    def close_all(self):
+        """
+        Fechar todas as ligações abertas pelo pool
+        """
+        with self._available:
+            connections, self._connections = self._connections, []
+            self._idle = []
+            self._in_use = 0
+            self._generation += 1
+            self._available.notify_all()
+        for conn in connections:
+            self._close(conn)
+        self._local = threading.local()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'open': len(self._connections), 'in_use': self._in_use, 'idle': len(self._idle),
+                    'max_connections': self.max_connections, 'opened': self.connections_opened,
+                    'reused': self.connections_reused, 'closed': self.connections_closed}
@@ -0,0 +1,226 @@
+import time
+import heapq
+import logging
+import threading
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from cache_policy import is_completed_season
+
+logger = logging.getLogger(__name__)
+
+FINISHED = ('FT', 'AET', 'PEN', 'AWD', 'WO')
+NOT_PLAYED = ('TBD', 'NS', 'PST')
+
+
+def _ts(fixture: Dict) -> int:
+    return fixture['fixture'].get('timestamp') or 0
+
+
+def _status(fixture: Dict) -> str:
+    return (fixture['fixture'].get('status') or {}).get('short', '')
+
+
+class _SeasonIndex:
+    """
+    Jogos de uma liga/época ordenados por data, com uma lista por equipa para fatiar com bisect.
+    As estruturas são reconstruídas a cada merge e trocadas numa única atribuição: quem lê sem o lock
+    vê sempre timestamps, jogos e listas por equipa do mesmo estado
+    """
+
+    def __init__(self, league_id: int, season: int, fixtures: Iterable[Dict]):
+        self.league_id = league_id
+        self.season = season
+        # (por id, timestamps, jogos, {equipa: (timestamps, jogos)})
+        self._state: Tuple[Dict[int, Dict], List[int], List[Dict], Dict[int, Tuple[List[int], List[Dict]]]] = \
+            ({}, [], [], {})
+        self.loaded_at = time.time()
+        self.refreshed_at = self.loaded_at
+        self.merge(fixtures)
+
+    @property
+    def fixtures(self) -> List[Dict]:
+        return self._state[2]
+
+    def merge(self, fixtures: Iterable[Dict]):
+        by_id = dict(self._state[0])
+        for fixture in fixtures:
+            by_id[fixture['fixture']['id']] = fixture
+        ordered = sorted(by_id.values(), key=_ts)
+        by_team: Dict[int, List[Dict]] = {}
+        for fixture in ordered:
+            for side in ('home', 'away'):
+                by_team.setdefault(fixture['teams'][side]['id'], []).append(fixture)
+        self._state = (by_id, [_ts(f) for f in ordered], ordered,
+                       {team_id: ([_ts(f) for f in items], items) for team_id, items in by_team.items()})
+
+    def rows(self, team_id: int = None) -> Tuple[List[int], List[Dict]]:
+        _, timestamps, fixtures, by_team = self._state
+        if team_id is None:
+            return timestamps, fixtures
+        return by_team.get(team_id, ([], []))
+
+    def pending(self, start: float, end: float) -> bool:
+        """
+        Há jogos por terminar nesta janela (ou seja, algo que ainda pode mudar)?
+        """
+        timestamps, fixtures = self.rows()
+        lo, hi = bisect_left(timestamps, start), bisect_right(timestamps, end)
+        return any(_status(f) not in FINISHED for f in fixtures[lo:hi])
+
+
+class FixtureSchedule:
+    """
+    Calendário completo por liga/época: um único pedido por época, atualizado por janelas de datas,
+    e os últimos/próximos jogos ou janelas de datas de qualquer equipa respondidos a partir da memória
+    """
+
+    def __init__(self, manager, refresh_interval: float = 10 * 60, window_before: int = 3, window_after: int = 7):
+        self.manager = manager
+        # Épocas em curso: de quanto em quanto tempo atualizar os jogos à volta de hoje
+        self.refresh_interval = refresh_interval
+        self.window_before = window_before
+        self.window_after = window_after
+        self._seasons: Dict[Tuple[int, int], _SeasonIndex] = {}
+        self._lock = threading.Lock()
+        self.stats = {'loads': 0, 'refreshes': 0, 'queries': 0}
+
+    def season(self, league_id: int, season: int, fetch: bool = True) -> Optional[_SeasonIndex]:
+        """
+        Índice da época, carregado do armazenamento local ou da API (um pedido) na primeira utilização
+        """
+        key = (int(league_id), int(season))
+        index = self._seasons.get(key)
+        if index is not None and self._expired(index):
+            index = None
+        if index is None:
+            index = self._load(*key, fetch=fetch)
+        elif not is_completed_season({'season': season}) and time.time() - index.refreshed_at > self.refresh_interval:
+            self._refresh(index)
+        return index
+
+    def _expired(self, index: _SeasonIndex) -> bool:
+        # Recarregar a época completa quando o calendário guardado deixa de ser válido (a política de TTL decide)
+        ttl = self.manager.ttl_policy.ttl_for('fixtures', {'league': index.league_id, 'season': index.season})
+        return time.time() - index.loaded_at > ttl
+
+    def _load(self, league_id: int, season: int, fetch: bool) -> Optional[_SeasonIndex]:
+        fixtures = self.manager.store.season_fixtures(league_id, season)
+        if fixtures is None and fetch:
+            logger.info(f"📆 A carregar o calendário completo da liga {league_id} ({season})")
+            data = self.manager._make_request('fixtures', {'league': league_id, 'season': season})
+            fixtures = data.get('response') if data else None
+        if not fixtures:
+            return None
+        index = _SeasonIndex(league_id, season, fixtures)
+        with self._lock:
+            self._seasons[(league_id, season)] = index
+            self.stats['loads'] += 1
+        self.manager.bump_version(self._version_key(index))
+        return index
+
+    def _refresh(self, index: _SeasonIndex):
+        """
+        Atualização incremental: só os jogos à volta de hoje, e só se algum ainda não terminou
+        """
+        index.refreshed_at = time.time()
+        today = datetime.now(timezone.utc).date()
+        start, end = today - timedelta(days=self.window_before), today + timedelta(days=self.window_after)
+        day = 86400
+        start_ts = datetime(start.year, start.month, start.day, tzinfo=timezone.utc).timestamp()
+        if not index.pending(start_ts, start_ts + (self.window_before + self.window_after + 1) * day):
+            return
+        params = {'league': index.league_id, 'season': index.season,
+                  'from': start.isoformat(), 'to': end.isoformat()}
+        data = self.manager._make_request('fixtures', params)
+        if data and data.get('response'):
+            with self._lock:
+                index.merge(data['response'])
+                self.stats['refreshes'] += 1
+            self.manager.bump_version(self._version_key(index))
+
+    @staticmethod
+    def _version_key(index: _SeasonIndex) -> str:
+        return f"schedule:{index.league_id}:{index.season}"
+
+    def _track(self, index: _SeasonIndex):
+        # Quem usa o calendário depende dele até à próxima recarga ou atualização incremental
+        ttl = self.manager.ttl_policy.ttl_for('fixtures', {'league': index.league_id, 'season': index.season})
+        valid_until = index.loaded_at + ttl
+        if not is_completed_season({'season': index.season}):
+            valid_until = min(valid_until, index.refreshed_at + self.refresh_interval)
+        self.manager.track_dependency(self._version_key(index), valid_until)
+
+    def _indexes(self, league_ids: Iterable[int], season: int, fetch: bool) -> List[_SeasonIndex]:
+        indexes = []
+        for league_id in league_ids:
+            index = self.season(league_id, season, fetch=fetch)
+            if index is not None:
+                self._track(index)
+                indexes.append(index)
+        return indexes
+
+    def last(self, league_ids: Iterable[int], season: int, n: int, team_id: int = None, now: float = None,
+             fetch: bool = True) -> Optional[List[Dict]]:
+        """
+        Últimos n jogos terminados (mais recente primeiro) de uma equipa ou de uma liga
+        """
+        indexes = self._indexes(league_ids, season, fetch)
+        if not indexes:
+            return None
+        self.stats['queries'] += 1
+        now = now or time.time()
+        slices = []
+        for index in indexes:
+            timestamps, fixtures = index.rows(team_id)
+            end = bisect_right(timestamps, now)
+            slices.append(f for f in reversed(fixtures[:end]) if _status(f) in FINISHED)
+        merged = heapq.merge(*slices, key=_ts, reverse=True)
+        return [f for _, f in zip(range(n), merged)]
+
+    def next(self, league_ids: Iterable[int], season: int, n: int, team_id: int = None, now: float = None,
+             fetch: bool = True) -> Optional[List[Dict]]:
+        """
+        Próximos n jogos por disputar (mais próximo primeiro) de uma equipa ou de uma liga
+        """
+        indexes = self._indexes(league_ids, season, fetch)
+        if not indexes:
+            return None
+        self.stats['queries'] += 1
+        now = now or time.time()
+        slices = []
+        for index in indexes:
+            timestamps, fixtures = index.rows(team_id)
+            start = bisect_left(timestamps, now)
+            slices.append(f for f in fixtures[start:] if _status(f) in NOT_PLAYED)
+        merged = heapq.merge(*slices, key=_ts)
+        return [f for _, f in zip(range(n), merged)]
+
+    def window(self, league_ids: Iterable[int], season: int, start: float, end: float, team_id: int = None,
+               fetch: bool = True) -> Optional[List[Dict]]:
+        """
+        Jogos entre dois instantes (epoch, fim exclusivo), por ordem cronológica
+        """
+        indexes = self._indexes(league_ids, season, fetch)
+        if not indexes:
+            return None
+        self.stats['queries'] += 1
+        slices = []
+        for index in indexes:
+            timestamps, fixtures = index.rows(team_id)
+            slices.append(fixtures[bisect_left(timestamps, start):bisect_left(timestamps, end)])
+        return list(heapq.merge(*slices, key=_ts))
+
+    def loaded(self) -> List[Dict]:
+        with self._lock:
+            indexes = list(self._seasons.values())
+        return [{'league_id': i.league_id, 'season': i.season, 'fixtures': len(i.fixtures),
+                 'loaded_at': i.loaded_at, 'refreshed_at': i.refreshed_at} for i in indexes]
+
+    def clear(self):
+        with self._lock:
+            self._seasons.clear()
+
+    def get_stats(self) -> Dict:
+        return dict(self.stats, seasons=len(self._seasons))
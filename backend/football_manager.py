@@ -2,11 +2,29 @@ import requests
 import json
 import time
 import logging
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 import os
-from typing import Dict, List, Optional
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Set, Tuple
 from dotenv import load_dotenv
 import sqlite3
+import zlib
+from db_pool import SQLitePool
+from cache_keys import make_request_key
+from cache_policy import TTLPolicy, current_season, is_completed_season
+from memory_cache import MemoryLRUCache
+from singleflight import SingleFlight
+from rate_limiter import RateLimiter, RateLimitExceeded
+from http_session import ApiSession
+from cache_codec import ENCODING_JSON, ENCODING_ZLIB, ENCODINGS, encode_response, decode_response
+from local_store import LocalStore
+from fixture_schedule import FixtureSchedule
+from live_poller import LIVE_STATE_KEY, LivePoller
+from team_directory import TeamDirectory, team_spans, tokenize
+from fuzzy_match import FuzzyMatcher, normalize
+from pattern_matcher import PatternMatcher
 
 # Configurar logging
 logger = logging.getLogger(__name__)
@@ -14,9 +32,49 @@ logger = logging.getLogger(__name__)
 # Carregar variáveis do arquivo .env
 load_dotenv()
 
+# SQL usado pelo cache; strings constantes para reaproveitar os statements preparados do pool
+SQL_SELECT_FRESH = '''
+    SELECT response, response_blob, encoding, expires_at FROM api_requests
+    WHERE request_key = ? AND expires_at > ?
+'''
+SQL_UPSERT_REQUEST = '''
+    INSERT INTO api_requests (request_key, endpoint, params, response, response_blob, encoding, raw_size,
+                              status_code, created_at, expires_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP, ?)
+    ON CONFLICT(request_key) DO UPDATE SET
+        response = excluded.response,
+        response_blob = excluded.response_blob,
+        encoding = excluded.encoding,
+        raw_size = excluded.raw_size,
+        status_code = excluded.status_code,
+        created_at = excluded.created_at,
+        expires_at = excluded.expires_at
+'''
+# Entradas expiradas (só respostas válidas) ainda dentro do limite de staleness
+SQL_SELECT_STALE = '''
+    SELECT response, response_blob, encoding, CAST(strftime('%s', created_at) AS REAL) FROM api_requests
+    WHERE request_key = ? AND status_code = 200 AND expires_at > ?
+'''
+# Marcador de limite de requests atingido: evita insistir na API durante uns minutos
+RATE_LIMIT_MARKER_TTL = 300
+# Validadores HTTP (ETag/Last-Modified) de uma entrada válida, sem ler a resposta
+SQL_SELECT_VALIDATOR = '''
+    SELECT CAST(strftime('%s', created_at) AS REAL), expires_at FROM api_requests
+    WHERE request_key = ? AND status_code = 200 AND expires_at > ?
+'''
+SQL_SELECT_STATUS = 'SELECT status FROM api_status WHERE id = 1'
+# Versão dos dados do cache (PRAGMA user_version): ao subir, as migrações de dados voltam a correr
+CACHE_SCHEMA_VERSION = 1
+# Chave de versão dos dados derivados do armazenamento local (não corresponde a um pedido à API)
+LOCAL_STORE_KEY = 'local-store'
+SQL_UPDATE_STATUS = 'UPDATE api_status SET status = ? WHERE id = 1'
+
 class FootballDataManager:
     
-    def __init__(self, api_key: str = None):
+    def __init__(self, api_key: str = None, db_path: str = None, ttl_policy: TTLPolicy = None,
+                 memory_cache_bytes: int = 32 * 1024 * 1024, response_encoding: str = ENCODING_ZLIB,
+                 rate_limiter: RateLimiter = None, http_pool_size: int = 10, http_retries: int = 2,
+                 stale_while_revalidate: bool = True, live_poll_interval: float = 60):
         # Se não for fornecida uma API key, buscar do .env
         self.api_key = api_key or os.getenv('APISPORTS_KEY')
         
@@ -28,12 +86,49 @@ class FootballDataManager:
         self.headers = {
             "x-apisports-key": self.api_key
         }
-        self.requests_made = 0  # Reset para permitir mais testes
-        self.last_request_time = None
+        # Sessão keep-alive: reutiliza as ligações TCP+TLS entre requests; cada retry passa pelo rate limiter
+        self.http = ApiSession(self.headers, pool_maxsize=http_pool_size, retries=http_retries,
+                               on_retry=self._charge_retry)
         
         # SQLite3 setup
-        self.db_path = os.path.join(os.path.dirname(__file__), 'api_cache.db')
+        self.db_path = db_path or os.path.join(os.path.dirname(__file__), 'api_cache.db')
+        self.db = SQLitePool(self.db_path)
+        self.ttl_policy = ttl_policy or TTLPolicy()
+        # Camada em memória à frente do SQLite (respostas já descodificadas)
+        self.memory_cache = MemoryLRUCache(max_bytes=memory_cache_bytes)
+        # Formato das respostas guardadas: 'zlib' (comprimido, por defeito) ou 'json' (texto)
+        if response_encoding not in ENCODINGS:
+            raise ValueError(f"❌ Formato de cache inválido: {response_encoding}. Usa um de {ENCODINGS}.")
+        self.response_encoding = response_encoding
+        # Pedidos concorrentes iguais partilham a mesma chamada à API
+        self.single_flight = SingleFlight()
+        # Stale-while-revalidate: servir entradas expiradas (até ao max_stale da política) e atualizar em segundo plano
+        self.stale_while_revalidate = stale_while_revalidate
+        self._refresh_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='cache-refresh')
+        self._refreshing = set()
+        self._refresh_lock = threading.Lock()
+        self.swr_stats = {'stale_served': 0, 'refreshes': 0, 'refresh_failures': 0}
+        # Origem/idade das respostas servidas na thread atual (ex: durante um request Flask)
+        self._response_info = threading.local()
+        # Versão de cada entrada do cache (sobe a cada escrita) e dependências registadas na thread atual:
+        # permitem saber se algo construído a partir do cache (ex: uma resposta do chat) ficou desatualizado
+        self._versions: Dict[str, int] = {}
+        self._versions_lock = threading.Lock()
+        self._dependencies = threading.local()
+        self.cache_generation = 0
         self._init_db()
+        # Rate limit e quota diária guardados no SQLite: partilhados entre threads, processos e reinícios
+        self.rate_limiter = rate_limiter or RateLimiter(self.db)
+        # Dados normalizados (jogos, equipas, classificações, marcadores) extraídos das respostas guardadas
+        self.store = LocalStore(self.db)
+        # Confrontos diretos: respondidos localmente vs pedidos à API (latência e quota poupada)
+        self._stats_lock = threading.Lock()
+        self.h2h_stats = {'cache': 0, 'local': 0, 'upstream': 0, 'local_ms': 0.0, 'upstream_ms': 0.0}
+        self.store.backfill(self._iter_cached_responses())
+        # Calendários completos por liga/época em memória: últimos/próximos jogos sem pedidos por equipa
+        self.schedule = FixtureSchedule(self)
+        # Jogos ao vivo: um único poller partilhado por todos os pedidos (arrancado pela app)
+        self.live = LivePoller(self, interval=live_poll_interval)
         
         logger.info(f"FootballDataManager inicializado com API key: {self.api_key[:10]}...")
         
@@ -52,6 +147,47 @@ class FootballDataManager:
             'europa': {'id': 3, 'name': 'Europa League', 'country': 'World', 'flag': '🏆'},
             'conference': {'id': 848, 'name': 'Conference League', 'country': 'World', 'flag': '🏆'}
         }
+
+        # Índice inverso liga_id -> informação da liga (get_league_info sem percorrer a lista)
+        self.leagues_by_id = {league_info['id']: league_info for league_info in self.available_leagues.values()}
+
+        # Mapeamento de nomes alternativos
+        self.league_aliases = {
+            'premier': 'england',
+            'premier league': 'england',
+            'pl': 'england',
+            'epl': 'england',
+            'bundesliga': 'germany',
+            'buli': 'germany',
+            'serie a': 'italy',
+            'seria a': 'italy',
+            'la liga': 'spain',
+            'laliga': 'spain',
+            'ligue 1': 'france',
+            'ligue1': 'france',
+            'primeira liga': 'portugal',
+            'liga portugal': 'portugal',
+            'liga nos': 'portugal',
+            'eredivisie': 'netherlands',
+            'champions': 'champions',
+            'ucl': 'champions',
+            'europa league': 'europa',
+            'uel': 'europa',
+            'conference': 'conference',
+            'uecl': 'conference'
+        }
+        # Nomes, chaves e aliases das ligas para correspondência aproximada
+        self.league_matcher = FuzzyMatcher()
+        for league_key, league_info in self.available_leagues.items():
+            for alias in (league_key, league_info['name']):
+                self.league_matcher.add(alias, league_key)
+        for alias, league_key in self.league_aliases.items():
+            if len(alias) >= 5:
+                self.league_matcher.add(alias, league_key)
+        # Autómato com aliases, chaves e nomes das ligas: uma só passagem pelo texto em vez de um 'in' por alias
+        self.league_patterns = PatternMatcher()
+        for priority, pattern, league_key in self.get_league_patterns():
+            self.league_patterns.add(pattern, ('league', priority, league_key))
         
         # Equipas populares por liga
         self.popular_teams = {
@@ -120,18 +256,30 @@ class FootballDataManager:
                 'montpellier': {'id': 82, 'names': ['montpellier', 'mhsc']}
             }
         }
+
+        # Diretório de equipas em memória (nomes guardados + aliases das populares): identificação sem a API
+        self.team_directory = TeamDirectory()
+        self._build_team_directory()
         
     def _init_db(self):
-        conn = sqlite3.connect(self.db_path)
+        with self.db.connection() as conn:
+            self._create_tables(conn)
+
+    def _create_tables(self, conn: sqlite3.Connection):
         c = conn.cursor()
         c.execute('''
             CREATE TABLE IF NOT EXISTS api_requests (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
+                request_key TEXT,
                 endpoint TEXT NOT NULL,
                 params TEXT,
                 response TEXT,
+                response_blob BLOB,
+                encoding TEXT DEFAULT 'json',
+                raw_size INTEGER,
                 status_code INTEGER,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                expires_at REAL
             )
         ''')
         # Add a table for status if not exists
@@ -142,124 +290,484 @@ class FootballDataManager:
             )
         ''')
         # Ensure a single row exists
-        c.execute('INSERT OR IGNORE INTO api_status (id, status) VALUES (1, "online")')
-        conn.commit()
-        conn.close()
+        c.execute("INSERT OR IGNORE INTO api_status (id, status) VALUES (1, 'online')")
+        self._migrate_request_keys(conn)
+        self._migrate_expires_at(conn)
+        self._migrate_encoding(conn)
+        self._migrate_error_replies(conn)
+
+    def _migrate_request_keys(self, conn: sqlite3.Connection):
+        """
+        Preencher request_key em bases de dados antigas e garantir o índice único
+        """
+        columns = [row[1] for row in conn.execute('PRAGMA table_info(api_requests)')]
+        if 'request_key' not in columns:
+            conn.execute('ALTER TABLE api_requests ADD COLUMN request_key TEXT')
+        rows = conn.execute('SELECT id, endpoint, params FROM api_requests WHERE request_key IS NULL ORDER BY id DESC').fetchall()
+        if rows:
+            logger.info(f"A migrar {len(rows)} entradas do cache para chaves canónicas...")
+        seen = set(row[0] for row in conn.execute('SELECT request_key FROM api_requests WHERE request_key IS NOT NULL'))
+        for row_id, endpoint, params in rows:
+            key, params_json = make_request_key(endpoint, params)
+            if key in seen:
+                # Entradas repetidas (parâmetros serializados de forma diferente): fica a mais recente
+                conn.execute('DELETE FROM api_requests WHERE id = ?', (row_id,))
+                continue
+            seen.add(key)
+            conn.execute('UPDATE api_requests SET request_key = ?, params = ? WHERE id = ?', (key, params_json, row_id))
+        conn.execute('CREATE UNIQUE INDEX IF NOT EXISTS idx_api_requests_key ON api_requests (request_key)')
+
+    def _migrate_expires_at(self, conn: sqlite3.Connection):
+        """
+        Calcular expires_at (epoch UTC) das entradas antigas a partir do created_at e da política de TTL
+        """
+        columns = [row[1] for row in conn.execute('PRAGMA table_info(api_requests)')]
+        if 'expires_at' not in columns:
+            conn.execute('ALTER TABLE api_requests ADD COLUMN expires_at REAL')
+        rows = conn.execute('''
+            SELECT id, endpoint, params, CAST(strftime('%s', created_at) AS REAL)
+            FROM api_requests WHERE expires_at IS NULL
+        ''').fetchall()
+        for row_id, endpoint, params, created_epoch in rows:
+            try:
+                params_dict = json.loads(params) if params else {}
+            except ValueError:
+                params_dict = {}
+            ttl = self.ttl_policy.ttl_for(endpoint, params_dict)
+            conn.execute('UPDATE api_requests SET expires_at = ? WHERE id = ?', ((created_epoch or 0) + ttl, row_id))
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_api_requests_expires ON api_requests (expires_at)')
+
+    def _migrate_encoding(self, conn: sqlite3.Connection):
+        """
+        Adicionar as colunas de armazenamento comprimido e converter as respostas em texto antigas
+        """
+        columns = [row[1] for row in conn.execute('PRAGMA table_info(api_requests)')]
+        for column, ddl in (('response_blob', 'BLOB'), ('encoding', "TEXT DEFAULT 'json'"), ('raw_size', 'INTEGER')):
+            if column not in columns:
+                conn.execute(f'ALTER TABLE api_requests ADD COLUMN {column} {ddl}')
+        if self.response_encoding == ENCODING_JSON:
+            return
+        rows = conn.execute('''
+            SELECT id, response FROM api_requests
+            WHERE response IS NOT NULL AND (encoding IS NULL OR encoding = ?)
+        ''', (ENCODING_JSON,)).fetchall()
+        if rows:
+            logger.info(f"A comprimir {len(rows)} respostas do cache ({self.response_encoding})...")
+        for row_id, response in rows:
+            try:
+                data = json.loads(response)
+            except ValueError:
+                continue
+            text, blob, raw_size = encode_response(data, self.response_encoding)
+            conn.execute(
+                'UPDATE api_requests SET response = ?, response_blob = ?, encoding = ?, raw_size = ? WHERE id = ?',
+                (text, blob, self.response_encoding, raw_size, row_id)
+            )
+
+    def _migrate_error_replies(self, conn: sqlite3.Connection):
+        """
+        Remover respostas de erro guardadas como válidas (ex: quota ou plano, que em épocas terminadas nunca
+        expiravam) e encurtar a validade das respostas sem resultados. Corre uma vez por base de dados
+        """
+        if conn.execute('PRAGMA user_version').fetchone()[0] >= CACHE_SCHEMA_VERSION:
+            return
+        rows = conn.execute('''
+            SELECT id, response, response_blob, encoding, CAST(strftime('%s', created_at) AS REAL)
+            FROM api_requests WHERE status_code = 200
+        ''').fetchall()
+        removed = capped = 0
+        for row_id, text, blob, encoding, created_epoch in rows:
+            try:
+                data, _ = decode_response(text, blob, encoding)
+            except (TypeError, ValueError, zlib.error):
+                data = None
+            if not isinstance(data, dict) or data.get('errors') or data.get('response') is None:
+                conn.execute('DELETE FROM api_requests WHERE id = ?', (row_id,))
+                removed += 1
+            elif not data['response']:
+                expires_at = (created_epoch or 0) + self.ttl_policy.empty_ttl
+                capped += conn.execute('UPDATE api_requests SET expires_at = ? WHERE id = ? AND expires_at > ?',
+                                       (expires_at, row_id, expires_at)).rowcount
+        conn.execute(f'PRAGMA user_version = {CACHE_SCHEMA_VERSION}')
+        if removed or capped:
+            logger.info(f"🧹 Cache: {removed} respostas de erro removidas, {capped} respostas vazias com validade curta")
+
+    @property
+    def requests_made(self) -> int:
+        """
+        Requests feitos hoje (quota diária persistida)
+        """
+        return self.rate_limiter.used_today()
+
+    @property
+    def daily_quota(self) -> int:
+        return self.rate_limiter.daily_quota
 
     def set_api_status(self, status: str):
-        conn = sqlite3.connect(self.db_path)
-        c = conn.cursor()
-        c.execute('UPDATE api_status SET status = ? WHERE id = 1', (status,))
-        conn.commit()
-        conn.close()
+        self.db.execute(SQL_UPDATE_STATUS, (status,))
 
     def get_api_status(self) -> str:
-        conn = sqlite3.connect(self.db_path)
-        c = conn.cursor()
-        c.execute('SELECT status FROM api_status WHERE id = 1')
-        row = c.fetchone()
-        conn.close()
+        row = self.db.fetchone(SQL_SELECT_STATUS)
         return row[0] if row else 'online'
 
-    def _save_request_to_db(self, endpoint, params, response, status_code):
-        conn = sqlite3.connect(self.db_path)
-        c = conn.cursor()
-        c.execute('''
-            INSERT INTO api_requests (endpoint, params, response, status_code)
-            VALUES (?, ?, ?, ?)
-        ''', (endpoint, json.dumps(params, sort_keys=True) if params else None, json.dumps(response) if response else None, status_code))
-        conn.commit()
-        conn.close()
+    def _save_request_to_db(self, endpoint, params, response, status_code, ttl: float = None):
+        key, params_json = make_request_key(endpoint, params)
+        if ttl is None:
+            ttl = self.ttl_policy.ttl_for(endpoint, params)
+        expires_at = time.time() + ttl
+        text, blob, raw_size = encode_response(response, self.response_encoding) if response else (None, None, 0)
+        self.db.execute(SQL_UPSERT_REQUEST, (key, endpoint, params_json, text, blob, self.response_encoding, raw_size,
+                                             status_code, expires_at))
+        if status_code == 200 and response:
+            self.memory_cache.set(key, response, expires_at, raw_size)
+            self._ingest(endpoint, params, response, expires_at)
+        else:
+            self.memory_cache.invalidate(key)
+        self.bump_version(key)
+
+    def _ingest(self, endpoint, params, response, expires_at: float):
+        try:
+            self.store.ingest(endpoint, params, response, expires_at)
+            # O que foi derivado do armazenamento local (classificações, confrontos, ...) pode ter mudado
+            self.bump_version(LOCAL_STORE_KEY)
+            if endpoint in ('teams', 'standings', 'fixtures', 'fixtures/headtohead'):
+                league = str(params.get('league', ''))
+                self.team_directory.add_items(response.get('response') or [],
+                                              league_id=int(league) if league.isdigit() else None)
+        except Exception as e:
+            # O armazenamento local é um atalho: uma resposta inesperada não pode falhar o pedido
+            logger.warning(f"⚠️ Não foi possível normalizar a resposta de {endpoint}: {e}")
+
+    def _iter_cached_responses(self):
+        rows = self.db.fetchall('''
+            SELECT endpoint, params, response, response_blob, encoding, expires_at FROM api_requests
+            WHERE status_code = 200
+        ''')
+        for endpoint, params, text, blob, encoding, expires_at in rows:
+            try:
+                data, _ = decode_response(text, blob, encoding)
+                yield endpoint, json.loads(params) if params else {}, data, expires_at or 0
+            except ValueError:
+                continue
+
+    def _build_team_directory(self):
+        for item in self.store.all_teams():
+            self.team_directory.add_team(item['team'], item.get('venue'))
+        for team_id, league_id in self.store.team_leagues():
+            self.team_directory.add_league(team_id, league_id)
+        for league_id, teams in self.popular_teams.items():
+            for team_key, team_data in teams.items():
+                # A liga das equipas populares é sempre a principal, mesmo com aliases ignorados
+                self.team_directory.add_league(team_data['id'], league_id, primary=True)
+                aliases = team_data['names'] + [team_key.replace('_', ' ')]
+                known = self.team_directory.get(team_data['id'])
+                if known and not set(tokenize(known['team']['name'])) & {t for a in aliases for t in tokenize(a)}:
+                    # O id não corresponde à equipa dos aliases (ex: outro clube na API): não o tornar autoritativo
+                    logger.warning(f"⚠️ Equipa popular '{team_key}' aponta para {known['team']['name']} "
+                                   f"(id {team_data['id']}); aliases ignorados")
+                    continue
+                team = known['team'] if known else {'id': team_data['id'], 'name': team_data['names'][0].title()}
+                self.team_directory.add_team(team, aliases=aliases, popular=True)
+        logger.info(f"📇 Diretório de equipas: {self.team_directory.stats()}")
+
+    def _find_team_locally(self, team_name: str) -> Optional[List[Dict]]:
+        """
+        Procurar no diretório local: nome/alias/prefixos e, para frases, equipas mencionadas no texto
+        """
+        teams = self.team_directory.search(team_name)
+        if not teams:
+            teams = [self.team_directory.get(team_id) for team_id in self.team_directory.find_in_text(team_name)]
+        if teams:
+            self._note_response('local')
+            return teams
+        return None
+
+    def _search_team_upstream(self, team_name: str) -> Optional[List[Dict]]:
+        # Frases inteiras (ex: a pergunta toda) não são nomes de equipas: não gastar quota a pesquisá-las
+        if len(team_name.split()) > 3:
+            return None
+        params = {"search": team_name}
+        data = self._make_request("teams", params)
+        
+        if data and data.get('response'):
+            return data['response']
+        return None
+
+    def extract_teams(self, text: str, limit: int = 2, upstream: bool = True) -> List[Dict]:
+        """
+        Equipas mencionadas numa pergunta, pela ordem em que aparecem (ex: as duas de um confronto direto).
+        Os n-gramas do texto são procurados no diretório local; a API só é usada para uma parte do texto
+        (entre "vs", "contra", "e"...) que não corresponde a nenhuma equipa conhecida.
+        """
+        found = self.team_directory.find_in_text(text)
+        if len(found) < limit:
+            ordered = []
+            for span in team_spans(text):
+                ids = self.team_directory.find_in_text(span)
+                if not ids and upstream:
+                    items = self._search_team_upstream(span) or []
+                    self.team_directory.add_items(items)
+                    ids = [item['team']['id'] for item in items if item.get('team', {}).get('id')][:1]
+                ordered += [team_id for team_id in ids if team_id not in ordered]
+            found = ordered + [team_id for team_id in found if team_id not in ordered]
+        teams = []
+        for team_id in found[:limit]:
+            entry = self.team_directory.get(team_id)
+            if entry:
+                teams.append(entry['team'])
+        return teams
+
+    def _local_first(self, endpoint: str, params: Dict, local):
+        """
+        Resposta em cache para o pedido exato; senão o armazenamento local; só depois a API
+        """
+        key, _ = make_request_key(endpoint, params)
+        cached = self._get_cached(key, endpoint)
+        if cached is not None:
+            return cached.get('response')
+        result = local()
+        if result:
+            logger.info(f"🗃️ Resposta local para {endpoint}")
+            self._note_response('local')
+            self.track_dependency(LOCAL_STORE_KEY, time.time() + self.ttl_policy.ttl_for(endpoint, params))
+            return result
+        data = self._make_request(endpoint, params)
+        return data.get('response') if data else None
 
     def _make_request(self, endpoint: str, params: Dict = None) -> Optional[Dict]:
         """
-        Faz request à API com rate limiting e salva cada request no SQLite3, usando cache de 1 hora.
+        Faz request à API com rate limiting e salva cada request no SQLite3, com validade definida pela TTLPolicy.
         Sempre verifica o banco de dados antes de fazer uma request externa.
         """
         logger.info(f"=== FAZENDO REQUEST: {endpoint} ===")
         logger.info(f"Parâmetros: {params}")
 
-        # Checar cache no banco de dados (1 hora)
-        conn = sqlite3.connect(self.db_path)
-        c = conn.cursor()
-        def serialize_params(params):
-            if params is None:
-                return None
-            if isinstance(params, str):
-                return params
-            return json.dumps(params, sort_keys=True)
-        params_json = serialize_params(params)
-        c.execute('''
-            SELECT response, created_at FROM api_requests
-            WHERE endpoint = ? AND params = ?
-            ORDER BY created_at DESC LIMIT 1
-        ''', (endpoint, params_json))
-        row = c.fetchone()
+        key, _ = make_request_key(endpoint, params)
+        cached = self._get_cached(key, endpoint)
+        if cached is not None:
+            return cached
+
+        if self.stale_while_revalidate:
+            stale = self._get_stale(key, endpoint, params)
+            if stale is not None:
+                self._schedule_refresh(key, endpoint, params)
+                # Vai ser substituída em breve: o que for construído com ela não deve ser reaproveitado
+                self.track_dependency(key, time.time())
+                return stale
+
+        # Só uma thread vai à API por chave; as restantes esperam e recebem o mesmo resultado
+        try:
+            data, shared = self.single_flight.do(key, lambda: self._fetch_if_missing(key, endpoint, params))
+        except RateLimitExceeded:
+            self.track_dependency(key, time.time())
+            raise
+        if shared:
+            logger.info(f"🔁 Resposta partilhada de um pedido em curso para {endpoint}")
+        # Sem dados (erro da API): dependência já expirada, para não guardar respostas de erro
+        self.track_dependency(key, time.time() + (self._reply_ttl(endpoint, params, data) if data else 0))
+        return data
+
+    def _get_cached(self, key: str, endpoint: str) -> Optional[Dict]:
+        """
+        Procurar uma resposta válida na memória e depois no SQLite
+        """
+        cached = self._get_cached_memory(key, endpoint)
+        if cached is not None:
+            return cached
+        return self._get_cached_db(key, endpoint)
+
+    def _get_cached_memory(self, key: str, endpoint: str) -> Optional[Dict]:
+        now = time.time()
+        cached = self.memory_cache.get(key, now)
+        if cached is not None:
+            logger.info(f"✅ Cache hit (memória) para {endpoint}")
+            self._note_response('memory')
+            self.track_dependency(key, self.memory_cache.expiry(key) or now)
+        return cached
+
+    def _get_cached_db(self, key: str, endpoint: str) -> Optional[Dict]:
+        # Checar cache no banco de dados; a validade é decidida no SQL pelo expires_at
+        now = time.time()
+        row = self.db.fetchone(SQL_SELECT_FRESH, (key, now))
         if row:
-            response_json, created_at = row
-            created_time = datetime.strptime(created_at, '%Y-%m-%d %H:%M:%S')
-            created_time += timedelta(hours=1)
-            
-           # log created_time and datetime.now() - created_time
-            logger.info(f"Cache encontrado para {endpoint} com tempo de criação: {created_time}")
-            logger.info(f"Tempo atual: {datetime.now()}")
-            logger.info(f"Diferença de tempo: {(datetime.now() - created_time).total_seconds()} segundos")
-            
-            # Se o cache ainda é válido, retorna imediatamente
-            if (datetime.now() - created_time).total_seconds() < 300:  # 5 Minutos
-                logger.info(f"✅ Cache hit (SQLite) para {endpoint}")
-                conn.close()
-                return json.loads(response_json)
-            else:
-                # Expirado, remover
-                c.execute('''
-                    DELETE FROM api_requests WHERE endpoint = ? AND params = ?
-                ''', (endpoint, params_json))
-                conn.commit()
-        conn.close()
-
-        # Rate limiting: máximo 30 requests por minuto
-        if self.last_request_time:
-            time_diff = time.time() - self.last_request_time
-            if time_diff < 2:
-                logger.info(f"Aguardando {2 - time_diff:.2f}s para rate limiting...")
-                time.sleep(2 - time_diff)
-        if self.requests_made >= 100:
-            logger.error("❌ Limite diário de requests atingido (100/dia)")
+            text, blob, encoding, expires_at = row
+            logger.info(f"✅ Cache hit (SQLite) para {endpoint} (expira em {expires_at - now:.0f}s)")
+            data, raw_size = decode_response(text, blob, encoding)
+            self.memory_cache.set(key, data, expires_at, raw_size)
+            self._note_response('sqlite')
+            self.track_dependency(key, expires_at)
+            return data
+        return None
+
+    def _get_stale(self, key: str, endpoint: str, params: Dict = None) -> Optional[Dict]:
+        """
+        Entrada expirada mas ainda dentro do max_stale da política, para servir enquanto se atualiza
+        """
+        now = time.time()
+        max_stale = self.ttl_policy.max_stale_for(endpoint, params)
+        row = self.db.fetchone(SQL_SELECT_STALE, (key, now - max_stale))
+        if not row:
+            return None
+        text, blob, encoding, created_epoch = row
+        data, _ = decode_response(text, blob, encoding)
+        age = now - created_epoch if created_epoch else None
+        with self._refresh_lock:
+            self.swr_stats['stale_served'] += 1
+        self._note_response('stale', age)
+        logger.info(f"♻️ Cache expirado servido para {endpoint} (idade {age or 0:.0f}s); a atualizar em segundo plano")
+        return data
+
+    def _schedule_refresh(self, key: str, endpoint: str, params: Dict = None):
+        with self._refresh_lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+            self.swr_stats['refreshes'] += 1
+        self._refresh_executor.submit(self._refresh, key, endpoint, params)
+
+    def _refresh(self, key: str, endpoint: str, params: Dict = None):
+        try:
+            data, _ = self.single_flight.do(key, lambda: self._fetch_if_missing(key, endpoint, params))
+            failed = data is None
+        except RateLimitExceeded as e:
+            logger.info(f"⏳ Atualização de {endpoint} adiada: {e}")
+            failed = True
+        except Exception as e:
+            logger.error(f"❌ Erro ao atualizar {endpoint} em segundo plano: {e}", exc_info=True)
+            failed = True
+        finally:
+            with self._refresh_lock:
+                self._refreshing.discard(key)
+        if failed:
+            with self._refresh_lock:
+                self.swr_stats['refresh_failures'] += 1
+
+    def _note_response(self, source: str, age: float = None):
+        info = getattr(self._response_info, 'value', None)
+        if info is None:
+            info = self._response_info.value = {'source': None, 'stale': False, 'age': None, 'api_calls': 0}
+        if source == 'api':
+            info['api_calls'] += 1
+        # Se alguma resposta do request foi servida expirada, é isso que interessa reportar
+        if source == 'stale':
+            info['stale'] = True
+            info['age'] = max(info['age'] or 0, age or 0)
+        if not info['stale'] or source == 'stale':
+            info['source'] = source
+
+    def merge_response_info(self, other: Dict):
+        """
+        Juntar à thread atual a origem das respostas registada noutra thread (ex: consultas feitas em paralelo)
+        """
+        if other['source'] is None:
+            return
+        if other['stale']:
+            self._note_response('stale', other['age'])
+        else:
+            self._note_response(other['source'])
+        info = self._response_info.value
+        # _note_response('api') já contou um dos requests da outra thread
+        info['api_calls'] += other['api_calls'] - (1 if other['source'] == 'api' and not other['stale'] else 0)
+
+    def reset_response_info(self):
+        """
+        Começar a registar a origem das respostas na thread atual (ex: no início de cada request HTTP)
+        """
+        self._response_info.value = {'source': None, 'stale': False, 'age': None, 'api_calls': 0}
+
+    def response_info(self) -> Dict:
+        """
+        Origem ('memory', 'sqlite', 'local', 'stale', 'api'), idade e número de requests à API das respostas
+        servidas desde o último reset
+        """
+        info = getattr(self._response_info, 'value', None)
+        return dict(info) if info else {'source': None, 'stale': False, 'age': None, 'api_calls': 0}
+
+    def cache_validator(self, endpoint: str, params: Dict = None) -> Optional[Tuple[str, float]]:
+        """
+        (ETag, epoch da última escrita) da entrada válida em cache para o pedido, sem a descodificar nem ir à API;
+        None se não houver entrada válida. Cada escrita tem um expires_at diferente, logo um ETag diferente
+        """
+        key, _ = make_request_key(endpoint, params)
+        row = self.db.fetchone(SQL_SELECT_VALIDATOR, (key, time.time()))
+        if not row:
             return None
+        created_epoch, expires_at = row
+        return f"{key[:16]}-{int(expires_at * 1000):x}", created_epoch or expires_at
+
+    def bump_version(self, key: str):
+        with self._versions_lock:
+            self._versions[key] = self._versions.get(key, 0) + 1
+
+    def track_dependency(self, key: str, valid_until: float):
+        """
+        Registar que o que está a ser construído na thread atual usa a entrada key (válida até valid_until)
+        """
+        deps = getattr(self._dependencies, 'value', None)
+        if deps is None:
+            return
+        deps['versions'][key] = self._versions.get(key, 0)
+        deps['valid_until'] = min(deps['valid_until'], valid_until)
+
+    @contextmanager
+    def track_dependencies(self):
+        """
+        Recolher as entradas do cache usadas dentro do bloco: versões, validade mínima e geração do cache
+        (os blocos podem ser aninhados; as dependências do bloco interior passam para o exterior)
+        """
+        outer = getattr(self._dependencies, 'value', None)
+        deps = {'versions': {}, 'valid_until': float('inf'), 'generation': self.cache_generation}
+        self._dependencies.value = deps
+        try:
+            yield deps
+        finally:
+            self._dependencies.value = outer
+            if outer is not None:
+                self.merge_dependencies(deps)
+
+    def merge_dependencies(self, other: Dict):
+        """
+        Juntar às dependências da thread atual as recolhidas noutra thread (ex: consultas feitas em paralelo)
+        """
+        deps = getattr(self._dependencies, 'value', None)
+        if deps is None or other is None:
+            return
+        for key, version in other['versions'].items():
+            # A versão mais antiga vista é a que decide se algo ficou desatualizado
+            deps['versions'][key] = min(version, deps['versions'].get(key, version))
+        deps['valid_until'] = min(deps['valid_until'], other['valid_until'])
+        deps['generation'] = min(deps['generation'], other['generation'])
+
+    def dependencies_current(self, deps: Dict, now: float = None) -> bool:
+        """
+        As entradas usadas continuam válidas e não foram reescritas nem o cache limpo desde então?
+        """
+        now = time.time() if now is None else now
+        if deps['generation'] != self.cache_generation or now >= deps['valid_until']:
+            return False
+        return all(self._versions.get(key, 0) == version for key, version in deps['versions'].items())
+
+    def _fetch_if_missing(self, key: str, endpoint: str, params: Dict = None) -> Optional[Dict]:
+        # Outro pedido pode ter acabado de preencher o cache entre o miss e a entrada no single-flight
+        cached = self._get_cached(key, endpoint)
+        if cached is not None:
+            return cached
+        return self._fetch_from_api(endpoint, params)
+
+    def _fetch_from_api(self, endpoint: str, params: Dict = None) -> Optional[Dict]:
+        """
+        Request à API-Sports (sem cache) com rate limiting; guarda a resposta no SQLite.
+        Se o rate limiter não deixar, lança RateLimitExceeded com o tempo de espera em vez de bloquear.
+        """
+        self.rate_limiter.try_acquire().raise_if_denied()
         url = f"{self.base_url}/{endpoint}"
         try:
-            logger.info(f"📡 Request {self.requests_made + 1}/100: {url}")
-            response = requests.get(url, headers=self.headers, params=params, timeout=10)
-            self.requests_made += 1
-            self.last_request_time = time.time()
-            data = None
+            logger.info(f"📡 Request {self.requests_made}/{self.daily_quota}: {url}")
+            response, timing = self.http.get(url, params=params, timeout=10)
+            logger.info(f"⏱️ {endpoint}: connect {timing['connect_ms']}ms, TTFB {timing['ttfb_ms']}ms, "
+                        f"total {timing['total_ms']}ms ({'ligação reutilizada' if timing['reused'] else 'nova ligação'})")
             if response.status_code == 200:
-                data = response.json()
-                logger.warning(f"Response errors: {data.get('errors', 'Nenhum erro')}")
-                errors = data.get('errors', {})
-                if isinstance(errors, dict) and 'requests' in errors and 'limit' in errors['requests'].lower():
-                    self.requests_made = 100
-                    self.set_api_status('offline')
-                    conn = sqlite3.connect(self.db_path)
-                    c = conn.cursor()
-                    c.execute('''
-                        INSERT INTO api_requests (endpoint, params, response, status_code)
-                        VALUES (?, ?, ?, ?)
-                    ''', (endpoint, json.dumps(params, sort_keys=True) if params else None, json.dumps({'error': 'request_limit_reached'}), 429))
-                    conn.commit()
-                    conn.close()
-                
-                # logger.info(f"Response data keys: {list(data.keys()) if isinstance(data, dict) else 'Not a dict'}")
-                # Salvar no banco de dados apenas se resposta válida
-                if data.get('response') is not None:
-                    self._save_request_to_db(endpoint, params, data, response.status_code)
-                    logger.info(f"✅ Request bem-sucedida para {endpoint}")
-                    return data
-                else:
-                    logger.warning(f"⚠️ Resposta vazia para {endpoint}")
-                    logger.warning(f"Response content: {response.text[:200]}...")
-                    return None
+                return self._handle_api_response(endpoint, params, response.json(), response.text)
             else:
     
                 logger.error(f"❌ Erro {response.status_code}: {response.text}")
@@ -271,6 +779,50 @@ class FootballDataManager:
             logger.error(f"❌ Erro na request: {e}", exc_info=True)
             return None
     
+    def _charge_retry(self) -> bool:
+        """
+        Cada retry da sessão HTTP é mais um request à API: consome um token e conta para a quota diária
+        """
+        decision = self.rate_limiter.try_acquire()
+        if not decision.allowed:
+            logger.info(f"⏳ Retry à API cancelado pelo rate limiter ({decision.reason})")
+        return decision.allowed
+
+    def _reply_ttl(self, endpoint: str, params: Dict, data: Optional[Dict]) -> float:
+        """
+        Validade de uma resposta da API: a da política, ou a curta das respostas sem resultados
+        """
+        return self.ttl_policy.ttl_for(endpoint, params, empty=not (data or {}).get('response'))
+
+    def _handle_api_response(self, endpoint: str, params: Dict, data: Dict, text: str) -> Optional[Dict]:
+        """
+        Tratar uma resposta 200 da API: detetar limite de quota e guardar no cache se válida
+        """
+        logger.warning(f"Response errors: {data.get('errors', 'Nenhum erro')}")
+        errors = data.get('errors', {})
+        if isinstance(errors, dict) and 'requests' in errors and 'limit' in errors['requests'].lower():
+            self.rate_limiter.exhaust_quota()
+            self.set_api_status('offline')
+            # O marcador fica no lugar da resposta (nada o pode substituir) até ao fim do RATE_LIMIT_MARKER_TTL
+            self._save_request_to_db(endpoint, params, {'error': 'request_limit_reached'}, 429, ttl=RATE_LIMIT_MARKER_TTL)
+            return None
+        if errors:
+            # Erros da API (quota, plano, parâmetros) vêm com 200: nunca vão para o cache, a próxima tentativa pode correr bem
+            logger.warning(f"⚠️ Resposta com erros para {endpoint} não guardada no cache")
+            return None
+
+        # logger.info(f"Response data keys: {list(data.keys()) if isinstance(data, dict) else 'Not a dict'}")
+        # Salvar no banco de dados apenas se resposta válida; sem resultados fica pouco tempo (TTL de resposta vazia)
+        if data.get('response') is not None:
+            self._save_request_to_db(endpoint, params, data, 200, ttl=self._reply_ttl(endpoint, params, data))
+            logger.info(f"✅ Request bem-sucedida para {endpoint}")
+            self._note_response('api')
+            return data
+        else:
+            logger.warning(f"⚠️ Resposta vazia para {endpoint}")
+            logger.warning(f"Response content: {text[:200]}...")
+            return None
+    
     def get_available_leagues(self) -> Dict:
         """
         Retornar ligas disponíveis
@@ -299,10 +851,21 @@ class FootballDataManager:
         Obter classificação de uma liga
         """
         params = {"league": league_id, "season": season}
-        data = self._make_request("standings", params)
-        if data and data.get('response') and len(data['response']) > 0:
-            return data['response']
+        response = self._local_first("standings", params, lambda: self.store.standings(league_id, season))
+        if response and len(response) > 0:
+            return response
         return None
+
+    def get_team_standing(self, team_id: int, league_id: int = None, season: int = 2023) -> Optional[Dict]:
+        """
+        Linha de uma equipa na classificação; sem liga, procura em todas as classificações guardadas
+        """
+        row = self.store.team_standing(team_id, season, league_id)
+        if row is None and league_id:
+            standings = self.get_standings(league_id, season)
+            if standings:
+                row = self.store.team_standing(team_id, season, league_id)
+        return row
     
     def get_team_statistics(self, team_id: int, league_id: int, season: int = 2023) -> Optional[Dict]:
         """
@@ -310,17 +873,34 @@ class FootballDataManager:
         """
         params = {"team": team_id, "league": league_id, "season": season}
         data = self._make_request("teams/statistics", params)
-        print(f"DEBUG: get_team_statistics para team_id={team_id}, league_id={league_id}, season={season}")
-        print(f"DEBUG: Resposta da API: {data}")
+        logger.debug(f"get_team_statistics team_id={team_id}, league_id={league_id}, season={season}: "
+                     f"{'com' if data and data.get('response') else 'sem'} dados")
         if data and data.get('response') and len(data['response']) > 0:
             return data['response']
         return None
     
+    def _team_league_ids(self, team_id: int, season: int = 2023) -> List[int]:
+        """
+        Ligas disponíveis em que a equipa joga (equipas populares e dados guardados)
+        """
+        league_ids = self.team_directory.leagues_of(team_id)[:1] if team_id in self.team_directory.popular else []
+        for league_id in self.store.team_league_ids(team_id, season):
+            if league_id in self.leagues_by_id and league_id not in league_ids:
+                league_ids.append(league_id)
+        return league_ids
+
     def get_recent_matches(self, team_id: int, last: int = 5) -> Optional[List[Dict]]:
         """
         Obter últimos jogos de uma equipa usando datas (compatível com plano gratuito)
         """
         from datetime import datetime, timedelta
+
+        # Calendário da época das ligas da equipa: um pedido por liga serve todas as equipas
+        league_ids = self._team_league_ids(team_id)
+        if league_ids:
+            fixtures = self.schedule.last(league_ids, 2023, last, team_id=team_id)
+            if fixtures:
+                return fixtures
         
         # Calcular datas dos últimos 30 dias
         end_date = datetime.now()
@@ -333,8 +913,7 @@ class FootballDataManager:
             "to": end_date.strftime("%Y-%m-%d")
         }
         data = self._make_request("fixtures", params)
-        print(f"DEBUG: get_recent_matches para team_id={team_id}")
-        print(f"DEBUG: Resposta da API: {data}")
+        logger.debug(f"get_recent_matches team_id={team_id}: {len((data or {}).get('response') or [])} jogos da API")
         if data and data.get('response') and len(data['response']) > 0:
             # Ordenar por data e pegar os últimos 5
             fixtures = sorted(data['response'], key=lambda x: x['fixture']['date'], reverse=True)
@@ -345,6 +924,9 @@ class FootballDataManager:
         """
         Obter últimos jogos de uma liga
         """
+        fixtures = self.schedule.last([league_id], season, last)
+        if fixtures:
+            return fixtures
         params = {"league": league_id, "season": season, "last": last}
         data = self._make_request("fixtures", params)
         if data and data.get('response') and len(data['response']) > 0:
@@ -358,20 +940,55 @@ class FootballDataManager:
         params = {"h2h": f"{team1_id}-{team2_id}"}
         if last is not None:
             params["last"] = str(last)
+        key, _ = make_request_key("fixtures/headtohead", params)
+        cached = self._get_cached(key, "fixtures/headtohead")
+        if cached is not None:
+            self._count_h2h('cache')
+            return cached.get('response') or None
+
+        # Derivar dos jogos guardados (ligas, históricos anteriores) antes de gastar quota
+        start = time.perf_counter()
+        fixtures, complete = self.store.head_to_head(team1_id, team2_id, last)
+        if complete:
+            self._count_h2h('local', time.perf_counter() - start)
+            self._note_response('local')
+            self.track_dependency(LOCAL_STORE_KEY, time.time() + self.ttl_policy.ttl_for("fixtures/headtohead", params))
+            logger.info(f"🗃️ Confrontos {team1_id}-{team2_id} calculados localmente ({len(fixtures)} jogos)")
+            return fixtures or None
+
+        start = time.perf_counter()
         data = self._make_request("fixtures/headtohead", params)
+        self._count_h2h('upstream', time.perf_counter() - start)
         if data and data.get('response') and len(data['response']) > 0:
             return data['response']
         return None
+
+    def _count_h2h(self, source: str, elapsed: float = None):
+        with self._stats_lock:
+            self.h2h_stats[source] += 1
+            if elapsed is not None:
+                self.h2h_stats[f'{source}_ms'] += elapsed * 1000
+
+    def get_h2h_stats(self) -> Dict:
+        """
+        Confrontos diretos: quantos vieram do cache, do armazenamento local (requests poupados) e da API
+        """
+        with self._stats_lock:
+            stats = dict(self.h2h_stats)
+        local, upstream = stats.pop('local_ms'), stats.pop('upstream_ms')
+        stats['requests_saved'] = stats['local']
+        stats['avg_local_ms'] = round(local / stats['local'], 2) if stats['local'] else None
+        stats['avg_upstream_ms'] = round(upstream / stats['upstream'], 2) if stats['upstream'] else None
+        return stats
     
     def get_teams_by_league(self, league_id: int, season: int = 2024) -> Optional[List[Dict]]:
         """
         Obter equipas de uma liga
         """
         params = {"league": league_id, "season": season}
-        data = self._make_request("teams", params)
-        
-        if data and data.get('response'):
-            return data['response']
+        response = self._local_first("teams", params, lambda: self.store.teams_by_league(league_id, season))
+        if response:
+            return response
         return None
     
     def get_top_scorers(self, league_id: int, season: int = 2023) -> Optional[List[Dict]]:
@@ -379,26 +996,25 @@ class FootballDataManager:
         Obter melhores marcadores de uma liga
         """
         params = {"league": league_id, "season": season}
-        data = self._make_request("players/topscorers", params)
-        if data and data.get('response') and len(data['response']) > 0:
-            return data['response']
+        response = self._local_first("players/topscorers", params, lambda: self.store.top_scorers(league_id, season))
+        if response and len(response) > 0:
+            return response
         return None
     
     def search_team(self, team_name: str) -> Optional[List[Dict]]:
         """
-        Procurar equipa por nome
+        Procurar equipa por nome (diretório local; a API só em último recurso)
         """
-        params = {"search": team_name}
-        data = self._make_request("teams", params)
-        
-        if data and data.get('response'):
-            return data['response']
-        return None
+        return self._find_team_locally(team_name) or self._search_team_upstream(team_name)
     
     def get_live_fixtures(self, league_id: int = None) -> Optional[List[Dict]]:
         """
         Obter jogos ao vivo
         """
+        fixtures = self._live_from_poller(league_id)
+        if fixtures is not None:
+            return fixtures
+
         params = {"live": "all"}
         if league_id:
             params["league"] = league_id
@@ -409,10 +1025,38 @@ class FootballDataManager:
             return data['response']
         return []  # Retornar lista vazia se não houver jogos ao vivo
     
+    def _live_from_poller(self, league_id: int = None) -> Optional[List[Dict]]:
+        # Com o poller a correr, todos os pedidos são servidos pelo mesmo estado em memória (mesmo sem quota
+        # para o atualizar): só o poller vai à API, ao ritmo que a quota permite
+        fixtures = self.live.fixtures_for_request(league_id)
+        if fixtures is not None:
+            self._note_response('memory')
+            # Sem estado ainda (sem quota para a primeira consulta): a resposta não fica em cache
+            updated_at = self.live.updated_at
+            self.track_dependency(LIVE_STATE_KEY, updated_at + self.live.current_interval if updated_at else time.time())
+        return fixtures
+
+    @staticmethod
+    def _date_window(date: str) -> Optional[Tuple[int, float]]:
+        # (época, início do dia em UTC) de uma data YYYY-MM-DD, ou None se a data não for válida
+        try:
+            day = datetime.strptime(date, "%Y-%m-%d")
+        except ValueError:
+            return None
+        return current_season(day), day.replace(tzinfo=timezone.utc).timestamp()
+
     def get_fixtures_by_date(self, date: str, league_id: int = None) -> Optional[List[Dict]]:
         """
         Obter jogos por data (formato: YYYY-MM-DD)
         """
+        window = self._date_window(date) if league_id else None
+        if window is not None:
+            season, start = window
+            # Épocas terminadas: vale a pena carregar o calendário (todas as datas passam a ser locais)
+            fixtures = self.schedule.window([league_id], season, start, start + 86400,
+                                            fetch=is_completed_season({'season': season}))
+            if fixtures:
+                return fixtures
         params = {"date": date}
         if league_id:
             params["league"] = league_id
@@ -427,6 +1071,9 @@ class FootballDataManager:
         """
         Obter próximos jogos
         """
+        fixtures = self._next_from_schedule(team_id, league_id, next)
+        if fixtures:
+            return fixtures
         params = {"next": next}
         if team_id:
             params["team"] = team_id
@@ -439,58 +1086,67 @@ class FootballDataManager:
             return data['response']
         return None
     
-    def identify_team_by_name(self, team_name: str) -> Optional[List[Dict]]:
+    def _next_from_schedule(self, team_id: int = None, league_id: int = None, next: int = 5) -> Optional[List[Dict]]:
+        # Só calendários já carregados: a época em curso pode não estar disponível no plano gratuito
+        league_ids = [league_id] if league_id else self._team_league_ids(team_id) if team_id else []
+        for season in sorted({s['season'] for s in self.schedule.loaded()}, reverse=True):
+            fixtures = self.schedule.next(league_ids, season, next, team_id=team_id, fetch=False)
+            if fixtures:
+                return fixtures
+        return None
+
+    def identify_team_by_name(self, team_name: str, upstream: bool = True) -> Optional[List[Dict]]:
         """
-        Procurar equipa por nome
+        Procurar equipa por nome (diretório local; a API só em último recurso, se upstream)
         """
-        params = {"search": team_name}
-        data = self._make_request("teams", params)
-        
-        if data and data.get('response'):
-            return data['response']
-        return None
+        return self._find_team_locally(team_name) or (self._search_team_upstream(team_name) if upstream else None)
     
-    def identify_league_by_name(self, league_name: str) -> Optional[Dict]:
+    def get_league_patterns(self) -> List[tuple]:
+        """
+        (prioridade, padrão, chave da liga) para procurar ligas em texto: primeiro os aliases, depois a chave
+        e o nome de cada liga (a menor prioridade encontrada ganha)
         """
-        Identificar liga por nome
+        patterns = [(priority, alias, league_key) for priority, (alias, league_key) in enumerate(self.league_aliases.items())]
+        offset = len(patterns)
+        for priority, (league_key, league_info) in enumerate(self.available_leagues.items(), start=offset):
+            patterns.append((priority, league_key, league_key))
+            patterns.append((priority, league_info['name'].lower(), league_key))
+        return patterns
+
+    def league_from_hits(self, hits) -> Optional[Dict]:
+        """
+        Liga com maior prioridade entre as etiquetas ('league', prioridade, chave) encontradas por um PatternMatcher
+        """
+        leagues = [label for label in hits if label[0] == 'league']
+        if not leagues:
+            return None
+        return self.available_leagues.get(min(leagues)[2])
+
+    def identify_league_by_name(self, league_name: str, hits=None) -> Optional[Dict]:
+        """
+        Identificar liga por nome (hits: resultado de um PatternMatcher já passado pelo texto em minúsculas)
         """
+        # Primeiro o texto como foi escrito ("série a" é o Brasileirão), depois sem acentos nem pontuação
         league_name_lower = league_name.lower()
+        league = self.league_from_hits(hits if hits is not None else self.league_patterns.scan(league_name_lower))
+        if league:
+            return league
+        folded = normalize(league_name)
+        if folded != league_name_lower:
+            league = self.league_from_hits(self.league_patterns.scan(folded))
+            if league:
+                return league
         
-        # Mapeamento de nomes alternativos
-        league_aliases = {
-            'premier': 'england',
-            'premier league': 'england',
-            'pl': 'england',
-            'epl': 'england',
-            'bundesliga': 'germany',
-            'buli': 'germany',
-            'serie a': 'italy',
-            'seria a': 'italy',
-            'la liga': 'spain',
-            'laliga': 'spain',
-            'ligue 1': 'france',
-            'ligue1': 'france',
-            'primeira liga': 'portugal',
-            'liga portugal': 'portugal',
-            'liga nos': 'portugal',
-            'eredivisie': 'netherlands',
-            'champions': 'champions',
-            'ucl': 'champions',
-            'europa league': 'europa',
-            'uel': 'europa',
-            'conference': 'conference',
-            'uecl': 'conference'
-        }
-        
-        # Verificar aliases
-        for alias, league_key in league_aliases.items():
-            if alias in league_name_lower:
-                return self.available_leagues.get(league_key)
-        
-        # Verificar nomes diretos
-        for league_key, league_info in self.available_leagues.items():
-            if league_key in league_name_lower or league_info['name'].lower() in league_name_lower:
-                return league_info
+        # Erros de escrita ("bundesliaga", "premeir league"): n-gramas do texto quase iguais a um nome/alias
+        words = folded.split()
+        for size in (3, 2, 1):
+            for i in range(len(words) - size + 1):
+                span = ' '.join(words[i:i + size])
+                if len(span) < 5:
+                    continue
+                match = self.league_matcher.match(span, min_score=0.8)
+                if match:
+                    return self.available_leagues.get(match[0])
         
         return None
     
@@ -498,16 +1154,43 @@ class FootballDataManager:
         """
         Obter informações de uma liga pelo ID
         """
-        for league_key, league_info in self.available_leagues.items():
-            if league_info['id'] == league_id:
-                return league_info
-        return None
+        return self.leagues_by_id.get(league_id)
+
+    def get_team_league(self, team_id: int) -> Optional[int]:
+        """
+        Liga principal de uma equipa: a das equipas populares ou, senão, o primeiro campeonato nacional
+        disponível em que aparece (as competições europeias só se não houver outra)
+        """
+        leagues = [league_id for league_id in self.team_directory.leagues_of(team_id) if league_id in self.leagues_by_id]
+        if not leagues:
+            return None
+        if team_id in self.team_directory.popular:
+            return leagues[0]
+        domestic = [league_id for league_id in leagues if self.leagues_by_id[league_id]['country'] != 'World']
+        return (domestic or leagues)[0]
+
+    def get_team_aliases(self, team_id: int) -> Set[str]:
+        """
+        Nomes e aliases normalizados (sem acentos, minúsculas) conhecidos para uma equipa
+        """
+        return self.team_directory.names_of(team_id)
+
+    def find_team_id(self, alias: str) -> Optional[int]:
+        """
+        team_id de um nome/alias exato (sem acentos nem maiúsculas), sem pesquisas aproximadas nem à API
+        """
+        return self.team_directory.team_id(alias)
     
     def get_team_info(self, team_id: int) -> Optional[Dict]:
         """
         Obter informações básicas de uma equipa
         """
         params = {"id": team_id}
+        max_age = self.ttl_policy.ttl_for("teams", params)
+        team = self.store.team(team_id, max_age)
+        if team is not None:
+            self._note_response('local')
+            return team
         data = self._make_request("teams", params)
         
         if data and data.get('response') and len(data['response']) > 0:
@@ -518,34 +1201,89 @@ class FootballDataManager:
         """
         Limpar cache
         """
-        conn = sqlite3.connect(self.db_path)
-        c = conn.cursor()
-        c.execute('DELETE FROM api_requests')
-        conn.commit()
-        conn.close()
+        self.db.execute('DELETE FROM api_requests')
+        self.memory_cache.clear()
+        self.store.clear()
+        self.schedule.clear()
+        self.cache_generation += 1
         print("🗑️ Cache limpo!")
+
+    def compact_db(self):
+        """
+        Devolver ao disco o espaço libertado (VACUUM); usar fora das horas de tráfego
+        """
+        with self.db.connection() as conn:
+            conn.execute('VACUUM')
+        logger.info("🗜️ Base de dados compactada")
+
+    def get_storage_report(self) -> Dict:
+        """
+        Relatório de espaço ocupado pelas respostas em cada formato
+        """
+        rows = self.db.fetchall('''
+            SELECT COALESCE(encoding, 'json'), COUNT(*),
+                   SUM(COALESCE(LENGTH(response), 0) + COALESCE(LENGTH(response_blob), 0)),
+                   SUM(COALESCE(raw_size, LENGTH(response), 0))
+            FROM api_requests GROUP BY 1
+        ''')
+        page_count = self.db.fetchone('PRAGMA page_count')[0]
+        page_size = self.db.fetchone('PRAGMA page_size')[0]
+        freelist = self.db.fetchone('PRAGMA freelist_count')[0]
+        by_encoding = {}
+        for encoding, entries, stored, raw in rows:
+            by_encoding[encoding] = {
+                'entries': entries,
+                'stored_bytes': stored or 0,
+                'json_bytes': raw or 0,
+                'ratio': round((stored or 0) / raw, 3) if raw else None
+            }
+        return {
+            'encoding': self.response_encoding,
+            'by_encoding': by_encoding,
+            'db_bytes': page_count * page_size,
+            'free_bytes': freelist * page_size
+        }
+
+    def purge_expired(self) -> int:
+        """
+        Remover entradas expiradas do cache (usa o índice de expires_at)
+        """
+        removed = self.db.execute('DELETE FROM api_requests WHERE expires_at <= ?', (time.time(),))
+        self.memory_cache.purge_expired()
+        logger.info(f"🗑️ {removed} entradas expiradas removidas do cache")
+        return removed
     
     def get_cache_stats(self) -> Dict:
         """
         Obter estatísticas do cache
         """
-        conn = sqlite3.connect(self.db_path)
-        c = conn.cursor()
-        c.execute('SELECT COUNT(*) FROM api_requests')
-        total_entries = c.fetchone()[0]
+        with self.db.connection() as conn:
+            c = conn.cursor()
+            c.execute('SELECT COUNT(*) FROM api_requests')
+            total_entries = c.fetchone()[0]
 
-        # Corrigir bindings: usar f-string para inserir o valor diretamente
-        c.execute(f'SELECT COUNT(*) FROM api_requests WHERE created_at < datetime("now")')
-        expired_entries = c.fetchone()[0]
-        
-        conn.close()
+            c.execute('SELECT COUNT(*) FROM api_requests WHERE expires_at <= ?', (time.time(),))
+            expired_entries = c.fetchone()[0]
         
         return {
             'total_entries': total_entries,
             'expired_entries': expired_entries,
             'active_entries': total_entries - expired_entries,
             'requests_made': self.requests_made,
-            'requests_remaining': 100 - self.requests_made
+            'requests_remaining': max(0, self.daily_quota - self.requests_made),
+            'daily_quota': self.daily_quota,
+            'rate_limit': self.rate_limiter.status(),
+            'db_connections': self.db.stats(),
+            'ttl_seconds': self.ttl_policy.describe(),
+            'memory': self.memory_cache.stats(),
+            'single_flight': self.single_flight.stats(),
+            'local_store': self.store.stats(),
+            'head_to_head': self.get_h2h_stats(),
+            'schedule': self.schedule.get_stats(),
+            'live': self.live.status(),
+            'team_directory': self.team_directory.stats(),
+            'stale_while_revalidate': dict(self.swr_stats, enabled=self.stale_while_revalidate),
+            'http': self.http.stats()
         }
 
 # Exemplo de uso
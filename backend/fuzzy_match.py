@@ -0,0 +1,127 @@
+import re
+import unicodedata
+from collections import Counter
+from itertools import chain
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+MIN_SCORE = 0.75
+MAX_CANDIDATES = 8
+# Abaixo disto os trigramas em comum são poucos demais para um erro de escrita
+MIN_DICE = 0.45
+
+_NON_WORD = re.compile(r"[^\w\s]", re.UNICODE)
+
+
+def normalize(text: str) -> str:
+    """
+    Minúsculas, sem acentos nem pontuação ("Vitória Guimarães!" -> "vitoria guimaraes")
+    """
+    folded = unicodedata.normalize('NFKD', text.lower())
+    folded = ''.join(c for c in folded if not unicodedata.combining(c))
+    return ' '.join(_NON_WORD.sub(' ', folded).split())
+
+
+def trigrams(text: str) -> Set[str]:
+    padded = f'  {text} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """
+    Distância de Damerau-Levenshtein (transposições adjacentes contam 1); pára cedo acima de limit
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous2 = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        row_min = current[0]
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if previous2 is not None and i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+            row_min = min(row_min, current[j])
+        if row_min > limit:
+            return limit + 1
+        previous2, previous = previous, current
+    return previous[-1]
+
+
+class FuzzyMatcher:
+    """
+    Correspondência aproximada de nomes: aliases normalizados (sem acentos) indexados por trigramas na
+    construção; cada pesquisa só calcula a distância de edição para os poucos candidatos com mais trigramas
+    em comum
+    """
+
+    def __init__(self, min_score: float = MIN_SCORE):
+        self.min_score = min_score
+        self.aliases: List[str] = []
+        self.values: List[Any] = []
+        self.gram_counts: List[int] = []
+        self.exact: Dict[str, int] = {}
+        self.index: Dict[str, List[int]] = {}
+
+    def add(self, alias: str, value: Any, replace: bool = False):
+        key = normalize(alias)
+        if not key:
+            return
+        if key in self.exact:
+            if replace:
+                self.values[self.exact[key]] = value
+            return
+        position = len(self.aliases)
+        grams = trigrams(key)
+        self.aliases.append(key)
+        self.values.append(value)
+        self.gram_counts.append(len(grams))
+        self.exact[key] = position
+        for gram in grams:
+            self.index.setdefault(gram, []).append(position)
+
+    def match(self, query: str, min_score: float = None) -> Optional[Tuple[Any, float, str]]:
+        """
+        Melhor (valor, score entre 0 e 1, alias) para a pesquisa, ou None abaixo do score mínimo
+        """
+        results = self.matches(query, limit=1, min_score=min_score)
+        return results[0] if results else None
+
+    def matches(self, query: str, limit: int = 5, min_score: float = None) -> List[Tuple[Any, float, str]]:
+        min_score = self.min_score if min_score is None else min_score
+        key = normalize(query)
+        if not key:
+            return []
+        position = self.exact.get(key)
+        if position is not None:
+            return [(self.values[position], 1.0, key)]
+        grams = trigrams(key)
+        # Contagem dos trigramas em comum feita em C (Counter sobre as listas de ocorrências)
+        shared = Counter(chain.from_iterable(self.index.get(gram, ()) for gram in grams))
+        # Coeficiente de Dice dos trigramas: só os candidatos parecidos chegam à distância de edição
+        candidates = []
+        for candidate, common in shared.items():
+            dice = 2 * common / (len(grams) + self.gram_counts[candidate])
+            if dice >= MIN_DICE:
+                candidates.append((dice, candidate))
+        candidates.sort(reverse=True)
+        results = []
+        seen = set()
+        for _, candidate in candidates[:MAX_CANDIDATES]:
+            alias = self.aliases[candidate]
+            longest = max(len(key), len(alias))
+            limit_distance = int(longest * (1 - min_score))
+            distance = edit_distance(key, alias, limit_distance)
+            if distance > limit_distance:
+                continue
+            value = self.values[candidate]
+            if value in seen:
+                continue
+            seen.add(value)
+            results.append((value, round(1 - distance / longest, 3), alias))
+        results.sort(key=lambda r: -r[1])
+        return results[:limit]
+
+    def __len__(self) -> int:
+        return len(self.aliases)
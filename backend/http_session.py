@@ -0,0 +1,151 @@
+import time
+import random
+import logging
+import threading
+from typing import Callable, Dict, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import MaxRetryError, ResponseError
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+# Tempo de connect (TCP + TLS) da última ligação aberta nesta thread
+_timing = threading.local()
+
+
+class _TimedHTTPConnection(HTTPConnection):
+    def connect(self):
+        start = time.perf_counter()
+        super().connect()
+        _timing.connect = time.perf_counter() - start
+
+
+class _TimedHTTPSConnection(HTTPSConnection):
+    def connect(self):
+        start = time.perf_counter()
+        super().connect()
+        _timing.connect = time.perf_counter() - start
+
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+
+class JitteredRetry(Retry):
+    """
+    Retry com backoff exponencial e jitter (evita que vários workers repitam ao mesmo tempo).
+    Cada nova tentativa é mais um pedido à API: on_retry() é chamado antes de cada uma e, se devolver False
+    (ex: o rate limiter não deixa), não se repete e fica a última resposta ou erro
+    """
+
+    def __init__(self, *args, on_retry: Optional[Callable[[], bool]] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.on_retry = on_retry
+
+    def new(self, **kw):
+        kw.setdefault('on_retry', self.on_retry)
+        return super().new(**kw)
+
+    def increment(self, method=None, url=None, response=None, error=None, _pool=None, _stacktrace=None):
+        retry = super().increment(method, url, response=response, error=error, _pool=_pool, _stacktrace=_stacktrace)
+        if self.on_retry is not None and not self.on_retry():
+            raise MaxRetryError(_pool, url, error or ResponseError('retry cancelado: sem quota no rate limiter'))
+        return retry
+
+    def get_backoff_time(self) -> float:
+        base = super().get_backoff_time()
+        return random.uniform(base / 2, base) if base > 0 else 0
+
+
+class TimedHTTPAdapter(HTTPAdapter):
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': _TimedHTTPConnectionPool,
+            'https': _TimedHTTPSConnectionPool
+        }
+
+
+class ApiSession:
+    """
+    Sessão HTTP keep-alive para a API-Sports: pool de ligações, retries com backoff e tempos por pedido
+    """
+
+    def __init__(self, headers: Dict = None, pool_connections: int = 4, pool_maxsize: int = 10,
+                 retries: int = 2, backoff_factor: float = 0.5, on_retry: Optional[Callable[[], bool]] = None):
+        self.session = requests.Session()
+        if headers:
+            self.session.headers.update(headers)
+        # Os retries também gastam quota: poucos, só para erros transitórios, e cada um cobrado por on_retry
+        retry = JitteredRetry(
+            on_retry=on_retry,
+            total=retries,
+            connect=retries,
+            read=retries,
+            status=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=(500, 502, 503, 504),
+            allowed_methods=frozenset(['GET']),
+            respect_retry_after_header=True,
+            raise_on_status=False
+        )
+        adapter = TimedHTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=retry)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.new_connections = 0
+        self.totals = {'connect': 0.0, 'ttfb': 0.0, 'total': 0.0}
+
+    def get(self, url: str, params: Dict = None, timeout: float = 10) -> Tuple[requests.Response, Dict]:
+        """
+        GET com medição de tempos: devolve (resposta, {connect, ttfb, total, reused} em ms)
+        """
+        _timing.connect = None
+        start = time.perf_counter()
+        response = self.session.get(url, params=params, timeout=timeout)
+        total = time.perf_counter() - start
+        connect = _timing.connect
+        timing = {
+            'connect_ms': round((connect or 0) * 1000, 1),
+            'ttfb_ms': round(response.elapsed.total_seconds() * 1000, 1),
+            'total_ms': round(total * 1000, 1),
+            'reused': connect is None
+        }
+        self.record(timing)
+        return response, timing
+
+    def record(self, timing: Dict):
+        """
+        Somar aos totais os tempos de um pedido (também os feitos por outro transporte em nome desta sessão)
+        """
+        with self._lock:
+            self.requests += 1
+            if not timing['reused']:
+                self.new_connections += 1
+            self.totals['connect'] += timing['connect_ms']
+            self.totals['ttfb'] += timing['ttfb_ms']
+            self.totals['total'] += timing['total_ms']
+
+    def stats(self) -> Dict:
+        with self._lock:
+            n = self.requests
+            return {
+                'requests': n,
+                'new_connections': self.new_connections,
+                'reused_connections': n - self.new_connections,
+                'avg_connect_ms': round(self.totals['connect'] / n, 1) if n else 0.0,
+                'avg_ttfb_ms': round(self.totals['ttfb'] / n, 1) if n else 0.0,
+                'avg_total_ms': round(self.totals['total'] / n, 1) if n else 0.0
+            }
+
+    def close(self):
+        self.session.close()
@@ -0,0 +1,249 @@
+import time
+import queue
+import logging
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from cache_keys import make_request_key
+from rate_limiter import RateLimitExceeded
+
+logger = logging.getLogger(__name__)
+
+LIVE_PARAMS = {'live': 'all'}
+# Chave de versão do estado ao vivo (respostas construídas com ele ficam desatualizadas a cada mudança)
+LIVE_STATE_KEY = 'live-state'
+
+
+def _snapshot(fixture: Dict) -> Tuple:
+    # O que interessa a quem está a ver: resultado, minuto e estado
+    status = fixture['fixture'].get('status') or {}
+    goals = fixture.get('goals') or {}
+    return goals.get('home'), goals.get('away'), status.get('short'), status.get('elapsed')
+
+
+def compact_fixture(fixture: Dict) -> Dict:
+    """
+    Jogo ao vivo só com os campos enviados aos clientes
+    """
+    status = fixture['fixture'].get('status') or {}
+    return {
+        'id': fixture['fixture']['id'],
+        'league': {'id': fixture['league']['id'], 'name': fixture['league']['name']},
+        'teams': {side: {'id': fixture['teams'][side]['id'], 'name': fixture['teams'][side]['name']}
+                  for side in ('home', 'away')},
+        'goals': {'home': fixture['goals']['home'], 'away': fixture['goals']['away']},
+        'status': {'short': status.get('short'), 'elapsed': status.get('elapsed')}
+    }
+
+
+class LivePoller:
+    """
+    Um único pedido fixtures?live=all de cada vez, partilhado por todos os clientes: o estado fica em memória
+    e só os jogos que mudaram (resultado, minuto, estado) são enviados aos subscritores.
+    Só consulta a API enquanto há procura (subscritores ou pedidos recentes), e o intervalo entre pedidos é
+    calculado a partir da quota que sobra até ao reset (nunca menos de interval segundos): o poller gasta no
+    máximo budget_share da quota acima da reserva, por muita procura que haja.
+    """
+
+    def __init__(self, manager, interval: float = 60, demand_window: float = 300, reserve_quota: int = 30,
+                 budget_share: float = 0.5, queue_size: int = 100):
+        self.manager = manager
+        # Intervalo mínimo; o efetivo (current_interval) depende da quota restante
+        self.interval = interval
+        self.budget_share = budget_share
+        self.current_interval = interval
+        # Sem quota para o poller até ao reset: serve-se o último estado, sem ir à API
+        self.throttled = False
+        self.polled_at: Optional[float] = None
+        # Sem subscritores, continua a atualizar durante demand_window segundos após o último pedido
+        self.demand_window = demand_window
+        self.reserve_quota = reserve_quota
+        self.queue_size = queue_size
+        self._fixtures: Dict[int, Dict] = {}
+        self._snapshots: Dict[int, Tuple] = {}
+        self._subscribers: List[queue.Queue] = []
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self.version = 0
+        self.updated_at: Optional[float] = None
+        self.last_demand = 0.0
+        self.stats = {'polls': 0, 'failures': 0, 'updates': 0, 'changed': 0, 'removed': 0,
+                      'served': 0, 'dropped_subscribers': 0}
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def fresh(self, now: float = None) -> bool:
+        """
+        O estado em memória pode substituir um pedido à API? (poller a correr e atualizado há pouco)
+        """
+        now = time.time() if now is None else now
+        return self.running and self.updated_at is not None and now - self.updated_at <= 2 * self.current_interval
+
+    def touch(self):
+        """
+        Registar procura (ex: um pedido de jogos ao vivo): acorda o poller se estava parado
+        """
+        idle = not self._has_demand()
+        self.last_demand = time.time()
+        if idle:
+            self._wake.set()
+
+    def _has_demand(self) -> bool:
+        return bool(self._subscribers) or time.time() - self.last_demand <= self.demand_window
+
+    def fixtures(self, league_id: int = None) -> List[Dict]:
+        """
+        Jogos ao vivo em memória (formato da API), opcionalmente só de uma liga
+        """
+        with self._lock:
+            fixtures = list(self._fixtures.values())
+            self.stats['served'] += 1
+        if league_id:
+            fixtures = [f for f in fixtures if f['league']['id'] == int(league_id)]
+        return fixtures
+
+    def _fetch(self) -> Optional[List[Dict]]:
+        # Cache válido (TTL curto dos jogos ao vivo) ou API; pedidos iguais em simultâneo partilham a chamada
+        key, _ = make_request_key('fixtures', LIVE_PARAMS)
+        manager = self.manager
+        data, _ = manager.single_flight.do(key, lambda: manager._fetch_if_missing(key, 'fixtures', LIVE_PARAMS))
+        return data.get('response') if data is not None else None
+
+    def poll_once(self) -> Optional[Dict]:
+        """
+        Atualizar o estado e avisar os subscritores; devolve as alterações ou None se o pedido falhou
+        """
+        self.stats['polls'] += 1
+        self.polled_at = time.time()
+        try:
+            fixtures = self._fetch()
+        except RateLimitExceeded as e:
+            logger.info(f"⏳ Jogos ao vivo adiados: {e}")
+            fixtures = None
+        except Exception as e:
+            logger.error(f"❌ Erro ao atualizar jogos ao vivo: {e}", exc_info=True)
+            fixtures = None
+        if fixtures is None:
+            self.stats['failures'] += 1
+            return None
+        current = {f['fixture']['id']: f for f in fixtures}
+        with self._lock:
+            changed = [f for fid, f in current.items() if self._snapshots.get(fid) != _snapshot(f)]
+            removed = [fid for fid in self._fixtures if fid not in current]
+            self._fixtures = current
+            self._snapshots = {fid: _snapshot(f) for fid, f in current.items()}
+            self.updated_at = time.time()
+            if not changed and not removed:
+                return {'version': self.version, 'changed': [], 'removed': []}
+            self.version += 1
+            update = {'version': self.version, 'changed': [compact_fixture(f) for f in changed], 'removed': removed}
+            self.stats['updates'] += 1
+            self.stats['changed'] += len(changed)
+            self.stats['removed'] += len(removed)
+        self.manager.bump_version(LIVE_STATE_KEY)
+        self._publish(update)
+        return update
+
+    def _publish(self, update: Dict):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            try:
+                subscriber.put_nowait(update)
+            except queue.Full:
+                # Cliente que não consome: desligar (ao voltar a ligar recebe o estado completo)
+                self.unsubscribe(subscriber)
+                self.stats['dropped_subscribers'] += 1
+
+    def subscribe(self) -> Tuple[queue.Queue, Dict]:
+        """
+        Nova subscrição: devolve a fila de alterações e o estado atual (a enviar primeiro ao cliente)
+        """
+        self.touch()
+        subscriber = queue.Queue(maxsize=self.queue_size)
+        with self._lock:
+            self._subscribers.append(subscriber)
+            snapshot = {'version': self.version, 'fixtures': [compact_fixture(f) for f in self._fixtures.values()]}
+        return subscriber, snapshot
+
+    def unsubscribe(self, subscriber: queue.Queue):
+        with self._lock:
+            if subscriber in self._subscribers:
+                self._subscribers.remove(subscriber)
+
+    def subscribed(self, subscriber: queue.Queue) -> bool:
+        with self._lock:
+            return subscriber in self._subscribers
+
+    def _schedule(self) -> Tuple[bool, float]:
+        """
+        (pode consultar a API, segundos até à próxima consulta ou até ao reset da quota)
+        """
+        status = self.manager.rate_limiter.status()
+        budget = (status['remaining_today'] - self.reserve_quota) * self.budget_share
+        if budget < 1:
+            return False, status['quota_resets_in'] + 1
+        return True, max(self.interval, status['quota_resets_in'] / budget)
+
+    def _loop(self):
+        while not self._stop.is_set():
+            if not self._has_demand():
+                # Sem procura: esperar por um pedido ou subscritor (touch acorda o poller)
+                self._wake.wait()
+            else:
+                allowed, delay = self._schedule()
+                self.throttled = not allowed
+                if allowed:
+                    self.current_interval = delay
+                    due = (self.polled_at or 0) + delay
+                    if time.time() >= due:
+                        self.poll_once()
+                        due = self.polled_at + delay
+                    self._wake.wait(max(0.0, due - time.time()))
+                else:
+                    # Quota do poller esgotada: dormir até ao reset diário, servindo o último estado
+                    logger.info(f"⏳ Jogos ao vivo sem quota até ao reset (daqui a {delay:.0f}s)")
+                    self._wake.wait(delay)
+            self._wake.clear()
+
+    def fixtures_for_request(self, league_id: int = None) -> Optional[List[Dict]]:
+        """
+        Jogos ao vivo para um pedido (API ou chat) sem o pedido ir à API: o último estado do poller.
+        A primeira vez, se ainda não há estado e há quota, faz já a primeira consulta (partilhada).
+        None se o poller não está a correr (o pedido segue o caminho normal)
+        """
+        if not self.running:
+            return None
+        self.touch()
+        if self.updated_at is None and not self.throttled and self._schedule()[0]:
+            self.poll_once()
+        return self.fixtures(league_id)
+
+    def start(self):
+        """
+        Arrancar o poller numa thread daemon (só consulta a API quando há procura)
+        """
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name='live-poller', daemon=True)
+        self._thread.start()
+        logger.info(f"🔴 Jogos ao vivo atualizados no máximo a cada {self.interval:.0f}s enquanto houver procura")
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def status(self) -> Dict:
+        with self._lock:
+            live = len(self._fixtures)
+            subscribers = len(self._subscribers)
+        return dict(self.stats, running=self.running, interval=self.interval,
+                    current_interval=round(self.current_interval), throttled=self.throttled,
+                    fresh=self.fresh(), live=live,
+                    subscribers=subscribers, version=self.version,
+                    updated_at=self.updated_at, demand=self._has_demand())
@@ -0,0 +1,524 @@
+import json
+import time
+import logging
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from db_pool import SQLitePool
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = [
+    '''
+    CREATE TABLE IF NOT EXISTS fixtures (
+        id INTEGER PRIMARY KEY,
+        league_id INTEGER,
+        season INTEGER,
+        date TEXT,
+        timestamp INTEGER,
+        status TEXT,
+        home_id INTEGER,
+        away_id INTEGER,
+        home_goals INTEGER,
+        away_goals INTEGER,
+        payload TEXT NOT NULL,
+        updated_at REAL NOT NULL
+    )
+    ''',
+    'CREATE INDEX IF NOT EXISTS idx_fixtures_league ON fixtures (league_id, season, timestamp)',
+    'CREATE INDEX IF NOT EXISTS idx_fixtures_home ON fixtures (home_id, timestamp)',
+    'CREATE INDEX IF NOT EXISTS idx_fixtures_away ON fixtures (away_id, timestamp)',
+    # Confrontos diretos: os dois sentidos do par são dois lookups neste índice
+    'CREATE INDEX IF NOT EXISTS idx_fixtures_pair ON fixtures (home_id, away_id, date)',
+    '''
+    CREATE TABLE IF NOT EXISTS teams (
+        id INTEGER PRIMARY KEY,
+        name TEXT NOT NULL,
+        code TEXT,
+        country TEXT,
+        founded INTEGER,
+        logo TEXT,
+        venue TEXT,
+        payload TEXT,
+        updated_at REAL NOT NULL
+    )
+    ''',
+    'CREATE INDEX IF NOT EXISTS idx_teams_name ON teams (name COLLATE NOCASE)',
+    '''
+    CREATE TABLE IF NOT EXISTS standings_rows (
+        league_id INTEGER NOT NULL,
+        season INTEGER NOT NULL,
+        group_idx INTEGER NOT NULL,
+        team_id INTEGER NOT NULL,
+        rank INTEGER,
+        points INTEGER,
+        played INTEGER,
+        goals_diff INTEGER,
+        payload TEXT NOT NULL,
+        PRIMARY KEY (league_id, season, group_idx, team_id)
+    )
+    ''',
+    'CREATE INDEX IF NOT EXISTS idx_standings_team ON standings_rows (team_id, season)',
+    '''
+    CREATE TABLE IF NOT EXISTS player_stats (
+        league_id INTEGER NOT NULL,
+        season INTEGER NOT NULL,
+        player_id INTEGER NOT NULL,
+        team_id INTEGER,
+        position INTEGER,
+        name TEXT,
+        goals INTEGER,
+        assists INTEGER,
+        payload TEXT NOT NULL,
+        PRIMARY KEY (league_id, season, player_id)
+    )
+    ''',
+    'CREATE INDEX IF NOT EXISTS idx_player_stats_team ON player_stats (team_id, season)',
+    # Conjuntos completos já guardados (tabela de uma liga, lista de marcadores...) e até quando são válidos
+    '''
+    CREATE TABLE IF NOT EXISTS store_coverage (
+        dataset TEXT NOT NULL,
+        league_id INTEGER NOT NULL,
+        season INTEGER NOT NULL,
+        meta TEXT,
+        expires_at REAL NOT NULL,
+        updated_at REAL NOT NULL,
+        PRIMARY KEY (dataset, league_id, season)
+    )
+    ''',
+    # Pares com o histórico completo de confrontos já descarregado (fixtures/headtohead sem 'last')
+    '''
+    CREATE TABLE IF NOT EXISTS h2h_coverage (
+        pair TEXT PRIMARY KEY,
+        expires_at REAL NOT NULL,
+        updated_at REAL NOT NULL
+    )
+    ''',
+    'CREATE TABLE IF NOT EXISTS store_meta (key TEXT PRIMARY KEY, value TEXT)'
+]
+
+SQL_UPSERT_FIXTURE = '''
+    INSERT INTO fixtures (id, league_id, season, date, timestamp, status, home_id, away_id, home_goals, away_goals,
+                          payload, updated_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(id) DO UPDATE SET
+        league_id = excluded.league_id, season = excluded.season, date = excluded.date,
+        timestamp = excluded.timestamp, status = excluded.status, home_id = excluded.home_id,
+        away_id = excluded.away_id, home_goals = excluded.home_goals, away_goals = excluded.away_goals,
+        payload = excluded.payload, updated_at = excluded.updated_at
+'''
+# Equipas vistas de passagem (classificação, jogos, marcadores) só atualizam nome e logo
+SQL_UPSERT_TEAM_REF = '''
+    INSERT INTO teams (id, name, logo, updated_at) VALUES (?, ?, ?, ?)
+    ON CONFLICT(id) DO UPDATE SET name = excluded.name, logo = COALESCE(excluded.logo, teams.logo)
+'''
+SQL_UPSERT_TEAM = '''
+    INSERT INTO teams (id, name, code, country, founded, logo, venue, payload, updated_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(id) DO UPDATE SET
+        name = excluded.name, code = excluded.code, country = excluded.country, founded = excluded.founded,
+        logo = excluded.logo, venue = excluded.venue, payload = excluded.payload, updated_at = excluded.updated_at
+'''
+SQL_INSERT_STANDING = '''
+    INSERT OR REPLACE INTO standings_rows (league_id, season, group_idx, team_id, rank, points, played, goals_diff, payload)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+SQL_INSERT_PLAYER = '''
+    INSERT OR REPLACE INTO player_stats (league_id, season, player_id, team_id, position, name, goals, assists, payload)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+SQL_UPSERT_COVERAGE = '''
+    INSERT OR REPLACE INTO store_coverage (dataset, league_id, season, meta, expires_at, updated_at)
+    VALUES (?, ?, ?, ?, ?, ?)
+'''
+SQL_SELECT_COVERAGE = '''
+    SELECT meta FROM store_coverage WHERE dataset = ? AND league_id = ? AND season = ? AND expires_at > ?
+'''
+SQL_SELECT_PAIR = '''
+    SELECT payload, season, date FROM fixtures WHERE home_id = ? AND away_id = ?
+    UNION ALL
+    SELECT payload, season, date FROM fixtures WHERE home_id = ? AND away_id = ?
+    ORDER BY date DESC
+'''
+# Épocas em que há calendário completo e válido de uma competição onde as duas equipas jogaram
+SQL_SELECT_PAIR_SEASONS = '''
+    SELECT DISTINCT c.season FROM store_coverage c
+    WHERE c.dataset = 'fixtures' AND c.expires_at > ?
+      AND EXISTS (SELECT 1 FROM fixtures f WHERE f.league_id = c.league_id AND f.season = c.season
+                  AND (f.home_id = ? OR f.away_id = ?))
+      AND EXISTS (SELECT 1 FROM fixtures f WHERE f.league_id = c.league_id AND f.season = c.season
+                  AND (f.home_id = ? OR f.away_id = ?))
+'''
+# Competições (liga + época) em que alguma das duas equipas jogou desde uma época, sem calendário completo
+# e válido guardado: um confronto nelas (ex: taça) pode faltar nos jogos guardados
+SQL_SELECT_PAIR_UNCOVERED = '''
+    SELECT f.league_id, f.season FROM fixtures f
+    WHERE f.id IN (SELECT id FROM fixtures WHERE home_id IN (?, ?)
+                   UNION SELECT id FROM fixtures WHERE away_id IN (?, ?))
+      AND f.season >= ?
+      AND NOT EXISTS (SELECT 1 FROM store_coverage c WHERE c.dataset = 'fixtures' AND c.league_id = f.league_id
+                      AND c.season = f.season AND c.expires_at > ?)
+    LIMIT 1
+'''
+SQL_SELECT_NEWEST_SEASON = '''
+    SELECT MAX(season) FROM fixtures WHERE home_id IN (?, ?) OR away_id IN (?, ?)
+'''
+
+# Versão do esquema: ao subir, as respostas em cache voltam a ser ingeridas (ex: tabelas novas)
+STORE_VERSION = 2
+
+# Parâmetros de /fixtures que filtram a época (com eles a resposta não é o calendário completo)
+FIXTURE_FILTERS = ('team', 'last', 'next', 'date', 'from', 'to', 'live', 'round', 'status', 'id', 'ids')
+# Parâmetros de /standings que filtram a tabela (ex: só a linha de uma equipa)
+STANDINGS_FILTERS = ('team',)
+
+
+def _int(value) -> Optional[int]:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _pair(team1_id, team2_id) -> str:
+    low, high = sorted((int(team1_id), int(team2_id)))
+    return f'{low}-{high}'
+
+
+def _dumps(item) -> str:
+    return json.dumps(item, ensure_ascii=False, separators=(',', ':'))
+
+
+class LocalStore:
+    """
+    Dados normalizados (jogos, equipas, classificações, marcadores) extraídos das respostas da API,
+    para responder localmente a perguntas que não batem exatamente num pedido em cache
+    """
+
+    def __init__(self, db: SQLitePool):
+        self.db = db
+        with self.db.connection() as conn:
+            for ddl in SCHEMA:
+                conn.execute(ddl)
+        self.hits = 0
+        self.misses = 0
+
+    def ingest(self, endpoint: str, params: Dict, data: Dict, expires_at: float) -> int:
+        """
+        Normalizar uma resposta da API; devolve o número de linhas guardadas
+        """
+        items = (data or {}).get('response')
+        if not items or not isinstance(items, list):
+            return 0
+        endpoint = endpoint.strip('/')
+        params = params or {}
+        handler = {
+            'fixtures': self._ingest_fixtures,
+            'fixtures/headtohead': self._ingest_fixtures,
+            'standings': self._ingest_standings,
+            'teams': self._ingest_teams,
+            'players/topscorers': self._ingest_top_scorers
+        }.get(endpoint)
+        if handler is None:
+            return 0
+        with self.db.connection() as conn:
+            return handler(conn, endpoint, params, items, expires_at)
+
+    def _ingest_fixtures(self, conn, endpoint: str, params: Dict, items: List[Dict], expires_at: float) -> int:
+        now = time.time()
+        for item in items:
+            fixture, league, teams, goals = item['fixture'], item['league'], item['teams'], item.get('goals') or {}
+            conn.execute(SQL_UPSERT_FIXTURE, (
+                fixture['id'], league.get('id'), league.get('season'), fixture.get('date'), fixture.get('timestamp'),
+                (fixture.get('status') or {}).get('short'), teams['home']['id'], teams['away']['id'],
+                goals.get('home'), goals.get('away'), _dumps(item), now
+            ))
+            for side in ('home', 'away'):
+                conn.execute(SQL_UPSERT_TEAM_REF, (teams[side]['id'], teams[side]['name'], teams[side].get('logo'), now))
+        league_id, season = _int(params.get('league')), _int(params.get('season'))
+        if endpoint == 'fixtures' and league_id and season and not any(k in params for k in FIXTURE_FILTERS):
+            conn.execute(SQL_UPSERT_COVERAGE, ('fixtures', league_id, season, None, expires_at, now))
+        if endpoint == 'fixtures/headtohead' and params.get('h2h') and not any(k in params for k in FIXTURE_FILTERS):
+            try:
+                pair = _pair(*str(params['h2h']).split('-'))
+            except (TypeError, ValueError):
+                pair = None
+            if pair:
+                conn.execute('INSERT OR REPLACE INTO h2h_coverage (pair, expires_at, updated_at) VALUES (?, ?, ?)',
+                             (pair, expires_at, now))
+        return len(items)
+
+    def _ingest_standings(self, conn, endpoint: str, params: Dict, items: List[Dict], expires_at: float) -> int:
+        now = time.time()
+        count = 0
+        # Só uma tabela completa substitui a guardada e fica marcada como coberta; as parciais só atualizam linhas
+        complete = not any(k in params for k in STANDINGS_FILTERS)
+        for item in items:
+            league = item['league']
+            league_id, season = league['id'], league['season']
+            if complete:
+                conn.execute('DELETE FROM standings_rows WHERE league_id = ? AND season = ?', (league_id, season))
+            for group_idx, group in enumerate(league.get('standings') or []):
+                for row in group:
+                    team = row['team']
+                    conn.execute(SQL_INSERT_STANDING, (
+                        league_id, season, group_idx, team['id'], row.get('rank'), row.get('points'),
+                        (row.get('all') or {}).get('played'), row.get('goalsDiff'), _dumps(row)
+                    ))
+                    conn.execute(SQL_UPSERT_TEAM_REF, (team['id'], team['name'], team.get('logo'), now))
+                    count += 1
+            if complete:
+                meta = {k: v for k, v in league.items() if k != 'standings'}
+                conn.execute(SQL_UPSERT_COVERAGE, ('standings', league_id, season, _dumps(meta), expires_at, now))
+        return count
+
+    def _ingest_teams(self, conn, endpoint: str, params: Dict, items: List[Dict], expires_at: float) -> int:
+        now = time.time()
+        for item in items:
+            team, venue = item['team'], item.get('venue') or {}
+            conn.execute(SQL_UPSERT_TEAM, (
+                team['id'], team['name'], team.get('code'), team.get('country'), team.get('founded'),
+                team.get('logo'), venue.get('name'), _dumps(item), now
+            ))
+        league_id, season = _int(params.get('league')), _int(params.get('season'))
+        if league_id and season and 'search' not in params:
+            team_ids = [item['team']['id'] for item in items]
+            conn.execute(SQL_UPSERT_COVERAGE, ('teams', league_id, season, _dumps(team_ids), expires_at, now))
+        return len(items)
+
+    def _ingest_top_scorers(self, conn, endpoint: str, params: Dict, items: List[Dict], expires_at: float) -> int:
+        now = time.time()
+        league_id, season = _int(params.get('league')), _int(params.get('season'))
+        if not (league_id and season):
+            return 0
+        conn.execute('DELETE FROM player_stats WHERE league_id = ? AND season = ?', (league_id, season))
+        for position, item in enumerate(items):
+            player = item['player']
+            stats = (item.get('statistics') or [{}])[0]
+            team = stats.get('team') or {}
+            goals = stats.get('goals') or {}
+            conn.execute(SQL_INSERT_PLAYER, (
+                league_id, season, player['id'], team.get('id'), position, player.get('name'),
+                goals.get('total'), goals.get('assists'), _dumps(item)
+            ))
+            if team.get('id'):
+                conn.execute(SQL_UPSERT_TEAM_REF, (team['id'], team['name'], team.get('logo'), now))
+        conn.execute(SQL_UPSERT_COVERAGE, ('topscorers', league_id, season, None, expires_at, now))
+        return len(items)
+
+    def backfill(self, responses: Iterable[Tuple[str, Dict, Dict, float]]) -> int:
+        """
+        Ingerir respostas que já estavam no cache (uma vez por versão do armazenamento local)
+        """
+        row = self.db.fetchone("SELECT value FROM store_meta WHERE key = 'version'")
+        if row and int(row[0]) >= STORE_VERSION:
+            return 0
+        rows = 0
+        for endpoint, params, data, expires_at in responses:
+            try:
+                rows += self.ingest(endpoint, params, data, expires_at)
+            except (KeyError, TypeError) as e:
+                logger.warning(f"⚠️ Resposta de {endpoint} ignorada na ingestão: {e}")
+        self.db.execute("INSERT OR REPLACE INTO store_meta (key, value) VALUES ('version', ?)", (str(STORE_VERSION),))
+        logger.info(f"🗃️ Armazenamento local preenchido a partir do cache ({rows} linhas)")
+        return rows
+
+    def _coverage(self, dataset: str, league_id: int, season: int) -> Optional[Tuple[Optional[str]]]:
+        row = self.db.fetchone(SQL_SELECT_COVERAGE, (dataset, league_id, season, time.time()))
+        if row is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return row
+
+    def standings(self, league_id: int, season: int) -> Optional[List[Dict]]:
+        """
+        Classificação no formato da resposta de /standings, se a tabela guardada ainda for válida
+        """
+        coverage = self._coverage('standings', league_id, season)
+        if coverage is None:
+            return None
+        rows = self.db.fetchall('''
+            SELECT group_idx, payload FROM standings_rows WHERE league_id = ? AND season = ?
+            ORDER BY group_idx, rank
+        ''', (league_id, season))
+        groups: List[List[Dict]] = []
+        for group_idx, payload in rows:
+            while len(groups) <= group_idx:
+                groups.append([])
+            groups[group_idx].append(json.loads(payload))
+        league = json.loads(coverage[0]) if coverage[0] else {'id': league_id, 'season': season}
+        league['standings'] = groups
+        return [{'league': league}]
+
+    def team_standing(self, team_id: int, season: int, league_id: int = None) -> Optional[Dict]:
+        """
+        Linha de uma equipa na classificação (da liga indicada ou da primeira guardada)
+        """
+        sql = 'SELECT league_id, payload FROM standings_rows WHERE team_id = ? AND season = ?'
+        params = [team_id, season]
+        if league_id:
+            sql += ' AND league_id = ?'
+            params.append(league_id)
+        row = self.db.fetchone(sql + ' ORDER BY league_id LIMIT 1', tuple(params))
+        if row is None:
+            return None
+        return dict(json.loads(row[1]), league_id=row[0])
+
+    def top_scorers(self, league_id: int, season: int) -> Optional[List[Dict]]:
+        if self._coverage('topscorers', league_id, season) is None:
+            return None
+        rows = self.db.fetchall('''
+            SELECT payload FROM player_stats WHERE league_id = ? AND season = ? ORDER BY position
+        ''', (league_id, season))
+        return [json.loads(payload) for payload, in rows] or None
+
+    def teams_by_league(self, league_id: int, season: int) -> Optional[List[Dict]]:
+        coverage = self._coverage('teams', league_id, season)
+        if coverage is None or not coverage[0]:
+            return None
+        team_ids = json.loads(coverage[0])
+        placeholders = ','.join('?' * len(team_ids))
+        rows = dict(self.db.fetchall(f'SELECT id, payload FROM teams WHERE id IN ({placeholders}) AND payload IS NOT NULL',
+                                     tuple(team_ids)))
+        if len(rows) != len(team_ids):
+            return None
+        return [json.loads(rows[team_id]) for team_id in team_ids]
+
+    def team(self, team_id: int, max_age: float) -> Optional[Dict]:
+        """
+        Equipa no formato de /teams (team + venue), se guardada há menos de max_age segundos
+        """
+        row = self.db.fetchone('SELECT payload FROM teams WHERE id = ? AND payload IS NOT NULL AND updated_at > ?',
+                               (team_id, time.time() - max_age))
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(row[0])
+
+    def team_fixtures(self, team_id: int, league_id: int = None, season: int = None, limit: int = None,
+                      descending: bool = True) -> List[Dict]:
+        """
+        Jogos guardados de uma equipa (casa ou fora), ordenados por data
+        """
+        filters, params = '', []
+        if league_id:
+            filters += ' AND league_id = ?'
+            params.append(league_id)
+        if season:
+            filters += ' AND season = ?'
+            params.append(season)
+        order = 'DESC' if descending else 'ASC'
+        sql = f'''
+            SELECT payload FROM (
+                SELECT payload, timestamp FROM fixtures WHERE home_id = ?{filters}
+                UNION ALL
+                SELECT payload, timestamp FROM fixtures WHERE away_id = ?{filters}
+            ) ORDER BY timestamp {order}
+        '''
+        args = [team_id] + params + [team_id] + params
+        if limit:
+            sql += ' LIMIT ?'
+            args.append(limit)
+        return [json.loads(payload) for payload, in self.db.fetchall(sql, tuple(args))]
+
+    def season_fixtures(self, league_id: int, season: int) -> Optional[List[Dict]]:
+        """
+        Calendário completo guardado de uma liga/época, se ainda for válido
+        """
+        if self._coverage('fixtures', league_id, season) is None:
+            return None
+        rows = self.db.fetchall('''
+            SELECT payload FROM fixtures WHERE league_id = ? AND season = ? ORDER BY timestamp
+        ''', (league_id, season))
+        return [json.loads(payload) for payload, in rows]
+
+    def all_teams(self) -> List[Dict]:
+        """
+        Todas as equipas guardadas, no formato de /teams (só team com id/nome/logo se não houver o payload completo)
+        """
+        teams = []
+        for team_id, name, logo, payload in self.db.fetchall('SELECT id, name, logo, payload FROM teams'):
+            teams.append(json.loads(payload) if payload else {'team': {'id': team_id, 'name': name, 'logo': logo}})
+        return teams
+
+    def team_league_ids(self, team_id: int, season: int) -> List[int]:
+        """
+        Competições em que uma equipa aparece numa época (classificações e jogos guardados)
+        """
+        rows = self.db.fetchall('''
+            SELECT league_id FROM standings_rows WHERE team_id = ? AND season = ?
+            UNION
+            SELECT league_id FROM fixtures WHERE home_id = ? AND season = ?
+            UNION
+            SELECT league_id FROM fixtures WHERE away_id = ? AND season = ?
+        ''', (team_id, season, team_id, season, team_id, season))
+        return [league_id for league_id, in rows if league_id is not None]
+
+    def team_leagues(self) -> List[Tuple[int, int]]:
+        """
+        Pares (equipa, competição) de todas as classificações e jogos guardados, para o índice inverso em memória
+        """
+        return self.db.fetchall('''
+            SELECT team_id, league_id FROM standings_rows
+            UNION
+            SELECT home_id, league_id FROM fixtures
+            UNION
+            SELECT away_id, league_id FROM fixtures
+        ''')
+
+    def head_to_head(self, team1_id: int, team2_id: int, last: int = None) -> Tuple[List[Dict], bool]:
+        """
+        Confrontos diretos guardados (ordem cronológica, como a API) e se chegam para responder sem a API.
+
+        Chegam se o histórico do par foi descarregado há pouco, ou se todas as épocas desde o confronto
+        mais antigo que interessa têm o calendário completo de uma competição comum às duas equipas e
+        todas as competições em que alguma delas jogou nessas épocas (taças incluídas) estão cobertas.
+        """
+        rows = self.db.fetchall(SQL_SELECT_PAIR, (team1_id, team2_id, team2_id, team1_id))
+        meetings = rows[:last] if last else rows
+        fixtures = [json.loads(payload) for payload, _, _ in reversed(meetings)]
+        now = time.time()
+        coverage = self.db.fetchone('SELECT expires_at FROM h2h_coverage WHERE pair = ?', (_pair(team1_id, team2_id),))
+        if coverage is not None and coverage[0] > now:
+            complete = True
+        elif coverage is not None:
+            # Histórico completo até ao download; depois disso só o que chegou por calendários de liga
+            complete = self._seasons_covered(team1_id, team2_id, rows[0][1] if rows else None)
+        elif last and len(meetings) >= last:
+            complete = self._seasons_covered(team1_id, team2_id, meetings[-1][1])
+        else:
+            complete = False
+        if complete:
+            self.hits += 1
+        else:
+            self.misses += 1
+        return fixtures, complete
+
+    def _seasons_covered(self, team1_id: int, team2_id: int, since: Optional[int]) -> bool:
+        newest = self.db.fetchone(SQL_SELECT_NEWEST_SEASON, (team1_id, team2_id, team1_id, team2_id))[0]
+        if newest is None:
+            return False
+        since = newest if since is None else since
+        now = time.time()
+        covered = {season for season, in self.db.fetchall(
+            SQL_SELECT_PAIR_SEASONS, (now, team1_id, team1_id, team2_id, team2_id))}
+        if not all(season in covered for season in range(since, newest + 1)):
+            return False
+        # Uma competição sem calendário completo (ex: jogos da taça vindos de outra consulta) pode ter confrontos
+        # que não estão guardados: nesse caso vai-se à API
+        return self.db.fetchone(SQL_SELECT_PAIR_UNCOVERED,
+                                (team1_id, team2_id, team1_id, team2_id, since, now)) is None
+
+    def clear(self):
+        with self.db.connection() as conn:
+            for table in ('fixtures', 'teams', 'standings_rows', 'player_stats', 'store_coverage', 'h2h_coverage'):
+                conn.execute(f'DELETE FROM {table}')
+
+    def stats(self) -> Dict:
+        counts = {}
+        for table in ('fixtures', 'teams', 'standings_rows', 'player_stats', 'store_coverage'):
+            counts[table] = self.db.fetchone(f'SELECT COUNT(*) FROM {table}')[0]
+        total = self.hits + self.misses
+        return dict(counts, hits=self.hits, misses=self.misses,
+                    hit_rate=round(self.hits / total, 3) if total else 0.0)
@@ -0,0 +1,161 @@
+import logging
+import threading
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# tarefa: (função, nomes das tarefas de que depende); a função recebe os resultados dessas tarefas por ordem
+Task = Tuple[Callable[..., Any], Iterable[str]]
+
+
+class LookupExecutor:
+    """
+    Executa as consultas de uma resposta em paralelo num pool partilhado, respeitando dependências
+    (ex: identificar as duas equipas e só depois pedir o confronto direto). As threads do pool nunca ficam
+    à espera do rate limiter: o RateLimitExceeded (com o retry_after) volta para quem pediu. A origem das
+    respostas (cache/API) e as entradas do cache usadas nas threads do pool passam para a thread que pediu.
+
+    Um pedido nunca fica na fila atrás de outros: o que não tem nada em paralelo (uma só consulta, ou uma
+    cadeia de dependências) corre na thread de quem pediu, cada pedido usa no máximo per_request threads do
+    pool ao mesmo tempo e, com o pool todo ocupado, a consulta seguinte corre também na thread de quem pediu.
+    """
+
+    def __init__(self, manager, max_workers: int = 16, per_request: int = 4):
+        self.manager = manager
+        self.per_request = per_request
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='lookup')
+        # Threads do pool livres: sem nenhuma, não se submete (ficaria na fila à espera de outros pedidos)
+        self._slots = threading.BoundedSemaphore(max_workers)
+        self.stats = {'runs': 0, 'tasks': 0, 'inline': 0}
+
+    def _tracked(self, fn: Callable, args: tuple) -> Tuple[bool, Any, Dict, Dict]:
+        # Corre numa thread do pool: devolve (sucesso, resultado ou exceção, origem das respostas, dependências)
+        self.manager.reset_response_info()
+        with self.manager.track_dependencies() as deps:
+            try:
+                return True, fn(*args), self.manager.response_info(), deps
+            except Exception as e:
+                return False, e, self.manager.response_info(), deps
+
+    def _submit(self, fn: Callable, args: tuple) -> Optional[Future]:
+        """
+        Submeter ao pool se houver uma thread livre; None se estiverem todas ocupadas
+        """
+        if not self._slots.acquire(blocking=False):
+            return None
+        future = self._pool.submit(self._tracked, fn, args)
+        # Também chamado se a tarefa for cancelada antes de começar
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def _inline(self, fn: Callable, args: tuple) -> Tuple[bool, Any]:
+        # Na thread de quem pediu: a origem das respostas e as dependências já ficam registadas nela
+        self.stats['inline'] += 1
+        try:
+            return True, fn(*args)
+        except Exception as e:
+            return False, e
+
+    def run(self, tasks: Dict[str, Task]) -> Dict[str, Any]:
+        """
+        Corre todas as tarefas (cada uma assim que as suas dependências terminam) e devolve os resultados
+        por nome; a primeira exceção de uma tarefa é relançada depois de as que estão a correr terminarem
+        """
+        deps = {name: tuple(requires) for name, (_, requires) in tasks.items()}
+        for name, requires in deps.items():
+            unknown = set(requires) - set(tasks)
+            if unknown:
+                raise ValueError(f"Tarefa {name} depende de tarefas inexistentes: {sorted(unknown)}")
+        self.stats['runs'] += 1
+        self.stats['tasks'] += len(tasks)
+        results: Dict[str, Any] = {}
+        running = {}
+        pending = dict(tasks)
+        error = None
+        while pending or running:
+            if error is None:
+                ready = [n for n in pending if all(d in results for d in deps[n])]
+                full = False
+                # Só vale a pena uma thread do pool se houver outra consulta a correr ao mesmo tempo
+                while ready and len(running) < self.per_request and (len(ready) > 1 or running):
+                    name = ready[0]
+                    future = self._submit(pending[name][0], tuple(results[d] for d in deps[name]))
+                    if future is None:
+                        full = True
+                        break
+                    pending.pop(ready.pop(0))
+                    running[future] = name
+                if ready and (full or not running):
+                    # Nada em paralelo, ou o pool todo ocupado: a consulta seguinte corre nesta thread
+                    name = ready[0]
+                    fn, _ = pending.pop(name)
+                    ok, value = self._inline(fn, tuple(results[d] for d in deps[name]))
+                    if ok:
+                        results[name] = value
+                    else:
+                        error = value
+                    continue
+                if not running and pending:
+                    raise ValueError(f"Dependências circulares entre tarefas: {sorted(pending)}")
+            if not running:
+                break
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                ok, value, info, used = future.result()
+                # Mesmo com erro, os requests já feitos contam para a thread que pediu
+                self.manager.merge_response_info(info)
+                self.manager.merge_dependencies(used)
+                if ok:
+                    results[name] = value
+                elif error is None:
+                    error = value
+        if error is not None:
+            raise error
+        return results
+
+    def stream(self, lookups: Dict[str, Tuple[Callable, tuple]],
+               heartbeat: float = None) -> Iterator[Optional[Tuple[str, bool, Any]]]:
+        """
+        Corre consultas independentes em paralelo e devolve (nome, sucesso, resultado ou exceção) à medida que
+        terminam; None sempre que passam heartbeat segundos sem nenhuma terminar (ex: à espera do rate limiter)
+        """
+        self.stats['runs'] += 1
+        self.stats['tasks'] += len(lookups)
+        queue = list(lookups.items())
+        running = {}
+        try:
+            while queue or running:
+                full = False
+                while queue and len(running) < self.per_request and (len(queue) > 1 or running):
+                    future = self._submit(*queue[0][1])
+                    if future is None:
+                        full = True
+                        break
+                    running[future] = queue.pop(0)[0]
+                if queue and (full or not running):
+                    # Uma só consulta, ou o pool todo ocupado: a seguinte corre nesta thread
+                    name, (fn, args) = queue.pop(0)
+                    yield (name,) + self._inline(fn, args)
+                    continue
+                done, _ = wait(running, timeout=heartbeat, return_when=FIRST_COMPLETED)
+                if not done:
+                    yield None
+                    continue
+                for future in done:
+                    name = running.pop(future)
+                    ok, value, info, used = future.result()
+                    self.manager.merge_response_info(info)
+                    self.manager.merge_dependencies(used)
+                    yield name, ok, value
+        finally:
+            # Quem pediu desistiu (ex: cliente desligou): não começar as que ainda estão na fila
+            for future in running:
+                future.cancel()
+
+    def get_stats(self) -> Dict:
+        return dict(self.stats)
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False)
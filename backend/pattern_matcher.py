@@ -0,0 +1,88 @@
+import re
+from collections import Counter, deque
+from typing import Dict, Hashable, List, Tuple
+
+# Caracteres que fazem de um padrão uma expressão regular (os restantes são procurados como texto literal)
+_REGEX_CHARS = set('.^$*+?{}[]\\|()')
+
+
+class PatternMatcher:
+    """
+    Autómato de Aho-Corasick: todos os padrões literais procurados numa única passagem pelo texto,
+    com a mesma contagem de um re.findall por padrão (exceto padrões que se sobrepõem a si próprios, ex: "aa")
+    mas sem percorrer o texto uma vez por padrão.
+    Os poucos padrões com sintaxe de regex são compilados uma vez e testados à parte.
+    """
+
+    def __init__(self):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._own: List[List[Hashable]] = [[]]
+        self._out: List[List[Hashable]] = [[]]
+        self._regexes: List[Tuple[re.Pattern, Hashable]] = []
+        self._built = True
+
+    def add(self, pattern: str, label: Hashable):
+        """
+        Associar um padrão a uma etiqueta; o mesmo padrão pode ter várias (ou a mesma mais do que uma vez)
+        """
+        if not pattern:
+            return
+        if _REGEX_CHARS & set(pattern):
+            self._regexes.append((re.compile(pattern), label))
+            return
+        state = 0
+        for char in pattern:
+            nxt = self._goto[state].get(char)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][char] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._own.append([])
+            state = nxt
+        self._own[state].append(label)
+        self._built = False
+
+    def _build(self):
+        # Ligações de falha em largura: cada estado herda as etiquetas do maior sufixo que também é prefixo
+        out = [list(labels) for labels in self._own]
+        queue = deque()
+        for state in self._goto[0].values():
+            self._fail[state] = 0
+            queue.append(state)
+        while queue:
+            state = queue.popleft()
+            for char, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(char, 0)
+                out[nxt] += out[self._fail[nxt]]
+        self._out = out
+        self._built = True
+
+    def scan(self, text: str) -> Counter:
+        """
+        Contagem de ocorrências por etiqueta no texto
+        """
+        if not self._built:
+            self._build()
+        goto, fail, out = self._goto, self._fail, self._out
+        hits = Counter()
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if out[state]:
+                hits.update(out[state])
+        for regex, label in self._regexes:
+            count = len(regex.findall(text))
+            if count:
+                hits[label] += count
+        return hits
+
+    def __len__(self) -> int:
+        return len(self._goto) - 1
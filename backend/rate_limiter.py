@@ -0,0 +1,142 @@
+import time
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Dict
+
+from db_pool import SQLitePool
+
+logger = logging.getLogger(__name__)
+
+SQL_SELECT_BUCKET = 'SELECT tokens, updated_at, day, used FROM rate_limit WHERE name = ?'
+SQL_UPSERT_BUCKET = '''
+    INSERT INTO rate_limit (name, tokens, updated_at, day, used) VALUES (?, ?, ?, ?, ?)
+    ON CONFLICT(name) DO UPDATE SET
+        tokens = excluded.tokens,
+        updated_at = excluded.updated_at,
+        day = excluded.day,
+        used = excluded.used
+'''
+
+
+class RateLimitExceeded(Exception):
+    """
+    Pedido à API adiado pelo rate limiter; retry_after em segundos
+    """
+
+    def __init__(self, retry_after: float, reason: str = 'rate'):
+        self.retry_after = max(0.0, retry_after)
+        self.reason = reason
+        if reason == 'quota':
+            message = f"Limite diário de requests atingido. Tenta novamente dentro de {self.retry_after / 3600:.1f}h."
+        else:
+            message = f"Demasiados requests à API. Tenta novamente dentro de {self.retry_after:.1f}s."
+        super().__init__(message)
+
+
+class RateLimitDecision:
+    def __init__(self, allowed: bool, retry_after: float = 0.0, reason: str = 'ok'):
+        self.allowed = allowed
+        self.retry_after = retry_after
+        self.reason = reason
+
+    def raise_if_denied(self):
+        if not self.allowed:
+            raise RateLimitExceeded(self.retry_after, self.reason)
+
+
+def _utc_day(now: float) -> str:
+    return datetime.fromtimestamp(now, timezone.utc).strftime('%Y-%m-%d')
+
+
+def _seconds_to_next_utc_day(now: float) -> float:
+    current = datetime.fromtimestamp(now, timezone.utc)
+    midnight = (current + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+    return (midnight - current).total_seconds()
+
+
+class RateLimiter:
+    """
+    Token bucket guardado no SQLite, partilhado por threads e processos, com quota diária (reinicia às 00:00 UTC)
+    """
+
+    def __init__(self, db: SQLitePool, name: str = 'api-sports', requests_per_minute: float = 30,
+                 burst: int = 5, daily_quota: int = 100):
+        self.db = db
+        self.name = name
+        self.rate = requests_per_minute / 60.0  # tokens por segundo
+        self.capacity = burst
+        self.daily_quota = daily_quota
+        self.db.execute('''
+            CREATE TABLE IF NOT EXISTS rate_limit (
+                name TEXT PRIMARY KEY,
+                tokens REAL NOT NULL,
+                updated_at REAL NOT NULL,
+                day TEXT NOT NULL,
+                used INTEGER NOT NULL DEFAULT 0
+            )
+        ''')
+
+    def _load(self, conn, now: float):
+        row = conn.execute(SQL_SELECT_BUCKET, (self.name,)).fetchone()
+        today = _utc_day(now)
+        if row is None:
+            return float(self.capacity), today, 0
+        tokens, updated_at, day, used = row
+        tokens = min(self.capacity, tokens + max(0.0, now - updated_at) * self.rate)
+        if day != today:
+            used = 0
+        return tokens, today, used
+
+    def try_acquire(self, cost: int = 1) -> RateLimitDecision:
+        """
+        Consumir tokens sem bloquear: devolve logo a decisão e, se negado, quanto esperar
+        """
+        now = time.time()
+        with self.db.connection() as conn:
+            # BEGIN IMMEDIATE garante leitura-escrita atómica entre processos
+            if not conn.in_transaction:
+                conn.execute('BEGIN IMMEDIATE')
+            tokens, day, used = self._load(conn, now)
+            if used + cost > self.daily_quota:
+                decision = RateLimitDecision(False, _seconds_to_next_utc_day(now), 'quota')
+            elif tokens < cost:
+                decision = RateLimitDecision(False, (cost - tokens) / self.rate, 'rate')
+            else:
+                tokens -= cost
+                used += cost
+                decision = RateLimitDecision(True)
+            conn.execute(SQL_UPSERT_BUCKET, (self.name, tokens, now, day, used))
+        if not decision.allowed:
+            logger.warning(f"⏳ Request adiado ({decision.reason}): tentar de novo em {decision.retry_after:.1f}s")
+        return decision
+
+    def exhaust_quota(self):
+        """
+        Marcar a quota de hoje como esgotada (ex: a API respondeu que o limite foi atingido)
+        """
+        now = time.time()
+        with self.db.connection() as conn:
+            if not conn.in_transaction:
+                conn.execute('BEGIN IMMEDIATE')
+            tokens, day, _ = self._load(conn, now)
+            conn.execute(SQL_UPSERT_BUCKET, (self.name, tokens, now, day, self.daily_quota))
+
+    def used_today(self) -> int:
+        row = self.db.fetchone(SQL_SELECT_BUCKET, (self.name,))
+        if row is None or row[2] != _utc_day(time.time()):
+            return 0
+        return row[3]
+
+    def status(self) -> Dict:
+        now = time.time()
+        with self.db.connection() as conn:
+            tokens, day, used = self._load(conn, now)
+        return {
+            'tokens': round(tokens, 2),
+            'capacity': self.capacity,
+            'requests_per_minute': self.rate * 60,
+            'used_today': used,
+            'daily_quota': self.daily_quota,
+            'remaining_today': max(0, self.daily_quota - used),
+            'quota_resets_in': round(_seconds_to_next_utc_day(now))
+        }
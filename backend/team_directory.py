@@ -0,0 +1,261 @@
+import threading
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional, Set
+
+from fuzzy_match import FuzzyMatcher, normalize
+
+# Palavras que não identificam equipas (artigos, preposições, "fc"...)
+STOPWORDS = {'o', 'a', 'os', 'as', 'do', 'da', 'dos', 'das', 'de', 'e', 'the', 'of', 'fc', 'cf', 'sc', 'club',
+             'clube', 'futebol', 'football', 'team', 'equipa'}
+# Equipas B, sub-X e femininas só aparecem à frente se forem pedidas explicitamente
+RESERVE_TOKENS = {'b', 'ii', 'w', 'u17', 'u18', 'u19', 'u20', 'u21', 'u23'}
+MIN_PREFIX = 3
+MAX_NGRAM = 4
+# Em texto livre, só palavras com pelo menos este tamanho e quase iguais a um alias contam como equipa
+FUZZY_MIN_WORD = 5
+FUZZY_TEXT_SCORE = 0.8
+# Palavras que separam as equipas numa pergunta ("benfica vs porto", "entre benfica e porto")
+SEPARATORS = {'vs', 'v', 'versus', 'contra', 'x', 'e', 'ou', 'and', 'or', 'entre', 'between', 'frente', 'against'}
+# Palavras de pergunta à volta dos nomes das equipas (nunca chegam a ser pesquisadas na API)
+FILLER = {'historico', 'confronto', 'confrontos', 'direto', 'diretos', 'jogo', 'jogos', 'ultimo', 'ultimos',
+          'ultimas', 'anos', 'epoca', 'epocas', 'temporada', 'temporadas', 'nos', 'nas', 'no', 'na', 'em', 'quem',
+          'qual', 'quantos', 'quantas', 'ganhou', 'ganha', 'mais', 'vezes', 'resultados', 'resultado', 'face', 'h2h',
+          'head', 'to', 'history', 'record', 'last', 'years', 'games', 'matches', 'who', 'won', 'most',
+          'previous', 'past', 'meetings', 'encounters', 'compare', 'comparison', 'mostra', 'mostrar', 'ver', 'me',
+          'classico', 'derby', 'derbi', 'hoje', 'amanha', 'in', 'at', 'for', 'com', 'para', 'sobre'}
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in normalize(text).split() if t not in STOPWORDS]
+
+
+def team_spans(text: str) -> List[str]:
+    """
+    Partes de um texto livre que podem ser nomes de equipas: separadas por "vs", "contra", "e"... e sem
+    palavras de pergunta nas pontas ("histórico entre benfica e porto nos últimos anos" -> benfica, porto)
+    """
+    spans, current = [], []
+    for word in normalize(text).split() + ['vs']:
+        if word not in SEPARATORS:
+            current.append(word)
+            continue
+        while current and (current[0] in FILLER or current[0] in STOPWORDS):
+            current.pop(0)
+        while current and (current[-1] in FILLER or current[-1] in STOPWORDS):
+            current.pop()
+        if current:
+            spans.append(' '.join(current))
+        current = []
+    return spans
+
+
+class TeamDirectory:
+    """
+    Diretório local de equipas (nomes da API e aliases das equipas populares) com índices exato, por token
+    e por prefixo; substitui o teams?search= da API na identificação de equipas
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.teams: Dict[int, Dict] = {}          # team_id -> item no formato de /teams ({'team', 'venue'})
+        self.popular: Set[int] = set()
+        self.aliases: Dict[str, int] = {}         # nome/alias normalizado -> team_id
+        self.names: Dict[int, Set[str]] = {}      # team_id -> nomes/aliases normalizados
+        self.leagues: Dict[int, List[int]] = {}   # team_id -> competições em que aparece (a principal primeiro)
+        self.tokens: Dict[str, Set[int]] = {}     # token -> equipas
+        self._sorted_tokens: List[str] = []
+        self._dirty = False
+        # Erros de escrita ("benfika", "familicão"): trigramas + distância de edição sobre todos os aliases
+        self.fuzzy = FuzzyMatcher()
+
+    def add_team(self, team: Dict, venue: Dict = None, aliases: Iterable[str] = (), popular: bool = False,
+                 league_id: int = None):
+        """
+        Registar (ou completar) uma equipa; o nome da API e os aliases entram nos índices
+        """
+        team_id = team.get('id')
+        name = team.get('name')
+        if not team_id or not name:
+            return
+        with self._lock:
+            current = self.teams.get(team_id)
+            if current is None or len(team) >= len(current['team']):
+                self.teams[team_id] = {'team': dict(team), 'venue': venue if venue is not None else
+                                       (current or {}).get('venue')}
+            if popular:
+                self.popular.add(team_id)
+            for alias in (name, *aliases):
+                self._index(alias, team_id)
+            if league_id:
+                self._add_league(team_id, league_id, primary=popular)
+
+    def add_league(self, team_id: int, league_id: int, primary: bool = False):
+        """
+        Associar uma equipa a uma competição (primary: passa a ser a primeira da lista)
+        """
+        if team_id and league_id:
+            with self._lock:
+                self._add_league(team_id, league_id, primary)
+
+    def _add_league(self, team_id: int, league_id: int, primary: bool):
+        leagues = self.leagues.setdefault(team_id, [])
+        if league_id in leagues:
+            if not primary or leagues[0] == league_id:
+                return
+            leagues.remove(league_id)
+        if primary:
+            leagues.insert(0, league_id)
+        else:
+            leagues.append(league_id)
+
+    def _index(self, alias: str, team_id: int):
+        key = normalize(alias)
+        if not key:
+            return
+        # Um alias popular (ex: "porto") não é roubado por outra equipa com o mesmo nome
+        if key not in self.aliases or team_id in self.popular:
+            self.aliases[key] = team_id
+        self.names.setdefault(team_id, set()).add(key)
+        self.fuzzy.add(key, self.aliases[key], replace=True)
+        for token in tokenize(alias):
+            ids = self.tokens.setdefault(token, set())
+            if team_id not in ids:
+                ids.add(team_id)
+                self._dirty = True
+
+    def add_items(self, items: Iterable[Dict], league_id: int = None):
+        """
+        Itens de respostas da API que contêm equipas (/teams, classificações, jogos); league_id é a competição
+        do pedido quando os itens não a trazem (ex: teams?league=)
+        """
+        for item in items:
+            league = item.get('league') if isinstance(item.get('league'), dict) else {}
+            item_league_id = league.get('id') or league_id
+            if 'team' in item and isinstance(item['team'], dict):
+                self.add_team(item['team'], item.get('venue'), league_id=item_league_id)
+            for row in league.get('standings') or []:
+                for standing in row:
+                    self.add_team(standing['team'], league_id=item_league_id)
+            for side in ('home', 'away'):
+                team = (item.get('teams') or {}).get(side)
+                if team:
+                    self.add_team({k: v for k, v in team.items() if k != 'winner'}, league_id=item_league_id)
+
+    def _prefix_tokens(self, prefix: str) -> List[str]:
+        if self._dirty:
+            with self._lock:
+                self._sorted_tokens = sorted(self.tokens)
+                self._dirty = False
+        tokens = self._sorted_tokens
+        start = bisect_left(tokens, prefix)
+        matches = []
+        for token in tokens[start:]:
+            if not token.startswith(prefix):
+                break
+            matches.append(token)
+        return matches
+
+    def _candidates(self, token: str) -> Set[int]:
+        ids = set(self.tokens.get(token, ()))
+        if len(token) >= MIN_PREFIX:
+            for match in self._prefix_tokens(token):
+                ids |= self.tokens[match]
+        return ids
+
+    def _rank(self, ids: Iterable[int], query: str) -> List[int]:
+        def score(team_id):
+            name = normalize(self.teams[team_id]['team']['name'])
+            reserve = bool(RESERVE_TOKENS & set(name.split()) - set(query.split()))
+            return (team_id not in self.popular, name != query, reserve, not name.startswith(query), len(name))
+        return sorted(ids, key=score)
+
+    def _fuzzy_best(self, query: str, min_score: float = None) -> Optional[int]:
+        matches = self.fuzzy.matches(query, min_score=min_score)
+        if not matches:
+            return None
+        # Com o mesmo score, as equipas populares ganham
+        return max(matches, key=lambda m: (m[1], m[0] in self.popular))[0]
+
+    def search(self, query: str, limit: int = 10, fuzzy: bool = True) -> List[Dict]:
+        """
+        Equipas cujo nome/alias é a pesquisa, ou cujos tokens começam pelos termos pesquisados (todos);
+        sem resultados, o alias mais parecido (acentos e erros de escrita)
+        """
+        key = normalize(query)
+        if not key:
+            return []
+        exact = self.aliases.get(key)
+        if exact is not None:
+            return [self.teams[exact]]
+        terms = tokenize(query)
+        if not terms:
+            return []
+        ids = self._candidates(terms[0])
+        for term in terms[1:]:
+            ids &= self._candidates(term)
+            if not ids:
+                break
+        if not ids and fuzzy:
+            team_id = self._fuzzy_best(key)
+            return [self.teams[team_id]] if team_id is not None else []
+        return [self.teams[team_id] for team_id in self._rank(ids, key)[:limit]]
+
+    def find_in_text(self, text: str, fuzzy: bool = True) -> List[int]:
+        """
+        Equipas mencionadas num texto livre (n-gramas de até MAX_NGRAM palavras iguais a um nome ou alias),
+        pela ordem em que aparecem; os n-gramas mais longos têm prioridade.
+        Sem nenhuma correspondência exata, tenta palavras e pares de palavras quase iguais a um alias.
+        """
+        words = normalize(text).split()
+        found = self._find_exact(words)
+        if found or not fuzzy:
+            return found
+        i = 0
+        while i < len(words):
+            for size in (2, 1):
+                span = words[i:i + size]
+                if len(span) < size or any(w in STOPWORDS for w in span) or len(span[-1]) < FUZZY_MIN_WORD:
+                    continue
+                team_id = self._fuzzy_best(' '.join(span), FUZZY_TEXT_SCORE)
+                if team_id is not None:
+                    if team_id not in found:
+                        found.append(team_id)
+                    i += size
+                    break
+            else:
+                i += 1
+        return found
+
+    def _find_exact(self, words: List[str]) -> List[int]:
+        found: List[int] = []
+        i = 0
+        while i < len(words):
+            for size in range(min(MAX_NGRAM, len(words) - i), 0, -1):
+                gram = ' '.join(words[i:i + size])
+                if size == 1 and gram in STOPWORDS:
+                    continue
+                team_id = self.aliases.get(gram)
+                if team_id is not None:
+                    if team_id not in found:
+                        found.append(team_id)
+                    i += size
+                    break
+            else:
+                i += 1
+        return found
+
+    def get(self, team_id: int) -> Optional[Dict]:
+        return self.teams.get(team_id)
+
+    def team_id(self, alias: str) -> Optional[int]:
+        return self.aliases.get(normalize(alias))
+
+    def names_of(self, team_id: int) -> Set[str]:
+        return self.names.get(team_id, set())
+
+    def leagues_of(self, team_id: int) -> List[int]:
+        return self.leagues.get(team_id, [])
+
+    def stats(self) -> Dict:
+        return {'teams': len(self.teams), 'aliases': len(self.aliases), 'tokens': len(self.tokens),
+                'popular': len(self.popular), 'with_league': len(self.leagues)}
@@ -0,0 +1,169 @@
+import os
+import sys
+import json
+import threading
+import functools
+import importlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+# Os módulos do backend importam-se uns aos outros pelo nome (python app.py corre a partir de backend/)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import football_manager  # noqa: E402
+from db_pool import SQLitePool  # noqa: E402
+from football_manager import FootballDataManager  # noqa: E402
+from local_store import LocalStore  # noqa: E402
+from rate_limiter import RateLimiter  # noqa: E402
+
+
+class FakeResponse:
+    def __init__(self, payload: dict, status_code: int = 200):
+        self.payload = payload
+        self.status_code = status_code
+        self.text = json.dumps(payload)
+
+    def json(self):
+        return self.payload
+
+
+class FakeApi:
+    """
+    API-Sports falsa: respostas por endpoint (dict ou função dos params) e registo de cada chamada
+    """
+
+    def __init__(self):
+        self.responses = {}
+        self.calls = []
+
+    def get(self, url, params=None, timeout=None):
+        endpoint = url.split('v3.football.api-sports.io/', 1)[1]
+        self.calls.append((endpoint, dict(params or {})))
+        payload = self.responses.get(endpoint)
+        if callable(payload):
+            payload = payload(params or {})
+        if payload is None:
+            payload = {'errors': [], 'results': 0, 'response': []}
+        timing = {'connect_ms': 0, 'ttfb_ms': 0, 'total_ms': 0, 'reused': True}
+        return FakeResponse(payload), timing
+
+    def endpoints(self):
+        return [endpoint for endpoint, _ in self.calls]
+
+
+def standings_payload(league_id: int = 94, season: int = 2023, teams=None) -> dict:
+    teams = teams or [(211, 'Benfica'), (212, 'FC Porto'), (228, 'Sporting CP')]
+    table = [{'rank': rank, 'team': {'id': team_id, 'name': name, 'logo': ''}, 'points': 90 - 10 * rank,
+              'goalsDiff': 10 - rank, 'form': 'WWDLW',
+              'all': {'played': 34, 'win': 20, 'draw': 5, 'lose': 9, 'goals': {'for': 60, 'against': 30}}}
+             for rank, (team_id, name) in enumerate(teams, start=1)]
+    league = {'id': league_id, 'name': 'Primeira Liga', 'country': 'Portugal', 'logo': '', 'flag': '',
+              'season': season, 'standings': [table]}
+    return {'errors': [], 'results': 1, 'response': [{'league': league}]}
+
+
+def fixture(fixture_id: int, home: int, away: int, league_id: int = 94, season: int = 2023,
+            timestamp: int = 1700000000, status: str = 'FT') -> dict:
+    return {
+        'fixture': {'id': fixture_id, 'date': f'2023-11-{fixture_id % 28 + 1:02d}T20:00:00+00:00',
+                    'timestamp': timestamp, 'status': {'long': '', 'short': status, 'elapsed': 90}},
+        'league': {'id': league_id, 'name': f'League {league_id}', 'season': season},
+        'teams': {'home': {'id': home, 'name': f'Team {home}', 'logo': ''},
+                  'away': {'id': away, 'name': f'Team {away}', 'logo': ''}},
+        'goals': {'home': 1, 'away': 0}
+    }
+
+
+@pytest.fixture
+def api():
+    return FakeApi()
+
+
+@pytest.fixture
+def manager(tmp_path, api):
+    """
+    Data manager com base de dados temporária (nunca o api_cache.db), API falsa e rate limit folgado
+    """
+    manager = FootballDataManager('test-key', db_path=str(tmp_path / 'cache.db'), live_poll_interval=0)
+    manager.http = api
+    manager.rate_limiter = RateLimiter(manager.db, requests_per_minute=6000, burst=1000, daily_quota=1000)
+    yield manager
+    manager._refresh_executor.shutdown(wait=True)
+    manager.db.close_all()
+
+
+@pytest.fixture
+def store(tmp_path):
+    """
+    Armazenamento local sobre uma base de dados temporária
+    """
+    db = SQLitePool(str(tmp_path / 'store.db'))
+    yield LocalStore(db)
+    db.close_all()
+
+
+@pytest.fixture(scope='session')
+def app_module(tmp_path_factory):
+    """
+    A app cria o data manager ao ser importada: com a base de dados temporária e sem threads de fundo
+    """
+    db_path = str(tmp_path_factory.mktemp('app') / 'cache.db')
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setenv('APISPORTS_KEY', 'test-key')
+        patch.setenv('CACHE_WARMUP_INTERVAL', '0')
+        patch.setenv('LIVE_POLL_INTERVAL', '0')
+        patch.setattr(football_manager, 'FootballDataManager',
+                      functools.partial(football_manager.FootballDataManager, db_path=db_path))
+        module = importlib.import_module('app')
+    yield module
+    module.football_manager.db.close_all()
+
+
+@pytest.fixture
+def client(app_module, request):
+    manager = app_module.football_manager
+    manager.clear_cache()
+    app_module.chatbot.answer_cache.clear()
+    api = FakeApi()
+    api.responses['standings'] = standings_payload()
+    manager.http = api
+    # Um balde por teste: o estado do rate limiter fica guardado na base de dados
+    manager.rate_limiter = RateLimiter(manager.db, name=request.node.name, requests_per_minute=6000, burst=1000)
+    client = app_module.app.test_client()
+    client.api = api
+    return client
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        server = self.server
+        server.hits += 1
+        status = server.statuses.pop(0) if server.statuses else 200
+        body = json.dumps({'errors': [], 'response': [server.hits]}).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    """
+    API local: responde com os estados em server.statuses (um por pedido) e depois 200
+    """
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+    server.hits = 0
+    server.statuses = []
+    thread = threading.Thread(target=server.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True)
+    thread.start()
+    server.url = f'http://127.0.0.1:{server.server_address[1]}/standings'
+    yield server
+    server.shutdown()
+    server.server_close()
@@ -0,0 +1,98 @@
+import time
+
+import pytest
+
+from answer_cache import AnswerCache, parse_league_id, question_key
+from chatbot import FootballChatbot
+from conftest import standings_payload
+
+QUESTION = 'classificação da liga portugal'
+
+
+@pytest.fixture
+def chatbot(manager, api):
+    api.responses['standings'] = standings_payload()
+    return FootballChatbot('test-key', data_manager=manager)
+
+
+def test_question_key_normalization():
+    assert question_key('  Classificação   da Liga?! ') == ('classificação da liga', None)
+    assert question_key('tabela', '94') == ('tabela', 94)
+    # Os acentos contam: há padrões que só existem com acento
+    assert question_key('classificacao') != question_key('classificação')
+
+
+@pytest.mark.parametrize('value, expected', [(None, None), ('', None), (94, 94), ('94', 94)])
+def test_parse_league_id(value, expected):
+    assert parse_league_id(value) == expected
+
+
+@pytest.mark.parametrize('value', ['abc', True, [94], {'id': 94}])
+def test_parse_league_id_rejects_invalid(value):
+    with pytest.raises(ValueError):
+        parse_league_id(value)
+
+
+def test_repeated_question_is_served_from_the_answer_cache(chatbot, api):
+    first = chatbot.process_question(QUESTION)
+    assert 'Benfica' in first
+    assert chatbot.process_question('Classificação da Liga Portugal?') == first
+    stats = chatbot.answer_cache.get_stats()
+    assert stats['hits'] == 1 and stats['stores'] == 1
+    assert api.endpoints() == ['standings']
+
+
+def test_rewritten_cache_entry_invalidates_the_answer(chatbot, manager):
+    chatbot.process_question(QUESTION)
+    manager._save_request_to_db('standings', {'league': 94, 'season': 2023},
+                                standings_payload(teams=[(228, 'Sporting CP'), (211, 'Benfica')]), 200)
+    answer = chatbot.process_question(QUESTION)
+    assert answer.index('Sporting') < answer.index('Benfica')
+    assert chatbot.answer_cache.get_stats()['invalidations'] == 1
+
+
+def test_clearing_the_cache_invalidates_answers(chatbot, manager, api):
+    chatbot.process_question(QUESTION)
+    manager.clear_cache()
+    chatbot.process_question(QUESTION)
+    assert chatbot.answer_cache.get_stats()['hits'] == 0
+    assert api.endpoints() == ['standings', 'standings']
+
+
+def test_failed_answers_are_not_cached(chatbot, api):
+    api.responses['standings'] = None
+    assert chatbot.process_question(QUESTION).startswith('😔')
+    assert chatbot.answer_cache.get_stats()['stores'] == 0
+
+
+def test_answers_expire_with_their_dependencies(manager):
+    cache = AnswerCache(manager, ttl=300)
+    with manager.track_dependencies() as deps:
+        manager.track_dependency('key', time.time() + 0.05)
+    cache.put('pergunta', None, 'resposta', deps, 1.0)
+    assert cache.get('pergunta') == 'resposta'
+    time.sleep(0.06)
+    assert cache.get('pergunta') is None
+
+
+def test_answer_cache_evicts_oldest(manager):
+    cache = AnswerCache(manager, max_entries=2)
+    for question in ('a', 'b', 'c'):
+        with manager.track_dependencies() as deps:
+            pass
+        cache.put(question, None, question.upper(), deps, 1.0)
+    assert cache.get('a') is None and cache.get('c') == 'C'
+    assert cache.get_stats()['evictions'] == 1
+
+
+@pytest.mark.parametrize('method, url, body', [
+    ('post', '/api/chat', {'question': 'tabela', 'league_id': 'abc'}),
+    ('post', '/api/chat/stream', {'question': 'tabela', 'league_id': 'abc'}),
+    ('post', '/api/chat/batch', {'questions': [{'question': 'tabela', 'league_id': 'abc'}]}),
+    ('post', '/api/chat/batch', {'questions': ['tabela'], 'league_id': True}),
+])
+def test_invalid_league_id_is_rejected(client, method, url, body):
+    response = getattr(client, method)(url, json=body)
+    assert response.status_code == 400
+    assert response.json['error'] == 'league_id inválido'
+    assert client.api.calls == []
@@ -0,0 +1,61 @@
+import asyncio
+
+import pytest
+
+from async_football_manager import AsyncFootballDataManager
+from http_session import ApiSession
+from rate_limiter import RateLimiter
+
+
+@pytest.fixture
+def client(manager, server):
+    """
+    Cliente assíncrono sobre o data manager de teste, a falar com a API local
+    """
+    manager.http = ApiSession(manager.headers, retries=0)
+    manager.base_url = server.url.rsplit('/', 1)[0]
+    return AsyncFootballDataManager(manager=manager, http_retries=2, backoff_factor=0)
+
+
+def _run(client, *calls):
+    async def main():
+        async with client:
+            return await asyncio.gather(*(call() for call in calls))
+    return asyncio.run(main())
+
+
+def test_requests_share_the_manager_cache(client, server):
+    first, second = _run(client, lambda: client.get_standings(94, 2023), lambda: client.get_standings(94, 2023))
+    assert first == second == [1]
+    assert server.hits == 1
+    # A resposta ficou no cache do gestor síncrono
+    assert client.manager.get_standings(94, 2023) == [1]
+    assert server.hits == 1
+    assert client.manager.http.stats()['requests'] == 1
+
+
+def test_concurrent_misses_share_one_request(client, server):
+    results = _run(client, *[lambda: client.get_top_scorers(94, 2023)] * 4)
+    assert all(result == [1] for result in results)
+    assert server.hits == 1
+
+
+def test_retries_are_charged_to_the_rate_limiter(client, server):
+    server.statuses = [503, 500]
+    assert _run(client, lambda: client.get_standings(94, 2023)) == [[3]]
+    assert server.hits == 3
+    assert client.manager.rate_limiter.used_today() == 3
+
+
+def test_retry_denied_by_the_limiter_keeps_the_last_response(client, server):
+    client.manager.rate_limiter = RateLimiter(client.manager.db, name='async', daily_quota=1)
+    server.statuses = [503]
+    assert _run(client, lambda: client.get_standings(94, 2023)) == [None]
+    assert server.hits == 1
+
+
+def test_closed_client_falls_back_to_the_sync_session(client, server):
+    _run(client, lambda: client.get_standings(94, 2023))
+    # Sem event loop (ex: atualizações em segundo plano depois do fim do asyncio.run)
+    assert client.manager.get_standings(39, 2023) == [2]
+    assert server.hits == 2
@@ -0,0 +1,40 @@
+from cache_codec import ENCODING_JSON, ENCODING_ZLIB, decode_response, encode_response
+from cache_keys import request_key
+from conftest import standings_payload
+from football_manager import FootballDataManager
+
+
+def test_zlib_round_trip_keeps_the_raw_size():
+    data = standings_payload()
+    text, blob, raw_size = encode_response(data, ENCODING_ZLIB)
+    assert text is None and len(blob) < raw_size
+    assert decode_response(text, blob, ENCODING_ZLIB) == (data, raw_size)
+
+
+def test_json_round_trip():
+    data = {'response': ['Famalicão']}
+    text, blob, raw_size = encode_response(data, ENCODING_JSON)
+    assert blob is None
+    assert decode_response(text, blob, ENCODING_JSON) == (data, raw_size)
+
+
+def test_legacy_rows_without_encoding_are_read_as_json():
+    assert decode_response('{"response": [1]}', None, None)[0] == {'response': [1]}
+
+
+def test_text_rows_are_compressed_when_reopened_with_zlib(tmp_path, api):
+    db_path = str(tmp_path / 'cache.db')
+    params = {'league': 94, 'season': 2023}
+    manager = FootballDataManager('test-key', db_path=db_path, response_encoding=ENCODING_JSON, live_poll_interval=0)
+    manager._save_request_to_db('standings', params, standings_payload(), 200)
+    manager.db.close_all()
+
+    reopened = FootballDataManager('test-key', db_path=db_path, live_poll_interval=0)
+    try:
+        text, blob, encoding = reopened.db.fetchone(
+            'SELECT response, response_blob, encoding FROM api_requests WHERE request_key = ?',
+            (request_key('standings', params),))
+        assert (text, encoding) == (None, ENCODING_ZLIB) and blob
+        assert reopened._get_cached_db(request_key('standings', params), 'standings') == standings_payload()
+    finally:
+        reopened.db.close_all()
@@ -0,0 +1,63 @@
+import sqlite3
+
+from cache_keys import canonical_params, make_request_key, request_key
+from football_manager import FootballDataManager
+
+
+def test_numbers_and_strings_are_the_same_request():
+    assert request_key('standings', {'league': 94, 'season': 2023}) == \
+        request_key('standings', {'league': '94', 'season': '2023'})
+
+
+def test_parameter_order_does_not_matter():
+    assert request_key('fixtures', {'team': 211, 'last': 5}) == request_key('fixtures', {'last': 5, 'team': 211})
+
+
+def test_empty_params_and_none_values():
+    assert canonical_params(None) == canonical_params({}) == '{}'
+    assert canonical_params({'league': 94, 'round': None}) == canonical_params({'league': 94})
+
+
+def test_whitespace_and_slashes_are_normalized():
+    assert request_key('/teams/', {'search': ' benfica '}) == request_key('teams', {'search': 'benfica'})
+
+
+def test_json_string_params_match_dict_params():
+    key, params_json = make_request_key('standings', {'season': 2023, 'league': 94})
+    assert params_json == '{"league":"94","season":"2023"}'
+    assert make_request_key('standings', params_json)[0] == key
+
+
+def test_different_requests_have_different_keys():
+    assert request_key('standings', {'league': 94}) != request_key('standings', {'league': 39})
+    assert request_key('standings', {'league': 94}) != request_key('teams', {'league': 94})
+
+
+def test_same_request_is_stored_once(manager):
+    manager._save_request_to_db('leagues', {'country': 'Portugal', 'current': 1}, {'response': [1]}, 200)
+    manager._save_request_to_db('leagues', {'current': '1', 'country': 'Portugal'}, {'response': [2]}, 200)
+    rows = manager.db.fetchall('SELECT params FROM api_requests')
+    assert rows == [('{"country":"Portugal","current":"1"}',)]
+
+
+def test_old_databases_get_canonical_keys(tmp_path):
+    db_path = str(tmp_path / 'old.db')
+    conn = sqlite3.connect(db_path)
+    conn.execute('''CREATE TABLE api_requests (id INTEGER PRIMARY KEY AUTOINCREMENT, endpoint TEXT NOT NULL,
+                    params TEXT, response TEXT, status_code INTEGER,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)''')
+    for params, response in (('{"league": 94}', '{"response": ["antiga"]}'),
+                             ('{"league": "94"}', '{"response": ["nova"]}')):
+        conn.execute('INSERT INTO api_requests (endpoint, params, response, status_code) VALUES (?, ?, ?, 200)',
+                     ('standings', params, response))
+    conn.commit()
+    conn.close()
+
+    manager = FootballDataManager('test-key', db_path=db_path, live_poll_interval=0)
+    try:
+        rows = manager.db.fetchall('SELECT request_key, params FROM api_requests')
+        # Entradas repetidas: fica a mais recente
+        assert rows == [(request_key('standings', {'league': 94}), '{"league":"94"}')]
+        assert manager._get_cached(rows[0][0], 'standings')['response'] == ['nova']
+    finally:
+        manager.db.close_all()
@@ -0,0 +1,77 @@
+import time
+
+from cache_keys import request_key
+from cache_policy import FOREVER, HOUR, TTLPolicy, current_season
+from conftest import standings_payload
+from football_manager import FootballDataManager
+
+
+def test_rules_by_endpoint_and_params():
+    policy = TTLPolicy()
+    past = current_season() - 1
+    assert policy.lookup('fixtures', {'live': 'all'}) == (15, 45)
+    assert policy.ttl_for('standings', {'league': 94, 'season': past}) == FOREVER
+    assert policy.ttl_for('standings', {'league': 94, 'season': current_season()}) == HOUR
+    # Próximos jogos mudam mesmo numa época terminada
+    assert policy.ttl_for('fixtures', {'team': 211, 'season': past, 'next': 5}) == 10 * 60
+    assert policy.lookup('endpoint-desconhecido') == (policy.default_ttl, policy.default_max_stale)
+
+
+def test_first_matching_rule_wins():
+    policy = TTLPolicy()
+    policy.add_rule('standings', 42, max_stale=7)
+    assert policy.ttl_for('standings', {'league': 94}) == HOUR
+    policy.add_rule('/standings/', 42, first=True, max_stale=7)
+    assert policy.lookup('standings', {'league': 94}) == (42, 7)
+
+
+def test_describe_lists_base_ttls():
+    summary = TTLPolicy().describe()
+    assert summary['standings'] == HOUR
+    assert summary['fixtures'] == 30 * 60
+
+
+def _expiry(manager, endpoint, params):
+    row = manager.db.fetchone('SELECT expires_at FROM api_requests WHERE request_key = ?',
+                              (request_key(endpoint, params),))
+    return row[0] - time.time() if row else None
+
+
+def test_error_replies_are_never_cached(manager, api):
+    api.responses['players/topscorers'] = {'errors': {'plan': 'Free plans do not have access to this season.'},
+                                           'results': 0, 'response': []}
+    assert manager.get_top_scorers(135, 2023) is None
+    assert _expiry(manager, 'players/topscorers', {'league': 135, 'season': 2023}) is None
+    assert manager.get_top_scorers(135, 2023) is None
+    assert api.endpoints() == ['players/topscorers', 'players/topscorers']
+
+
+def test_empty_replies_get_the_short_ttl(manager, api):
+    params = {'team': 211, 'league': 94, 'season': 2023}
+    api.responses['teams/statistics'] = {'errors': [], 'results': 0, 'response': []}
+    manager.get_team_statistics(211, 94, 2023)
+    # Época terminada (FOREVER), mas sem resultados: só empty_ttl
+    assert 0 < _expiry(manager, 'teams/statistics', params) <= manager.ttl_policy.empty_ttl
+
+
+def test_completed_season_payloads_never_expire(manager, api):
+    api.responses['standings'] = standings_payload()
+    manager.get_standings(94, 2023)
+    assert _expiry(manager, 'standings', {'league': 94, 'season': 2023}) > FOREVER - HOUR
+
+
+def test_error_rows_already_cached_are_removed(tmp_path, manager):
+    error = {'errors': {'access': 'Your account is suspended'}, 'results': 0, 'response': []}
+    manager._save_request_to_db('standings', {'league': 94, 'season': 2023}, error, 200)
+    manager._save_request_to_db('teams', {'search': 'vs'}, {'errors': [], 'response': []}, 200, ttl=FOREVER)
+    manager._save_request_to_db('standings', {'league': 39, 'season': 2023}, standings_payload(39), 200)
+    manager.db.execute('PRAGMA user_version = 0')
+    manager.db.close_all()
+
+    reopened = FootballDataManager('test-key', db_path=manager.db_path, live_poll_interval=0)
+    try:
+        assert _expiry(reopened, 'standings', {'league': 94, 'season': 2023}) is None
+        assert _expiry(reopened, 'teams', {'search': 'vs'}) <= reopened.ttl_policy.empty_ttl
+        assert _expiry(reopened, 'standings', {'league': 39, 'season': 2023}) > FOREVER - HOUR
+    finally:
+        reopened.db.close_all()
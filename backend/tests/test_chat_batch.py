@@ -0,0 +1,61 @@
+import pytest
+
+from chat_batch import ChatBatch
+from chatbot import FootballChatbot
+from conftest import standings_payload
+
+
+@pytest.fixture
+def batch(manager, api):
+    api.responses['standings'] = standings_payload()
+    return ChatBatch(FootballChatbot('test-key', data_manager=manager), max_workers=2, max_questions=5)
+
+
+def test_repeated_questions_are_answered_once(batch, api):
+    questions = ['classificação da liga portugal', 'Classificação da Liga Portugal?', 'tabela da liga portugal']
+    result = batch.run([{'question': q, 'league_id': None} for q in questions])
+    stats = result['stats']
+    assert stats['questions'] == 3
+    assert stats['unique_questions'] == 2
+    # As duas perguntas distintas precisam da mesma classificação: uma só consulta e um só request
+    assert stats['distinct_lookups'] == 1
+    assert stats['api_calls'] == 1
+    assert api.endpoints() == ['standings']
+    responses = [r['response'] for r in result['results']]
+    assert responses[0] == responses[1]
+    assert [r['question'] for r in result['results']] == questions
+
+
+def test_questions_differing_only_in_accents_are_distinct(batch):
+    result = batch.run([{'question': 'classificação da liga portugal'},
+                        {'question': 'classificacao da liga portugal'}])
+    assert result['stats']['unique_questions'] == 2
+
+
+def test_same_question_in_other_league_is_distinct(batch):
+    result = batch.run([{'question': 'classificação', 'league_id': 94},
+                        {'question': 'classificação', 'league_id': '94'},
+                        {'question': 'classificação', 'league_id': 39}])
+    assert result['stats']['unique_questions'] == 2
+
+
+def test_batch_size_limit(batch):
+    with pytest.raises(ValueError):
+        batch.run([{'question': str(i)} for i in range(6)])
+
+
+def test_chat_and_batch(client):
+    response = client.post('/api/chat', json={'question': 'classificação da liga portugal', 'league_id': 94})
+    assert response.status_code == 200
+    assert 'Benfica' in response.json['response']
+
+    batch = client.post('/api/chat/batch', json={'questions': ['tabela da liga portugal', 'tabela da liga portugal']})
+    assert batch.status_code == 200
+    assert batch.json['stats']['unique_questions'] == 1
+    assert client.api.endpoints() == ['standings']
+
+
+def test_empty_question_is_rejected(client):
+    assert client.post('/api/chat', json={'question': ''}).status_code == 400
+    assert client.get('/api/chat/stream').status_code == 400
+    assert client.post('/api/chat/batch', json={'questions': []}).status_code == 400
@@ -0,0 +1,39 @@
+import json
+
+
+def _events(body: str):
+    events = []
+    for block in body.strip().split('\n\n'):
+        lines = dict(line.split(': ', 1) for line in block.split('\n') if not line.startswith(':'))
+        if lines:
+            events.append((lines['event'], json.loads(lines['data'])))
+    return events
+
+
+def test_chat_stream_events(client):
+    response = client.post('/api/chat/stream', json={'question': 'classificação da liga portugal'})
+    assert response.status_code == 200
+    assert response.mimetype == 'text/event-stream'
+    events = _events(response.get_data(as_text=True))
+    names = [event for event, _ in events]
+    assert names[0] == 'status' and names[-1] == 'done'
+    assert 'section' in names
+    sections = [payload['text'] for event, payload in events if event == 'section']
+    done = events[-1][1]
+    assert done['response'] == '\n\n'.join(sections)
+    assert 'Benfica' in done['response']
+
+    # A mesma pergunta outra vez vem do cache de respostas, sem ir à API
+    cached = _events(client.get('/api/chat/stream', query_string={'question': 'classificação da liga portugal'})
+                     .get_data(as_text=True))
+    assert cached[-1][1]['response'] == done['response']
+    assert client.api.endpoints() == ['standings']
+
+
+def test_rate_limited_stream_ends_with_the_message_and_is_not_cached(app_module, client):
+    app_module.football_manager.rate_limiter.exhaust_quota()
+    events = _events(client.post('/api/chat/stream', json={'question': 'classificação da liga portugal'})
+                     .get_data(as_text=True))
+    assert events[-1][0] == 'done'
+    assert events[-1][1]['response'].startswith('⏳')
+    assert app_module.chatbot.answer_cache.get('classificação da liga portugal', None) is None
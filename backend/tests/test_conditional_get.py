@@ -0,0 +1,36 @@
+def test_standings_conditional_get(client):
+    first = client.get('/api/standings/94')
+    assert first.status_code == 200
+    assert first.headers['X-Cache'] == 'MISS'
+    etag = first.headers['ETag']
+    assert first.json['standings'][0]['team']['name'] == 'Benfica'
+
+    revalidated = client.get('/api/standings/94', headers={'If-None-Match': etag})
+    assert revalidated.status_code == 304
+    assert revalidated.headers['ETag'] == etag
+    assert revalidated.data == b''
+
+    again = client.get('/api/standings/94')
+    assert again.status_code == 200 and again.headers['X-Cache'] == 'HIT'
+    assert client.api.endpoints() == ['standings']
+
+
+def test_if_modified_since(client):
+    first = client.get('/api/standings/94')
+    revalidated = client.get('/api/standings/94', headers={'If-Modified-Since': first.headers['Last-Modified']})
+    assert revalidated.status_code == 304
+    assert first.headers['Cache-Control'] == 'no-cache'
+
+
+def test_rewritten_entry_gets_a_new_etag(app_module, client):
+    etag = client.get('/api/standings/94').headers['ETag']
+    app_module.football_manager.clear_cache()
+    again = client.get('/api/standings/94', headers={'If-None-Match': etag})
+    assert again.status_code == 200 and again.headers['ETag'] != etag
+    assert client.api.endpoints() == ['standings', 'standings']
+
+
+def test_static_data_is_revalidated_without_the_api(client):
+    etag = client.get('/api/leagues').headers['ETag']
+    assert client.get('/api/leagues', headers={'If-None-Match': etag}).status_code == 304
+    assert client.api.calls == []
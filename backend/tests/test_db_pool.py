@@ -0,0 +1,113 @@
+import gc
+import sqlite3
+import threading
+
+import pytest
+
+from db_pool import SQLitePool
+
+
+@pytest.fixture
+def pool(tmp_path):
+    pool = SQLitePool(str(tmp_path / 'pool.db'), max_connections=2, max_idle=1, checkout_timeout=0.2)
+    yield pool
+    pool.close_all()
+
+
+def _in_thread(fn):
+    result = {}
+    thread = threading.Thread(target=lambda: result.setdefault('value', fn()))
+    thread.start()
+    thread.join()
+    gc.collect()
+    return result.get('value')
+
+
+def test_same_thread_reuses_connection(pool):
+    with pool.connection() as first:
+        pass
+    with pool.connection() as second:
+        pass
+    assert first is second
+    assert pool.stats()['opened'] == 1
+
+
+def test_connection_returns_to_pool_when_thread_ends(pool):
+    _in_thread(lambda: pool.fetchone('SELECT 1'))
+    stats = pool.stats()
+    assert stats['in_use'] == 0
+    assert stats['idle'] == 1
+
+    _in_thread(lambda: pool.fetchone('SELECT 1'))
+    stats = pool.stats()
+    assert stats['opened'] == 1
+    assert stats['reused'] == 1
+
+
+def test_idle_connections_above_max_idle_are_closed(pool):
+    started, release = threading.Barrier(3), threading.Event()
+
+    def worker():
+        pool.fetchone('SELECT 1')
+        started.wait()
+        release.wait()
+
+    threads = [threading.Thread(target=worker) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    started.wait()
+    assert pool.stats()['in_use'] == 2
+    release.set()
+    for thread in threads:
+        thread.join()
+    gc.collect()
+
+    stats = pool.stats()
+    assert stats['in_use'] == 0
+    assert stats['idle'] == 1
+    assert stats['open'] == 1
+    assert stats['closed'] == 1
+
+
+def test_checkout_waits_then_fails_when_pool_is_exhausted(pool):
+    started, release = threading.Barrier(3), threading.Event()
+
+    def worker():
+        pool.fetchone('SELECT 1')
+        started.wait()
+        release.wait()
+
+    threads = [threading.Thread(target=worker) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    started.wait()
+    try:
+        with pytest.raises(sqlite3.OperationalError, match='esgotado'):
+            pool.fetchone('SELECT 1')
+    finally:
+        release.set()
+        for thread in threads:
+            thread.join()
+    gc.collect()
+    # Com as ligações devolvidas a thread principal já consegue uma
+    assert pool.fetchone('SELECT 1') == (1,)
+
+
+def test_rollback_on_error(pool):
+    pool.execute('CREATE TABLE t (x INTEGER)')
+    with pytest.raises(RuntimeError):
+        with pool.connection() as conn:
+            conn.execute('INSERT INTO t VALUES (1)')
+            raise RuntimeError('falhou')
+    assert pool.fetchone('SELECT COUNT(*) FROM t') == (0,)
+
+
+def test_close_all_ignores_late_returns(pool):
+    _in_thread(lambda: pool.fetchone('SELECT 1'))
+    pool.fetchone('SELECT 1')
+    pool.close_all()
+    stats = pool.stats()
+    assert stats['open'] == 0 and stats['in_use'] == 0
+    # A ligação da thread atual foi fechada: a próxima operação abre outra
+    assert pool.fetchone('SELECT 1') == (1,)
+    assert pool.stats()['in_use'] == 1
@@ -0,0 +1,25 @@
+def _ids(teams):
+    return [team['id'] for team in teams]
+
+
+def test_both_teams_in_question_order(manager, api):
+    assert _ids(manager.extract_teams('benfica vs porto', upstream=False)) == [211, 212]
+    assert _ids(manager.extract_teams('confronto entre o FC Porto e o Sporting', upstream=False)) == [212, 228]
+    assert _ids(manager.extract_teams('águias contra dragões')) == [211, 212]
+    assert api.calls == []
+
+
+def test_unknown_side_stays_local_without_upstream(manager, api):
+    assert _ids(manager.extract_teams('benfica vs lusitano evora', upstream=False)) == [211]
+    assert api.calls == []
+
+
+def test_only_the_unknown_side_is_searched_upstream(manager, api):
+    api.responses['teams'] = {'errors': [], 'results': 1,
+                              'response': [{'team': {'id': 9548, 'name': 'Lusitano Évora'}, 'venue': {}}]}
+    assert _ids(manager.extract_teams('benfica vs lusitano evora')) == [211, 9548]
+    assert api.endpoints() == ['teams']
+    assert 'benfica' not in api.calls[0][1]['search'].lower()
+    # A equipa encontrada fica no diretório: a mesma pergunta já não vai à API
+    assert _ids(manager.extract_teams('lusitano evora contra benfica', upstream=False)) == [9548, 211]
+    assert len(api.calls) == 1
@@ -0,0 +1,78 @@
+import time
+
+from cache_policy import current_season
+from conftest import fixture
+
+NOW = 1700000000
+DAY = 86400
+
+
+def _season(league_id=94, season=2023):
+    # Jogos de 211/212/228: três terminados antes de NOW e dois por disputar depois
+    games = [(1, 211, 212, -3 * DAY, 'FT'), (2, 228, 211, -2 * DAY, 'FT'), (3, 212, 228, -DAY, 'FT'),
+             (4, 211, 228, DAY, 'NS'), (5, 212, 211, 2 * DAY, 'NS')]
+    return {'errors': [], 'results': len(games),
+            'response': [fixture(league_id * 100 + i, home, away, league_id, season, NOW + offset, status)
+                         for i, home, away, offset, status in games]}
+
+
+def _ids(fixtures):
+    return [f['fixture']['id'] % 100 for f in fixtures]
+
+
+def test_one_request_serves_every_team(manager, api):
+    api.responses['fixtures'] = lambda params: _season()
+    schedule = manager.schedule
+    assert _ids(schedule.last([94], 2023, 5, team_id=211, now=NOW)) == [2, 1]
+    assert _ids(schedule.next([94], 2023, 5, team_id=211, now=NOW)) == [4, 5]
+    assert _ids(schedule.last([94], 2023, 1, team_id=228, now=NOW)) == [3]
+    assert _ids(schedule.last([94], 2023, 10, now=NOW)) == [3, 2, 1]
+    assert api.calls == [('fixtures', {'league': 94, 'season': 2023})]
+    assert schedule.get_stats()['loads'] == 1
+
+
+def test_leagues_are_merged_newest_first(manager, api):
+    api.responses['fixtures'] = lambda params: _season(int(params['league']))
+    fixtures = manager.schedule.last([94, 96], 2023, 3, team_id=211, now=NOW)
+    assert [(f['league']['id'], f['fixture']['id'] % 100) for f in fixtures] == [(94, 2), (96, 2), (94, 1)]
+
+
+def test_window_excludes_the_end(manager, api):
+    api.responses['fixtures'] = lambda params: _season()
+    fixtures = manager.schedule.window([94], 2023, NOW - 2 * DAY, NOW + DAY)
+    assert _ids(fixtures) == [2, 3]
+
+
+def test_without_fetch_only_stored_seasons_are_used(manager, api):
+    assert manager.schedule.last([94], 2023, 5, fetch=False) is None
+    manager.store.ingest('fixtures', {'league': 94, 'season': 2023}, _season(), time.time() + 3600)
+    assert _ids(manager.schedule.last([94], 2023, 5, now=NOW, fetch=False)) == [3, 2, 1]
+    assert api.calls == []
+
+
+def test_current_season_refreshes_only_pending_windows(manager, api):
+    season = current_season()
+    today = int(time.time())
+    live = fixture(1, 211, 212, season=season, timestamp=today, status='1H')
+    api.responses['fixtures'] = lambda params: {'errors': [], 'results': 1, 'response': [live]}
+    index = manager.schedule.season(94, season)
+    assert api.endpoints() == ['fixtures']
+
+    finished = fixture(1, 211, 212, season=season, timestamp=today, status='FT')
+    api.responses['fixtures'] = lambda params: {'errors': [], 'results': 1, 'response': [finished]}
+    index.refreshed_at -= manager.schedule.refresh_interval + 1
+    manager.schedule.season(94, season)
+    assert set(api.calls[-1][1]) == {'league', 'season', 'from', 'to'}
+    assert index.fixtures[0]['fixture']['status']['short'] == 'FT'
+
+    # Já não há jogos por terminar à volta de hoje: a atualização seguinte não vai à API
+    index.refreshed_at -= manager.schedule.refresh_interval + 1
+    manager.schedule.season(94, season)
+    assert len(api.calls) == 2
+
+
+def test_recent_matches_come_from_the_season_schedule(manager, api):
+    api.responses['fixtures'] = lambda params: _season()
+    assert _ids(manager.get_recent_matches(211, last=1)) == [2]
+    assert _ids(manager.get_recent_matches(212, last=5)) == [3, 1]
+    assert api.calls == [('fixtures', {'league': 94, 'season': 2023})]
@@ -0,0 +1,47 @@
+from fuzzy_match import FuzzyMatcher, normalize
+
+
+def test_normalize_strips_accents_and_case():
+    assert normalize('  Vitória   GUIMARÃES ') == 'vitoria guimaraes'
+
+
+def test_fuzzy_exact_match_ignores_accents():
+    matcher = FuzzyMatcher()
+    matcher.add('Famalicão', 229)
+    assert matcher.match('famalicao') == (229, 1.0, 'famalicao')
+
+
+def test_fuzzy_match_tolerates_typos():
+    matcher = FuzzyMatcher()
+    for alias, team_id in (('benfica', 211), ('sporting', 228), ('porto', 212), ('barcelona', 529)):
+        matcher.add(alias, team_id)
+    value, score, alias = matcher.match('sportinh')
+    assert value == 228 and alias == 'sporting' and 0.8 <= score < 1
+    assert matcher.match('barcleona')[0] == 529
+    assert matcher.match('xyzabc') is None
+
+
+def test_fuzzy_matches_are_unique_per_value():
+    matcher = FuzzyMatcher(min_score=0.5)
+    matcher.add('manchester united', 33)
+    matcher.add('man united', 33)
+    matcher.add('manchester city', 50)
+    values = [value for value, _, _ in matcher.matches('manchester unitd')]
+    assert values[0] == 33
+    assert len(values) == len(set(values))
+
+
+def test_fuzzy_add_keeps_first_value_unless_replace():
+    matcher = FuzzyMatcher()
+    matcher.add('inter', 505)
+    matcher.add('Inter', 1)
+    assert matcher.match('inter')[0] == 505
+    matcher.add('inter', 2, replace=True)
+    assert matcher.match('inter')[0] == 2
+    assert len(matcher) == 1
+
+
+def test_manager_resolves_misspelled_names_offline(manager, api):
+    assert manager.identify_team_by_name('Benfca')[0]['team']['id'] == 211
+    assert manager.identify_league_by_name('premer league')['id'] == 39
+    assert api.calls == []
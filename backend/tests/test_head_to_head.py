@@ -0,0 +1,52 @@
+import time
+
+from conftest import fixture
+
+VALID = time.time() + 3600
+
+
+def _season(*pairs, league_id=94, season=2023):
+    return {'response': [fixture(i, home, away, league_id, season, timestamp=1700000000 + i)
+                         for i, (home, away) in enumerate(pairs, start=league_id * 1000)]}
+
+
+def test_head_to_head_from_covered_league_schedule(store):
+    store.ingest('fixtures', {'league': 94, 'season': 2023}, _season((1, 2), (2, 1), (1, 3), (3, 2)), VALID)
+    fixtures, complete = store.head_to_head(1, 2, last=2)
+    assert complete
+    assert [(f['teams']['home']['id'], f['teams']['away']['id']) for f in fixtures] == [(1, 2), (2, 1)]
+
+
+def test_head_to_head_needs_every_competition_covered(store):
+    store.ingest('fixtures', {'league': 94, 'season': 2023}, _season((1, 2), (2, 1)), VALID)
+    # Jogo da taça que chegou por uma consulta filtrada: a taça não tem calendário completo guardado
+    store.ingest('fixtures', {'team': 1, 'season': 2023}, _season((1, 3), league_id=96), VALID)
+    _, complete = store.head_to_head(1, 2, last=2)
+    assert not complete
+
+
+def test_filtered_fixtures_are_not_coverage(store):
+    store.ingest('fixtures', {'league': 94, 'season': 2023, 'team': 1}, _season((1, 2), (2, 1)), VALID)
+    _, complete = store.head_to_head(1, 2, last=2)
+    assert not complete
+
+
+def test_downloaded_head_to_head_history_is_complete(store):
+    store.ingest('fixtures/headtohead', {'h2h': '2-1'}, _season((1, 2), league_id=96, season=2019), VALID)
+    fixtures, complete = store.head_to_head(1, 2)
+    assert complete and len(fixtures) == 1
+    _, complete = store.head_to_head(1, 3)
+    assert not complete
+
+
+def test_manager_answers_locally_and_goes_upstream_when_not_covered(manager, api):
+    api.responses['fixtures'] = lambda params: _season((1, 2), (2, 1), (1, 3), (3, 2))
+    manager.get_fixtures_by_league(94, 2023)
+    assert len(manager.get_head_to_head(1, 2, last=2)) == 2
+    assert api.endpoints() == ['fixtures']
+
+    api.responses['fixtures/headtohead'] = _season((1, 5), league_id=96)
+    assert len(manager.get_head_to_head(1, 5, last=1)) == 1
+    assert api.endpoints() == ['fixtures', 'fixtures/headtohead']
+    stats = manager.get_h2h_stats()
+    assert stats['local'] == 1 and stats['upstream'] == 1
@@ -0,0 +1,46 @@
+from http_session import ApiSession
+
+
+def test_connections_are_reused_and_timed(server):
+    session = ApiSession(retries=0)
+    _, first = session.get(server.url)
+    _, second = session.get(server.url)
+    assert not first['reused'] and second['reused']
+    assert first['total_ms'] >= first['connect_ms']
+    stats = session.stats()
+    assert stats['requests'] == 2 and stats['new_connections'] == 1 and stats['reused_connections'] == 1
+
+
+def test_every_retry_is_charged(server):
+    charged = []
+    session = ApiSession(retries=2, backoff_factor=0, on_retry=lambda: charged.append(1) or True)
+    server.statuses = [503, 502]
+    response, _ = session.get(server.url)
+    assert response.status_code == 200
+    assert server.hits == 3
+    assert len(charged) == 2
+
+
+def test_retry_denied_by_the_limiter_keeps_the_last_response(server):
+    session = ApiSession(retries=2, backoff_factor=0, on_retry=lambda: False)
+    server.statuses = [503]
+    response, _ = session.get(server.url)
+    assert response.status_code == 503
+    assert server.hits == 1
+
+
+def test_client_errors_are_not_retried(server):
+    charged = []
+    session = ApiSession(retries=2, backoff_factor=0, on_retry=lambda: charged.append(1) or True)
+    server.statuses = [404]
+    response, _ = session.get(server.url)
+    assert response.status_code == 404
+    assert server.hits == 1 and charged == []
+
+
+def test_manager_counts_retries_in_the_daily_quota(manager, server):
+    manager.http = ApiSession(manager.headers, retries=2, backoff_factor=0, on_retry=manager._charge_retry)
+    manager.base_url = server.url.rsplit('/', 1)[0]
+    server.statuses = [500]
+    assert manager.get_standings(94, 2023) == [2]
+    assert manager.rate_limiter.used_today() == 2
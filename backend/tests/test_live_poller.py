@@ -0,0 +1,100 @@
+import pytest
+
+from conftest import fixture
+from live_poller import LivePoller
+from rate_limiter import RateLimiter
+
+
+def _live(*games):
+    # games: (id, golos da casa, golos fora, minuto)
+    fixtures = []
+    for fixture_id, home_goals, away_goals, elapsed in games:
+        item = fixture(fixture_id, 211, 212, status='2H')
+        item['goals'] = {'home': home_goals, 'away': away_goals}
+        item['fixture']['status']['elapsed'] = elapsed
+        fixtures.append(item)
+    return {'errors': [], 'results': len(fixtures), 'response': fixtures}
+
+
+@pytest.fixture
+def poller(manager):
+    # Cada consulta vai à API (sem os 15s de cache dos jogos ao vivo)
+    manager.ttl_policy.add_rule('fixtures', 0, first=True)
+    poller = LivePoller(manager, interval=60, reserve_quota=10)
+    yield poller
+    poller.stop()
+
+
+def test_only_changed_fixtures_are_published(poller, api):
+    api.responses['fixtures'] = _live((1, 0, 0, 50), (2, 1, 1, 60))
+    first = poller.poll_once()
+    assert first['version'] == 1 and sorted(f['id'] for f in first['changed']) == [1, 2]
+
+    assert poller.poll_once() == {'version': 1, 'changed': [], 'removed': []}
+
+    api.responses['fixtures'] = _live((1, 1, 0, 51))
+    update = poller.poll_once()
+    assert update['version'] == 2
+    assert [(f['id'], f['goals']['home']) for f in update['changed']] == [(1, 1)]
+    assert update['removed'] == [2]
+    assert [f['fixture']['id'] for f in poller.fixtures(94)] == [1]
+    assert poller.fixtures(39) == []
+    assert len(api.calls) == 3
+
+
+def test_failed_poll_keeps_the_last_state(poller, api):
+    api.responses['fixtures'] = _live((1, 0, 0, 50))
+    poller.poll_once()
+    api.responses['fixtures'] = {'errors': {'requests': 'Too many requests'}, 'results': 0, 'response': []}
+    assert poller.poll_once() is None
+    assert poller.stats['failures'] == 1
+    assert [f['fixture']['id'] for f in poller.fixtures()] == [1]
+
+
+def test_subscribers_get_the_snapshot_then_the_changes(poller, api):
+    api.responses['fixtures'] = _live((1, 0, 0, 50))
+    poller.poll_once()
+    subscriber, snapshot = poller.subscribe()
+    assert snapshot['version'] == 1 and [f['id'] for f in snapshot['fixtures']] == [1]
+
+    api.responses['fixtures'] = _live((1, 0, 1, 55))
+    poller.poll_once()
+    assert subscriber.get_nowait()['changed'][0]['goals'] == {'home': 0, 'away': 1}
+    poller.unsubscribe(subscriber)
+    assert not poller.subscribed(subscriber)
+
+
+def test_slow_subscribers_are_dropped(poller, api):
+    poller.queue_size = 1
+    subscriber, _ = poller.subscribe()
+    for minute in (1, 2):
+        api.responses['fixtures'] = _live((1, 0, 0, minute))
+        poller.poll_once()
+    assert not poller.subscribed(subscriber)
+    assert poller.stats['dropped_subscribers'] == 1
+
+
+def test_schedule_spreads_the_remaining_quota(poller, manager):
+    manager.rate_limiter = RateLimiter(manager.db, name='live', requests_per_minute=6000, burst=1000,
+                                       daily_quota=210)
+    allowed, delay = poller._schedule()
+    # (210 - 10 de reserva) * 0.5 = 100 consultas até ao reset
+    resets_in = manager.rate_limiter.status()['quota_resets_in']
+    assert allowed and delay == pytest.approx(max(60, resets_in / 100), rel=0.01)
+
+    manager.rate_limiter = RateLimiter(manager.db, name='live-low', daily_quota=11)
+    allowed, delay = poller._schedule()
+    assert not allowed and delay > 0
+
+
+def test_requests_are_served_from_the_poller(poller, api, monkeypatch):
+    assert poller.fixtures_for_request() is None
+    api.responses['fixtures'] = _live((1, 0, 0, 50))
+    # Como se a thread do poller estivesse a correr (sem as consultas dela)
+    monkeypatch.setattr(LivePoller, 'running', property(lambda self: True))
+    assert [f['fixture']['id'] for f in poller.fixtures_for_request(94)] == [1]
+    # Com estado em memória, os pedidos seguintes não vão à API
+    poller.fixtures_for_request()
+    poller.fixtures_for_request(94)
+    assert len(api.calls) == 1
+    assert poller.last_demand > 0
@@ -0,0 +1,64 @@
+import time
+
+from conftest import standings_payload
+
+VALID = time.time() + 3600
+
+
+def test_complete_standings_are_served(store):
+    store.ingest('standings', {'league': 94, 'season': 2023}, standings_payload(), VALID)
+    table = store.standings(94, 2023)[0]['league']['standings'][0]
+    assert [row['team']['id'] for row in table] == [211, 212, 228]
+    assert store.team_standing(212, 2023)['rank'] == 2
+
+
+def test_partial_standings_do_not_replace_the_table(store):
+    store.ingest('standings', {'league': 94, 'season': 2023}, standings_payload(), VALID)
+    store.ingest('standings', {'league': 94, 'season': 2023, 'team': 211},
+                 standings_payload(teams=[(211, 'Benfica')]), VALID)
+    table = store.standings(94, 2023)[0]['league']['standings'][0]
+    assert len(table) == 3
+
+
+def test_partial_standings_alone_are_not_coverage(store):
+    store.ingest('standings', {'league': 94, 'season': 2023, 'team': 211},
+                 standings_payload(teams=[(211, 'Benfica')]), VALID)
+    assert store.standings(94, 2023) is None
+
+
+def test_expired_coverage_is_not_served(store):
+    store.ingest('standings', {'league': 94, 'season': 2023}, standings_payload(), time.time() - 1)
+    assert store.standings(94, 2023) is None
+
+
+def _scorer(player_id, goals, team_id=211):
+    return {'player': {'id': player_id, 'name': f'Player {player_id}'},
+            'statistics': [{'team': {'id': team_id, 'name': 'Benfica', 'logo': ''}, 'goals': {'total': goals}}]}
+
+
+def test_top_scorers_keep_the_api_order(store):
+    payload = {'response': [_scorer(9, 30), _scorer(7, 25), _scorer(10, 25)]}
+    store.ingest('players/topscorers', {'league': 94, 'season': 2023}, payload, VALID)
+    assert [item['player']['id'] for item in store.top_scorers(94, 2023)] == [9, 7, 10]
+    assert store.top_scorers(39, 2023) is None
+
+
+def test_backfill_runs_once_per_store_version(store):
+    responses = [('standings', {'league': 94, 'season': 2023}, standings_payload(), VALID)]
+    assert store.backfill(responses) == 3
+    assert store.backfill(responses) == 0
+    assert store.standings(94, 2023) is not None
+
+
+def test_manager_answers_team_standing_from_the_store(manager, api):
+    api.responses['standings'] = standings_payload()
+    manager.get_standings(94, 2023)
+    assert manager.get_team_standing(228, 94, 2023)['rank'] == 3
+    assert manager.get_team_standing(212, season=2023)['league_id'] == 94
+    assert api.endpoints() == ['standings']
+
+
+def test_clear_removes_coverage(store):
+    store.ingest('standings', {'league': 94, 'season': 2023}, standings_payload(), VALID)
+    store.clear()
+    assert store.standings(94, 2023) is None
@@ -0,0 +1,88 @@
+import threading
+
+import pytest
+
+from cache_keys import request_key
+from conftest import standings_payload
+from lookup_executor import LookupExecutor
+from rate_limiter import RateLimitExceeded
+
+
+@pytest.fixture
+def executor(manager):
+    executor = LookupExecutor(manager, max_workers=2, per_request=2)
+    yield executor
+    executor.shutdown()
+
+
+def _thread():
+    return threading.current_thread().name
+
+
+def test_single_lookup_runs_on_the_calling_thread(executor):
+    assert list(executor.stream({'only': (_thread, ())})) == [('only', True, _thread())]
+    assert executor.run({'only': (_thread, ())}) == {'only': _thread()}
+    assert executor.get_stats()['inline'] == 2
+
+
+def test_dependency_chain_runs_on_the_calling_thread(executor):
+    results = executor.run({'first': (_thread, ()), 'second': (lambda first: (first, _thread()), ['first'])})
+    assert results['second'] == (_thread(), _thread())
+
+
+def test_independent_lookups_use_the_pool(executor):
+    results = executor.run({'a': (_thread, ()), 'b': (_thread, ())})
+    assert all(name.startswith('lookup') for name in results.values())
+
+
+def test_requests_never_queue_behind_a_busy_pool(executor):
+    release = threading.Event()
+    started = threading.Barrier(3)
+
+    def blocked():
+        started.wait(5)
+        release.wait(5)
+        return 'lento'
+
+    # Outro pedido ocupa as duas threads do pool
+    other = threading.Thread(target=lambda: executor.run({'a': (blocked, ()), 'b': (blocked, ())}))
+    other.start()
+    started.wait(5)
+    try:
+        results = dict((name, value) for name, _, value in executor.stream({'x': (_thread, ()), 'y': (_thread, ())}))
+        assert results == {'x': _thread(), 'y': _thread()}
+    finally:
+        release.set()
+        other.join(5)
+
+
+def test_each_request_uses_at_most_per_request_threads(manager):
+    executor = LookupExecutor(manager, max_workers=8, per_request=2)
+    lock = threading.Lock()
+    active = {'now': 0, 'max': 0}
+
+    def work():
+        with lock:
+            active['now'] += 1
+            active['max'] = max(active['max'], active['now'])
+        threading.Event().wait(0.02)
+        with lock:
+            active['now'] -= 1
+
+    executor.run({str(i): (work, ()) for i in range(6)})
+    assert active['max'] <= 2
+    executor.shutdown()
+
+
+def test_inline_errors_and_dependencies_reach_the_caller(executor, manager, api):
+    api.responses['standings'] = standings_payload()
+
+    def limited():
+        raise RateLimitExceeded(3)
+
+    with pytest.raises(RateLimitExceeded):
+        executor.run({'limited': (limited, ())})
+    with manager.track_dependencies() as deps:
+        [(_, ok, _)] = executor.stream({'standings': (manager.get_standings, (94, 2023))})
+    assert ok
+    assert request_key('standings', {'league': 94, 'season': 2023}) in deps['versions']
@@ -0,0 +1,99 @@
+import threading
+
+from memory_cache import MemoryLRUCache
+
+FAR = 10 ** 12
+
+
+def test_evicts_least_recently_used_by_bytes():
+    cache = MemoryLRUCache(max_bytes=100)
+    cache.set('a', 'A', FAR, 40)
+    cache.set('b', 'B', FAR, 40)
+    assert cache.get('a') == 'A'  # 'b' passa a ser o menos usado
+    cache.set('c', 'C', FAR, 40)
+    assert cache.get('b') is None
+    assert cache.get('a') == 'A' and cache.get('c') == 'C'
+    stats = cache.stats()
+    assert stats['bytes'] == 80 and stats['evictions'] == 1
+
+
+def test_evicts_by_entry_count():
+    cache = MemoryLRUCache(max_bytes=1000, max_entries=2)
+    for key in 'abc':
+        cache.set(key, key, FAR, 1)
+    assert cache.get('a') is None
+    assert cache.stats()['entries'] == 2
+
+
+def test_values_larger_than_the_cache_are_not_stored():
+    cache = MemoryLRUCache(max_bytes=10)
+    cache.set('big', 'x', FAR, 11)
+    assert cache.get('big') is None
+    assert cache.stats()['bytes'] == 0
+
+
+def test_replacing_a_key_updates_its_size():
+    cache = MemoryLRUCache(max_bytes=100)
+    cache.set('a', 1, FAR, 30)
+    cache.set('a', 2, FAR, 50)
+    assert cache.get('a') == 2
+    assert cache.stats()['bytes'] == 50
+
+
+def test_expired_entries_are_misses():
+    cache = MemoryLRUCache()
+    cache.set('a', 'A', 100.0, 1)
+    assert cache.get('a', now=99.0) == 'A'
+    assert cache.get('a', now=100.0) is None
+    stats = cache.stats()
+    assert stats['expirations'] == 1 and stats['entries'] == 0 and stats['bytes'] == 0
+
+
+def test_purge_expired_and_invalidate():
+    cache = MemoryLRUCache()
+    cache.set('old', 1, 50.0, 5)
+    cache.set('new', 2, 500.0, 5)
+    cache.set('gone', 3, 500.0, 5)
+    assert cache.purge_expired(now=100.0) == 1
+    cache.invalidate('gone')
+    assert cache.get('new', now=100.0) == 2
+    assert cache.stats()['entries'] == 1 and cache.stats()['bytes'] == 5
+
+
+def test_expiry_of_stored_and_missing_keys():
+    cache = MemoryLRUCache()
+    cache.set('a', 'A', 123.0, 1)
+    assert cache.expiry('a') == 123.0
+    assert cache.expiry('b') is None
+
+
+def test_expiry_while_other_threads_evict():
+    cache = MemoryLRUCache(max_bytes=50, max_entries=5)
+    stop = threading.Event()
+
+    def writer():
+        i = 0
+        while not stop.is_set():
+            cache.set(f'k{i % 20}', i, FAR, 10)
+            i += 1
+
+    threads = [threading.Thread(target=writer) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    try:
+        for i in range(20000):
+            assert cache.expiry(f'k{i % 20}') in (None, FAR)
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join()
+    assert cache.stats()['entries'] <= 5
+
+
+def test_manager_serves_repeated_requests_from_memory(manager, api):
+    api.responses['leagues'] = {'errors': [], 'results': 1, 'response': [{'league': {'id': 94}}]}
+    manager.get_leagues('Portugal')
+    manager.reset_response_info()
+    assert manager.get_leagues('Portugal') == [{'league': {'id': 94}}]
+    assert manager.response_info()['source'] == 'memory'
+    assert manager.memory_cache.stats()['hits'] == 1
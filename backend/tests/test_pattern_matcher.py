@@ -0,0 +1,46 @@
+import re
+
+from chatbot import FootballChatbot
+from pattern_matcher import PatternMatcher
+
+
+def test_pattern_counts_match_findall():
+    patterns = {'porto': 'team', 'benfica': 'team', 'vs': 'h2h', 'liga': 'league', 'liga portugal': 'league'}
+    text = 'benfica vs porto na liga portugal, porto em casa'
+    matcher = PatternMatcher()
+    for pattern, label in patterns.items():
+        matcher.add(pattern, label)
+    expected = {}
+    for pattern, label in patterns.items():
+        expected[label] = expected.get(label, 0) + len(re.findall(re.escape(pattern), text))
+    assert matcher.scan(text) == expected
+
+
+def test_pattern_overlapping_and_nested_patterns():
+    matcher = PatternMatcher()
+    matcher.add('he', 'he')
+    matcher.add('she', 'she')
+    matcher.add('hers', 'hers')
+    assert matcher.scan('ushers') == {'he': 1, 'she': 1, 'hers': 1}
+
+
+def test_pattern_regex_patterns_and_repeated_labels():
+    matcher = PatternMatcher()
+    matcher.add(r'\bvs\.?\b', 'h2h')
+    matcher.add('contra', 'h2h')
+    matcher.add('contra', 'h2h')
+    hits = matcher.scan('porto vs benfica ou porto contra sporting')
+    assert hits['h2h'] == 3
+    # Padrões acrescentados depois de uma pesquisa também contam
+    matcher.add('sporting', 'team')
+    assert matcher.scan('sporting')['team'] == 1
+
+
+def test_chatbot_classifies_in_one_scan(manager):
+    chatbot = FootballChatbot('test-key', data_manager=manager)
+    question = 'classificação da premier league'
+    hits = chatbot.matcher.scan(question)
+    assert chatbot._classify_question(question, hits) == 'standings'
+    assert chatbot._identify_league(question, hits)['id'] == 39
+    assert chatbot._handle_special_commands('ajuda') is not None
+    assert chatbot._classify_question('olá') == 'general'
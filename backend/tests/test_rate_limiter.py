@@ -0,0 +1,89 @@
+import time
+
+import pytest
+
+from cache_keys import request_key
+from db_pool import SQLitePool
+from rate_limiter import RateLimiter, RateLimitExceeded
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = SQLitePool(str(tmp_path / 'limits.db'))
+    yield db
+    db.close_all()
+
+
+def test_burst_then_rate_limited(db):
+    limiter = RateLimiter(db, requests_per_minute=30, burst=5, daily_quota=100)
+    assert all(limiter.try_acquire().allowed for _ in range(5))
+    decision = limiter.try_acquire()
+    assert not decision.allowed
+    assert decision.reason == 'rate'
+    # 30/min = um token a cada 2s
+    assert 0 < decision.retry_after <= 2
+    with pytest.raises(RateLimitExceeded) as error:
+        decision.raise_if_denied()
+    assert error.value.reason == 'rate'
+
+
+def test_daily_quota(db):
+    limiter = RateLimiter(db, requests_per_minute=6000, burst=100, daily_quota=3)
+    assert all(limiter.try_acquire().allowed for _ in range(3))
+    decision = limiter.try_acquire()
+    assert not decision.allowed and decision.reason == 'quota'
+    assert decision.retry_after > 0
+    assert limiter.used_today() == 3
+
+
+def test_exhaust_quota(db):
+    limiter = RateLimiter(db, daily_quota=100)
+    limiter.try_acquire()
+    limiter.exhaust_quota()
+    assert limiter.try_acquire().reason == 'quota'
+    status = limiter.status()
+    assert status['used_today'] == 100 and status['remaining_today'] == 0
+
+
+def test_state_is_shared_between_instances(db):
+    RateLimiter(db, burst=5, daily_quota=100).try_acquire()
+    other = RateLimiter(db, burst=5, daily_quota=100)
+    assert other.used_today() == 1
+    assert other.status()['remaining_today'] == 99
+    # Limitadores com outro nome têm o seu próprio balde
+    assert RateLimiter(db, name='outro').used_today() == 0
+
+
+def test_quota_reply_leaves_the_marker_in_place(manager, api):
+    api.responses['standings'] = {'errors': {'requests': 'You have reached the request limit for the day'},
+                                  'results': 0, 'response': []}
+    assert manager.get_standings(94, 2023) is None
+    status_code, expires_at = manager.db.fetchone(
+        'SELECT status_code, expires_at FROM api_requests WHERE request_key = ?',
+        (request_key('standings', {'league': 94, 'season': 2023}),))
+    assert status_code == 429
+    assert expires_at - time.time() <= 300
+    assert manager.get_api_status() == 'offline'
+    assert manager.rate_limiter.status()['remaining_today'] == 0
+    # Enquanto o marcador é válido a chave não volta à API
+    assert manager.get_standings(94, 2023) is None
+    assert api.endpoints() == ['standings']
+
+
+def test_rate_limited_request_returns_429(app_module, client):
+    app_module.football_manager.rate_limiter = RateLimiter(app_module.football_manager.db, name='429',
+                                                           requests_per_minute=1, burst=1)
+    assert client.get('/api/standings/94').status_code == 200
+    response = client.get('/api/standings/39')
+    assert response.status_code == 429
+    assert int(response.headers['Retry-After']) >= 1
+    assert response.json['reason'] == 'rate'
+    assert client.api.endpoints() == ['standings']
+
+
+def test_exhausted_quota_returns_429(app_module, client):
+    app_module.football_manager.rate_limiter.exhaust_quota()
+    response = client.get('/api/standings/94')
+    assert response.status_code == 429
+    assert response.json['reason'] == 'quota'
+    assert client.api.calls == []
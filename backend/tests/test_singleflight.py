@@ -0,0 +1,81 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from cache_keys import request_key
+from conftest import standings_payload
+from singleflight import SingleFlight
+
+
+def _wait_for_waiters(flight: SingleFlight, key: str, waiters: int):
+    while True:
+        with flight._lock:
+            call = flight._calls.get(key)
+            if call is not None and call.waiters >= waiters:
+                return
+
+
+def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight()
+    release = threading.Event()
+    runs = []
+
+    def work():
+        runs.append(1)
+        release.wait(5)
+        return 'resultado'
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        futures = [pool.submit(flight.do, 'key', work) for _ in range(4)]
+        _wait_for_waiters(flight, 'key', 3)
+        release.set()
+        results = [f.result() for f in futures]
+
+    assert len(runs) == 1
+    assert sorted(shared for _, shared in results) == [False, True, True, True]
+    assert all(value == 'resultado' for value, _ in results)
+    assert flight.stats() == {'executions': 1, 'coalesced': 3, 'in_flight': 0}
+
+
+def test_errors_reach_every_waiter():
+    flight = SingleFlight()
+    release = threading.Event()
+
+    def work():
+        release.wait(5)
+        raise ValueError('falhou')
+
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        futures = [pool.submit(flight.do, 'key', work) for _ in range(3)]
+        _wait_for_waiters(flight, 'key', 2)
+        release.set()
+        for future in futures:
+            with pytest.raises(ValueError, match='falhou'):
+                future.result()
+    assert flight.stats()['in_flight'] == 0
+
+
+def test_sequential_calls_run_again():
+    flight = SingleFlight()
+    assert flight.do('key', lambda: 1) == (1, False)
+    assert flight.do('key', lambda: 2) == (2, False)
+    assert flight.stats()['executions'] == 2
+
+
+def test_manager_coalesces_concurrent_misses(manager, api):
+    release = threading.Event()
+
+    def slow_standings(params):
+        release.wait(5)
+        return standings_payload()
+
+    api.responses['standings'] = slow_standings
+    key = request_key('standings', {'league': 94, 'season': 2023})
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        futures = [pool.submit(manager.get_standings, 94, 2023) for _ in range(4)]
+        _wait_for_waiters(manager.single_flight, key, 3)
+        release.set()
+        results = [f.result() for f in futures]
+    assert all(r == results[0] for r in results)
+    assert api.endpoints() == ['standings']
@@ -0,0 +1,75 @@
+import time
+
+from cache_keys import request_key
+from cache_policy import HOUR
+
+LEAGUES = {'errors': [], 'results': 1, 'response': [{'league': {'id': 94, 'name': 'Primeira Liga'}}]}
+
+
+def _wait_for_refreshes(manager):
+    deadline = time.time() + 5
+    while manager._refreshing and time.time() < deadline:
+        time.sleep(0.01)
+
+
+def _expire(manager, endpoint, params, seconds_ago):
+    manager.db.execute('UPDATE api_requests SET expires_at = ? WHERE request_key = ?',
+                       (time.time() - seconds_ago, request_key(endpoint, params)))
+    manager.memory_cache.clear()
+
+
+def test_valid_entries_are_served_without_the_api(manager, api):
+    api.responses['leagues'] = LEAGUES
+    assert manager.get_leagues('Portugal') == LEAGUES['response']
+    assert manager.get_leagues('Portugal') == LEAGUES['response']
+    manager.memory_cache.clear()
+    manager.reset_response_info()
+    assert manager.get_leagues('Portugal') == LEAGUES['response']
+    assert manager.response_info()['source'] == 'sqlite'
+    assert api.endpoints() == ['leagues']
+
+
+def test_expired_entry_is_served_stale_and_refreshed(manager, api):
+    api.responses['leagues'] = LEAGUES
+    manager.get_leagues('Portugal')
+    _expire(manager, 'leagues', {'country': 'Portugal'}, 60)
+    refreshed = {'errors': [], 'results': 1, 'response': [{'league': {'id': 94, 'name': 'Liga Portugal'}}]}
+    api.responses['leagues'] = refreshed
+
+    manager.reset_response_info()
+    assert manager.get_leagues('Portugal') == LEAGUES['response']
+    info = manager.response_info()
+    assert info['stale'] and info['age'] is not None
+    assert manager.swr_stats['stale_served'] == 1
+
+    # A atualização em segundo plano volta a preencher o cache
+    _wait_for_refreshes(manager)
+    assert manager.swr_stats == {'stale_served': 1, 'refreshes': 1, 'refresh_failures': 0}
+    assert manager.get_leagues('Portugal') == refreshed['response']
+    assert api.endpoints() == ['leagues', 'leagues']
+
+
+def test_entries_past_max_stale_go_to_the_api(manager, api):
+    api.responses['leagues'] = LEAGUES
+    manager.get_leagues('Portugal')
+    # leagues: max_stale de 7 dias
+    _expire(manager, 'leagues', {'country': 'Portugal'}, 8 * 24 * HOUR)
+    manager.reset_response_info()
+    manager.get_leagues('Portugal')
+    assert manager.response_info()['source'] == 'api'
+    assert manager.swr_stats['stale_served'] == 0
+    assert api.endpoints() == ['leagues', 'leagues']
+
+
+def test_failed_refresh_keeps_the_stale_entry(manager, api):
+    api.responses['leagues'] = LEAGUES
+    manager.get_leagues('Portugal')
+    _expire(manager, 'leagues', {'country': 'Portugal'}, 60)
+    api.responses['leagues'] = {'errors': {'requests': 'Too many requests'}, 'results': 0, 'response': []}
+
+    assert manager.get_leagues('Portugal') == LEAGUES['response']
+    _wait_for_refreshes(manager)
+    assert manager.swr_stats['refresh_failures'] == 1
+    # A resposta de erro não substituiu a entrada: continua a ser servida enquanto estiver dentro do max_stale
+    manager.memory_cache.clear()
+    assert manager.get_leagues('Portugal') == LEAGUES['response']
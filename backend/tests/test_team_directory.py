@@ -0,0 +1,35 @@
+from conftest import standings_payload
+
+
+def _ids(teams):
+    return [entry['team']['id'] for entry in teams]
+
+
+def test_popular_teams_are_found_offline(manager, api):
+    assert _ids(manager.identify_team_by_name('Benfica'))[0] == 211
+    assert _ids(manager.identify_team_by_name('slb'))[0] == 211
+    assert _ids(manager.search_team('dragões'))[0] == 212
+    assert api.calls == []
+
+
+def test_teams_from_stored_responses_join_the_directory(manager, api):
+    api.responses['standings'] = standings_payload(39, teams=[(42, 'Arsenal'), (40, 'Liverpool')])
+    manager.get_standings(39, 2023)
+    assert _ids(manager.identify_team_by_name('Arsenal', upstream=False)) == [42]
+    assert api.endpoints() == ['standings']
+
+
+def test_unknown_teams_only_go_upstream_when_allowed(manager, api):
+    assert manager.identify_team_by_name('Clube Inexistente', upstream=False) is None
+    assert api.calls == []
+    manager.identify_team_by_name('Clube Inexistente')
+    assert api.calls == [('teams', {'search': 'Clube Inexistente'})]
+    # Frases inteiras não são pesquisadas na API
+    manager.identify_team_by_name('como está a equipa da terra')
+    assert len(api.calls) == 1
+
+
+def test_team_statistics_do_not_write_to_stdout(manager, api, capsys):
+    api.responses['teams/statistics'] = {'errors': [], 'results': 1, 'response': {'team': {'id': 211}}}
+    assert manager.get_team_statistics(211, 94, 2023) == {'team': {'id': 211}}
+    assert capsys.readouterr().out == ''
@@ -0,0 +1,32 @@
+import pytest
+
+from chatbot import FootballChatbot
+from conftest import standings_payload
+
+
+@pytest.fixture
+def chatbot(manager):
+    return FootballChatbot('test-key', data_manager=manager)
+
+
+def test_reverse_indexes(manager):
+    assert manager.get_team_league(211) == 94
+    assert manager.find_team_id('slb') == 211
+    assert 'benfica' in manager.get_team_aliases(211)
+    assert manager.get_league_info(39)['name'] == 'Premier League'
+    assert manager.get_team_league(999999) is None
+
+
+def test_identified_team_carries_its_league_without_touching_the_directory(chatbot, manager, api):
+    team = chatbot._identify_team('como está o benfica')
+    assert team['id'] == 211 and team['league'] == 94
+    assert 'league' not in manager.team_directory.get(211)['team']
+    assert api.calls == []
+
+
+def test_teams_from_stored_standings_are_not_mutated(chatbot, manager, api):
+    api.responses['standings'] = standings_payload(39, teams=[(42, 'Arsenal')])
+    manager.get_standings(39, 2023)
+    team = chatbot._identify_team('estatísticas do arsenal', upstream=False)
+    assert team['id'] == 42 and team['league'] == 39
+    assert 'league' not in manager.team_directory.get(42)['team']
@@ -0,0 +1,62 @@
+import pytest
+
+from conftest import standings_payload
+from rate_limiter import RateLimiter
+from warmup import CacheWarmer
+
+
+@pytest.fixture
+def warmer(manager, api):
+    api.responses['standings'] = lambda params: standings_payload(int(params['league']))
+    return CacheWarmer(manager, priority=['england', 'portugal'])
+
+
+def test_targets_follow_priority_and_endpoint_order(warmer):
+    targets = warmer.targets()
+    assert len(targets) == 3 * len(warmer.manager.available_leagues)
+    assert targets[0] == ('england', 'standings', {'league': 39, 'season': 2023})
+    assert targets[1] == ('portugal', 'standings', {'league': 94, 'season': 2023})
+    # Classificação de todas as ligas antes dos marcadores e do calendário
+    assert [endpoint for _, endpoint, _ in targets[:12]] == ['standings'] * 12
+    assert targets[-1][1] == 'fixtures'
+
+
+def test_run_once_stays_within_the_budget(warmer, api):
+    warmer.max_requests_per_run = 5
+    summary = warmer.run_once()
+    assert summary['fetched'] == 5 and summary['stopped_by'] == 'budget'
+    assert summary['skipped'] == len(warmer.targets()) - 5
+    assert [params['league'] for _, params in api.calls] == [39, 94, 140, 78, 135]
+
+
+def test_warm_keys_are_not_fetched_again(warmer, api):
+    warmer.max_requests_per_run = 2
+    warmer.run_once()
+    summary = warmer.run_once()
+    assert summary['already_warm'] == 2 and summary['fetched'] == 2
+    assert len(api.calls) == 4
+    assert warmer.status()['warm'] == 4
+
+
+def test_reserved_quota_is_left_for_users(warmer, api, manager):
+    manager.rate_limiter = RateLimiter(manager.db, name='warmup', requests_per_minute=6000, burst=1000,
+                                       daily_quota=32)
+    warmer.reserve_quota = 30
+    summary = warmer.run_once()
+    assert summary['fetched'] == 2 and summary['stopped_by'] == 'quota'
+    assert manager.rate_limiter.status()['remaining_today'] == 30
+
+
+def test_failed_keys_back_off(warmer, api):
+    api.responses['players/topscorers'] = {'errors': {'plan': 'Free plans do not have access to this season.'},
+                                           'results': 0, 'response': []}
+    warmer.max_requests_per_run = 100
+    first = warmer.run_once()
+    scorers = len(warmer.manager.available_leagues)
+    assert first['failed'] == scorers
+    calls = len(api.calls)
+
+    second = warmer.run_once()
+    # Só as chaves que falharam ficam por aquecer e nenhuma é tentada antes do fim do backoff
+    assert second['skipped'] == scorers and second['fetched'] == 0
+    assert len(api.calls) == calls
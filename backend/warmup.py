@@ -0,0 +1,186 @@
+import time
+import logging
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from cache_keys import make_request_key
+from rate_limiter import RateLimitExceeded
+
+logger = logging.getLogger(__name__)
+
+SQL_SELECT_EXPIRY = 'SELECT expires_at FROM api_requests WHERE request_key = ? AND status_code = 200'
+
+# Ordem de popularidade por defeito (chaves de available_leagues); as restantes vêm a seguir
+DEFAULT_PRIORITY = ['portugal', 'england', 'spain', 'champions', 'italy', 'germany', 'france',
+                    'europa', 'brazil', 'netherlands', 'argentina', 'conference']
+
+
+class CacheWarmer:
+    """
+    Pré-carrega em segundo plano classificação, marcadores e calendário da época de cada liga disponível,
+    por ordem de popularidade e dentro de um orçamento de requests à API
+    """
+
+    def __init__(self, manager, season: int = 2023, interval: float = 3600, max_requests_per_run: int = 20,
+                 reserve_quota: int = 30, priority: List[str] = None,
+                 failure_backoff: float = 6 * 3600):
+        self.manager = manager
+        self.season = season
+        self.interval = interval
+        # Máximo de requests por execução e quota diária que fica sempre para os utilizadores
+        self.max_requests_per_run = max_requests_per_run
+        self.reserve_quota = reserve_quota
+        self.priority = priority or DEFAULT_PRIORITY
+        # Chaves que falharam (ex: taças sem classificação) só voltam a ser tentadas depois do backoff
+        self.failure_backoff = failure_backoff
+        self._failed_until: Dict[Tuple[str, str], float] = {}
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._run_lock = threading.Lock()
+        self.last_run: Optional[Dict] = None
+        self.runs = 0
+
+    def targets(self) -> List[Tuple[str, str, Dict]]:
+        """
+        (liga, endpoint, params) a manter quentes, já ordenados por prioridade
+        """
+        leagues = self.manager.available_leagues
+        order = [k for k in self.priority if k in leagues] + [k for k in leagues if k not in self.priority]
+        # Primeiro a classificação de todas as ligas (a barra lateral), depois marcadores e o calendário da
+        # época (fixtures?league&season, a chave de onde o FixtureSchedule responde a últimos/próximos jogos)
+        targets = []
+        for endpoint in ('standings', 'players/topscorers', 'fixtures'):
+            for league_key in order:
+                params = {'league': leagues[league_key]['id'], 'season': self.season}
+                targets.append((league_key, endpoint, params))
+        return targets
+
+    def _expires_at(self, endpoint: str, params: Dict) -> Optional[float]:
+        key, _ = make_request_key(endpoint, params)
+        row = self.manager.db.fetchone(SQL_SELECT_EXPIRY, (key,))
+        return row[0] if row else None
+
+    def _quota_left(self) -> int:
+        return self.manager.rate_limiter.status()['remaining_today'] - self.reserve_quota
+
+    def _fetch(self, endpoint: str, params: Dict) -> bool:
+        key, _ = make_request_key(endpoint, params)
+        manager = self.manager
+        data, _ = manager.single_flight.do(key, lambda: manager._fetch_if_missing(key, endpoint, params))
+        return data is not None
+
+    def run_once(self) -> Dict:
+        """
+        Uma passagem: busca à API só as chaves que não estão válidas no cache, até esgotar o orçamento
+        """
+        with self._run_lock:
+            started = time.time()
+            summary = {'started_at': started, 'fetched': 0, 'already_warm': 0, 'failed': 0, 'skipped': 0,
+                       'stopped_by': None}
+            for league_key, endpoint, params in self.targets():
+                expires_at = self._expires_at(endpoint, params)
+                if expires_at is not None and expires_at > time.time():
+                    summary['already_warm'] += 1
+                    continue
+                target = (endpoint, make_request_key(endpoint, params)[0])
+                if self._failed_until.get(target, 0) > time.time():
+                    summary['skipped'] += 1
+                    continue
+                if summary['stopped_by'] is not None:
+                    summary['skipped'] += 1
+                    continue
+                if summary['fetched'] + summary['failed'] >= self.max_requests_per_run:
+                    summary['stopped_by'] = 'budget'
+                    summary['skipped'] += 1
+                    continue
+                if self._quota_left() <= 0:
+                    summary['stopped_by'] = 'quota'
+                    summary['skipped'] += 1
+                    continue
+                try:
+                    ok = self._fetch(endpoint, params)
+                except RateLimitExceeded as e:
+                    if e.reason == 'quota' or self._stop.wait(e.retry_after):
+                        summary['stopped_by'] = e.reason if not self._stop.is_set() else 'stopped'
+                        summary['skipped'] += 1
+                        continue
+                    try:
+                        ok = self._fetch(endpoint, params)
+                    except RateLimitExceeded as e:
+                        summary['stopped_by'] = e.reason
+                        summary['skipped'] += 1
+                        continue
+                except Exception as e:
+                    logger.error(f"❌ Erro no aquecimento de {endpoint} ({league_key}): {e}", exc_info=True)
+                    ok = False
+                summary['fetched' if ok else 'failed'] += 1
+                if ok:
+                    self._failed_until.pop(target, None)
+                else:
+                    self._failed_until[target] = time.time() + self.failure_backoff
+            summary['duration'] = round(time.time() - started, 2)
+            self.last_run = summary
+            self.runs += 1
+        logger.info(f"🔥 Aquecimento do cache: {summary['fetched']} carregados, {summary['already_warm']} já quentes, "
+                    f"{summary['skipped']} adiados")
+        return summary
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.error(f"❌ Erro no aquecimento do cache: {e}", exc_info=True)
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+    def start(self):
+        """
+        Arrancar o agendador numa thread daemon (primeira passagem imediata)
+        """
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name='cache-warmup', daemon=True)
+        self._thread.start()
+        logger.info(f"🔥 Aquecimento do cache agendado a cada {self.interval:.0f}s")
+
+    def trigger(self):
+        """
+        Antecipar a próxima passagem (ex: depois de limpar o cache)
+        """
+        self._wake.set()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def status(self) -> Dict:
+        """
+        Estado de cada chave alvo (quente ou não, e quanto falta para expirar) e resumo da última passagem
+        """
+        now = time.time()
+        keys = []
+        for league_key, endpoint, params in self.targets():
+            expires_at = self._expires_at(endpoint, params)
+            warm = expires_at is not None and expires_at > now
+            keys.append({
+                'league': league_key,
+                'league_id': params['league'],
+                'endpoint': endpoint,
+                'params': params,
+                'warm': warm,
+                'expires_in': round(expires_at - now) if warm else None
+            })
+        return {
+            'running': self._thread is not None and self._thread.is_alive(),
+            'interval': self.interval,
+            'max_requests_per_run': self.max_requests_per_run,
+            'reserve_quota': self.reserve_quota,
+            'warm': sum(1 for k in keys if k['warm']),
+            'total': len(keys),
+            'runs': self.runs,
+            'last_run': self.last_run,
+            'keys': keys
+        }
@@ -113,8 +113,10 @@ class FootballChatBot {
       teamsContainer.innerHTML =
         '<div class="stats-loading"><i class="fas fa-spinner fa-spin"></i> Carregando...</div>';
     try {
+      // Revalidar com ETag: se nada mudou o servidor responde 304 e o browser usa a cópia que já tem
       const response = await fetch(
-        `${this.apiUrl}/api/popular-teams?league=${leagueId}`
+        `${this.apiUrl}/api/popular-teams?league=${leagueId}`,
+        { cache: "no-cache" }
       );
       if (response.ok) {
         const data = await response.json();
@@ -170,8 +172,10 @@ class FootballChatBot {
         const leagueName = this.getLeagueNameById(leagueId);
         statsTitle.innerHTML = `<i class="fas fa-chart-bar"></i> ${leagueName}`;
       }
+      // Revalidar com ETag: se nada mudou o servidor responde 304 e o browser usa a cópia que já tem
       const response = await fetch(
-        `${this.apiUrl}/api/standings/${leagueId}?season=2023`
+        `${this.apiUrl}/api/standings/${leagueId}?season=2023`,
+        { cache: "no-cache" }
       );
       if (response.ok) {
         const data = await response.json();
@@ -315,31 +319,10 @@ class FootballChatBot {
       // Obter o league_id selecionado
       const leagueSelect = document.getElementById("leagueSelect");
       const league_id = leagueSelect ? parseInt(leagueSelect.value) : 94;
-      // Preparar o body com encoding explícito
-      const requestBody = { question: message, league_id };
-      const jsonString = JSON.stringify(requestBody);
-      // Send to API
-      const response = await fetch(`${this.apiUrl}/api/chat`, {
-        method: "POST",
-        headers: {
-          "Content-Type": "application/json; charset=utf-8",
-          Accept: "application/json",
-          "Accept-Charset": "utf-8",
-        },
-        body: jsonString,
-      });
-      if (!response.ok) {
-        const errorData = await response
-          .json()
-          .catch(() => ({ error: "Erro desconhecido" }));
-        throw new Error(
-          errorData.error || `HTTP error! status: ${response.status}`
-        );
-      }
-      const data = await response.json();
+      // Resposta por streaming: aparece por partes à medida que os dados chegam
+      const data = await this.streamAnswer(message, league_id);
       this.requestCount = data.requests_used || this.requestCount + 1;
       this.updateRequestCounter();
-      this.addMessage(data.response, "bot");
     } catch (error) {
       let errorMessage = "Desculpe, ocorreu um erro. Tente novamente.";
       if (error.message.includes("Failed to fetch")) {
@@ -388,6 +371,87 @@ class FootballChatBot {
 
     chatMessages.appendChild(messageDiv);
     this.scrollToBottom();
+    return messageDiv;
+  }
+
+  // Resposta por Server-Sent Events: a mensagem do bot é criada com o primeiro evento e atualizada a cada secção
+  async streamAnswer(message, league_id) {
+    const response = await fetch(`${this.apiUrl}/api/chat/stream`, {
+      method: "POST",
+      headers: {
+        "Content-Type": "application/json; charset=utf-8",
+        Accept: "text/event-stream",
+      },
+      body: JSON.stringify({ question: message, league_id }),
+    });
+    if (!response.ok) {
+      const errorData = await response
+        .json()
+        .catch(() => ({ error: "Erro desconhecido" }));
+      throw new Error(
+        errorData.error || `HTTP error! status: ${response.status}`
+      );
+    }
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder("utf-8");
+    let buffer = "";
+    let messageDiv = null;
+    let status = "";
+    let label = "";
+    const sections = [];
+    const render = (text) => {
+      if (!messageDiv) {
+        messageDiv = this.addMessage(text, "bot");
+        // Já há algo para ler: tirar o modal, mas manter o envio bloqueado até ao fim
+        document.getElementById("loadingModal")?.classList.remove("show");
+      } else {
+        messageDiv.querySelector(".message-text").innerHTML =
+          this.formatMessage(text);
+        this.scrollToBottom();
+      }
+    };
+    const renderPartial = () =>
+      render([...sections, status ? `*${status}*` : ""].filter(Boolean).join("\n\n"));
+    while (true) {
+      const { value, done } = await reader.read();
+      if (done) break;
+      buffer += decoder.decode(value, { stream: true });
+      let boundary;
+      while ((boundary = buffer.indexOf("\n\n")) !== -1) {
+        const event = this.parseSseEvent(buffer.slice(0, boundary));
+        buffer = buffer.slice(boundary + 2);
+        if (!event) continue; // comentários (": ping") só mantêm a ligação aberta
+        if (event.type === "status") {
+          label = status = event.data.text;
+          renderPartial();
+        } else if (event.type === "progress") {
+          // Secções que ainda faltam: o estado continua visível por baixo das que já chegaram
+          status = event.data.done < event.data.total
+            ? `${label} (${event.data.done}/${event.data.total})`
+            : "";
+          renderPartial();
+        } else if (event.type === "section") {
+          sections.push(event.data.text);
+          renderPartial();
+        } else if (event.type === "done") {
+          render(event.data.response);
+          return event.data;
+        } else if (event.type === "error") {
+          throw new Error(event.data.error);
+        }
+      }
+    }
+    throw new Error("Ligação interrompida antes do fim da resposta");
+  }
+
+  parseSseEvent(raw) {
+    let type = "message";
+    const data = [];
+    for (const line of raw.split("\n")) {
+      if (line.startsWith("event:")) type = line.slice(6).trim();
+      else if (line.startsWith("data:")) data.push(line.slice(5).trimStart());
+    }
+    return data.length ? { type, data: JSON.parse(data.join("\n")) } : null;
   }
 
   formatMessage(text) {
@@ -535,29 +599,9 @@ class FootballChatBot {
     this.addMessage(message, "user");
     this.setLoading(true);
     try {
-      const requestBody = { question: message, league_id };
-      const jsonString = JSON.stringify(requestBody);
-      const response = await fetch(`${this.apiUrl}/api/chat`, {
-        method: "POST",
-        headers: {
-          "Content-Type": "application/json; charset=utf-8",
-          Accept: "application/json",
-          "Accept-Charset": "utf-8",
-        },
-        body: jsonString,
-      });
-      if (!response.ok) {
-        const errorData = await response
-          .json()
-          .catch(() => ({ error: "Erro desconhecido" }));
-        throw new Error(
-          errorData.error || `HTTP error! status: ${response.status}`
-        );
-      }
-      const data = await response.json();
+      const data = await this.streamAnswer(message, league_id);
       this.requestCount = data.requests_used || this.requestCount + 1;
       this.updateRequestCounter();
-      this.addMessage(data.response, "bot");
     } catch (error) {
       let errorMessage = "Desculpe, ocorreu um erro. Tente novamente.";
       if (error.message.includes("Failed to fetch")) {